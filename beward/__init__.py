@@ -3,10 +3,10 @@
 #  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
 """Python API for Beward Cameras and Doorbells."""
 
+import importlib
 import logging
+import select
 import struct
-import typing
-import urllib.parse
 from _socket import (
     AF_INET,
     SO_BROADCAST,
@@ -15,27 +15,46 @@ from _socket import (
     SOL_SOCKET,
     inet_ntoa,
     socket,
-    timeout,
 )
-from typing import Any
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_network
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 import hexdump
 
 # Will be parsed by setup.py to determine package metadata
-from beward.camera import BewardCamera
 from beward.const import (
-    BEWARD_CAMERA,
-    BEWARD_DOORBELL,
+    CONFIG_MAX_WORKERS,
+    DISCOVERY_PORT,
+    DISCOVERY_REQUEST,
+    DISCOVERY_TIMEOUT,
     STARTUP_MESSAGE,
+    SWEEP_RATE,
+    SWEEP_WINDOW,
     URLS,
 )
 from beward.core import BewardGeneric
-from beward.doorbell import BewardDoorbell
+from beward.log import redact_auth_from_url, split_auth_from_netloc  # noqa: F401
+from beward.metrics import (
+    METRIC_DISCOVERY_DEVICES,
+    METRIC_DISCOVERY_DURATION,
+    MetricsRegistry,
+)
+from beward.registry import get_device_class
+
+if TYPE_CHECKING:
+    from beward.camera import BewardCamera
+    from beward.doorbell import BewardDoorbell
 
 # You really should not `import *` - it is poor practice
 # but if you do, here is what you get:
 __all__ = [
     "Beward",
+    "BewardDevice",
+    "ConfigResult",
     "BewardGeneric",
     "BewardCamera",
     "BewardDoorbell",
@@ -47,6 +66,25 @@ _LOGGER = logging.getLogger(__name__)
 # Avoids spurious error messages if no logger is configured by the user
 _LOGGER.addHandler(logging.NullHandler())
 
+# Device classes are imported on first access only
+_LAZY_CLASSES = {
+    "BewardCamera": "beward.camera",
+    "BewardDoorbell": "beward.doorbell",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import device classes lazily."""
+    if name in _LAZY_CLASSES:
+        return getattr(importlib.import_module(_LAZY_CLASSES[name]), name)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__() -> list[str]:
+    """Return list of module attributes including lazy ones."""
+    return sorted([*globals(), *_LAZY_CLASSES])
+
 
 def init() -> None:  # pragma: no cover
     """Run component initialization."""
@@ -56,55 +94,24 @@ def init() -> None:  # pragma: no cover
     init.__code__ = (lambda: None).__code__
 
 
-def split_auth_from_netloc(
-    netloc: str,
-) -> tuple[str, tuple[str | None, str | None]]:  # pragma: no cover
-    """
-    Parse out and remove the auth information from a netloc.
-
-    Returns: (netloc, (username, password)).
-    """
-    if "@" not in netloc:
-        return netloc, (None, None)
-
-    # Split from the right because that's how urllib.parse.urlsplit()
-    # behaves if more than one @ is present (which can be checked using
-    # the password attribute of urlsplit()'s return value).
-    auth, netloc = netloc.rsplit("@", 1)
-    pw = None
-    if ":" in auth:
-        # Split from the left because that's how urllib.parse.urlsplit()
-        # behaves if more than one : is present (which again can be checked
-        # using the password attribute of the return value)
-        user, pw = auth.split(":", 1)
-    else:
-        user, pw = auth, None
-
-    user = urllib.parse.unquote(user)
-    if pw is not None:
-        pw = urllib.parse.unquote(pw)
-
-    return netloc, (user, pw)
-
-
-def redact_auth_from_url(netloc: str) -> str:  # pragma: no cover
-    """
-    Replace the sensitive data in a netloc with "****", if it exists.
-
-    For example:
-        - "user:pass@example.com" returns "user:****@example.com"
-        - "accesstoken@example.com" returns "****@example.com"
-    """
-    netloc, (user, password) = split_auth_from_netloc(netloc)
-    if user is None:
-        return netloc
-    if password is None:
-        user = "****"
-        password = ""
-    else:
-        user = urllib.parse.quote(user)
-        password = ":****"  # noqa: S105
-    return f"{user}{password}@{netloc}"
+class BewardDevice(NamedTuple):
+    """Beward device found by discovery."""
+
+    device_id: int
+    name: str
+    host_ip: str
+    http_port: int
+    data_port: int
+    mac: str
+    net_mask: str
+    gate_ip: str
+
+
+class ConfigResult(NamedTuple):
+    """Result of configuration of Beward device."""
+
+    changed: dict[str, dict[str, str]]
+    error: Exception | None = None
 
 
 # pylint: disable=too-few-public-methods
@@ -112,141 +119,311 @@ class Beward:
     """Beward device factory class."""
 
     @staticmethod
-    def discovery() -> dict[str, Any]:  # pragma: no cover
+    def discovery(
+        address: str = "255.255.255.255",
+        port: int = DISCOVERY_PORT,
+        timeout: float = DISCOVERY_TIMEOUT,
+        metrics: MetricsRegistry | None = None,
+    ) -> dict[str, BewardDevice]:
         """Discover Beward devices in local network."""
         init()
+        start = perf_counter()
 
         server = socket(AF_INET, SOCK_DGRAM)
         server.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
         server.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
         server.bind(("0.0.0.0", 0))  # noqa: S104
-        server.settimeout(1)
+        server.settimeout(timeout)
 
         _LOGGER.debug("Start discovery")
-        server.sendto(
-            b"\x67\x45\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-            b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00",
-            ("255.255.255.255", 59123),
-        )
+        server.sendto(DISCOVERY_REQUEST, (address, port))
 
         devices = {}
         while True:
             try:
                 data = server.recvfrom(1024)
-                _LOGGER.debug(
-                    "Discovery response data:\n%s",
-                    hexdump.hexdump(data[0][28:], result="return"),
-                )
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug(
+                        "Discovery response data:\n%s",
+                        hexdump.hexdump(data[0][28:], result="return"),
+                    )
 
-                # ruff: noqa: ERA001
-                (
-                    # packet header (28 bytes):
-                    # "\x67\x45\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x48\x02\x00\x00" (packet data length) = 584
-                    # packet data (584 bytes):
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00"
-                    device_id,  # "\x5f\x06\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03"
-                    # "\x21\x00\x00"
-                    name,  # "\x49\x50\x43\x31\x37\x32\x34\x00\x00\x00\x00..."
-                    host_ip,  # "\x5a\x01\xa8\xc0"
-                    mac,  # "\x00\x5a\x22\x30\x07\x5f"
-                    http_port,  # "\x50\x00"
-                    data_port,  # "\x88\x13"
-                    # "\x00\x00"
-                    net_mask,  # "\x00\xff\xff\xff"
-                    gate_ip,  # "\x01\x01\xa8\xc0"
-                    # "\x01\x08\x37\xe0"
-                    # "\x01\x01\xa8\xc0" (gate_ip)
-                    # "\x88\x13" (data_port)
-                    # "\x00\x00\x01\x00\x00\x00"
-                    # "\x5a\x01\xa8\xc0" (host_ip)
-                    # "\x00\xff\xff\xff" "\x01\x01\xa8\xc0" (net_mask + gate_ip)
-                    # "\x88\x13" "\x50\x00" (data_port + http_port)
-                    # "\x01\x08\x37\xe0"
-                    # "\x88\x13" (data_port)
-                    # "\x00\x5a\x22\x30\x07\x5f" (mac)
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x02\x30\x75"
-                    # "\x50\x00" "\x88\x13" (http_port + data_port)
-                    # "\x00\x00"
-                    # "\x01\x01\xa8\xc0" (gate_ip = dns1_ip?)
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x70\x17\x37\x01\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00"
-                    # "\x08\x08\x08\x08" (dns2_ip)
-                    # "\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\x00"
-                    # "\x00\x00\x00\x00\x01\x00"
-                    # "\xa0\x01\xa8\xc0" (ip?)
-                    # "\x00\xff\xff\xff" "\x01\x01\xa8\xc0" (net_mask + gate_ip)
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
-                    # "\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x38\x71\x32\x4d"
-                    # "\x75\x49\x62\x6d\x7a\x32\x67\x66\x4c\x5a\x35\x70\x6d\x42\x54\x51"
-                    # "\x49\x69\x49\x77\x6f\x37\x63\x71\x6c\x4e\x64\x30"
-                ) = struct.unpack("<45xL19x64sI6s2H2x2I", data[0][:156])
-                name = name.replace(b"\x00", b"").decode("utf-8")
-
-                def _unpack_ip(ip_addr: Any) -> str:
-                    return inet_ntoa(struct.pack(">I", ip_addr))
-
-                (host_ip, net_mask, gate_ip) = (
-                    _unpack_ip(host_ip),
-                    _unpack_ip(net_mask),
-                    _unpack_ip(gate_ip),
-                )
-                mac = ":".join(f"{i:02x}" for i in mac)
+                dev = Beward.parse_discovery_response(data[0])
 
                 _LOGGER.info(
                     "Discovered %s (ID: %d) at http://%s:%d",
-                    name,
-                    device_id,
-                    host_ip,
-                    http_port,
+                    dev.name,
+                    dev.device_id,
+                    dev.host_ip,
+                    dev.http_port,
                 )
 
-                if mac not in devices:
-                    dev = {
-                        "device_id": device_id,
-                        "name": name,
-                        "host_ip": host_ip,
-                        "http_port": http_port,
-                        "data_port": data_port,
-                        "mac": mac,
-                        "net_mask": net_mask,
-                        "gate_ip": gate_ip,
-                    }
-                    devices[mac] = typing.NamedTuple("BewardDevice", dev.keys())(
-                        *dev.values()
-                    )
+                if dev.mac not in devices:
+                    devices[dev.mac] = dev
 
             except Exception as err:  # noqa: BLE001
-                if not isinstance(err, timeout):
+                if not isinstance(err, TimeoutError):
                     _LOGGER.debug(err)
                 break
 
         _LOGGER.debug("Stop discovery")
         server.close()
 
+        if metrics is not None:
+            metrics.observe(METRIC_DISCOVERY_DURATION, perf_counter() - start)
+            metrics.inc(METRIC_DISCOVERY_DEVICES, len(devices))
+
         return devices
 
+    @staticmethod
+    def sweep(  # noqa: PLR0913
+        networks: str | Iterable[str],
+        port: int = DISCOVERY_PORT,
+        *,
+        rate: float = SWEEP_RATE,
+        window: int = SWEEP_WINDOW,
+        timeout: float = DISCOVERY_TIMEOUT,
+        metrics: MetricsRegistry | None = None,
+    ) -> dict[str, BewardDevice]:
+        """
+        Discover Beward devices by unicast probes to every address of networks.
+
+        Works where broadcasts are not routed. Networks are given in CIDR
+        notation, e.g. "10.1.0.0/16". Probes are sent at most `rate` per second
+        with no more than `window` addresses awaiting answer for `timeout`.
+        """
+        if rate <= 0 or window < 1:
+            msg = "Rate and window must be positive"
+            raise ValueError(msg)
+
+        init()
+        start = perf_counter()
+
+        if isinstance(networks, str):
+            networks = [networks]
+        addresses = (
+            str(ip) for net in networks for ip in ip_network(net, strict=False).hosts()
+        )
+
+        _LOGGER.debug("Start discovery sweep of %s", networks)
+        server = socket(AF_INET, SOCK_DGRAM)
+        try:
+            server.settimeout(0)
+            server.bind(("0.0.0.0", 0))  # noqa: S104
+            devices = Beward._sweep_probes(
+                server,
+                addresses,
+                port,
+                interval=1 / rate,
+                window=window,
+                timeout=timeout,
+            )
+        finally:
+            server.close()
+        _LOGGER.debug("Stop discovery sweep")
+
+        if metrics is not None:
+            metrics.observe(METRIC_DISCOVERY_DURATION, perf_counter() - start)
+            metrics.inc(METRIC_DISCOVERY_DEVICES, len(devices))
+
+        return devices
+
+    @staticmethod
+    def _sweep_probes(  # noqa: PLR0913
+        server: socket,
+        addresses: Iterator[str],
+        port: int,
+        *,
+        interval: float,
+        window: int,
+        timeout: float,
+    ) -> dict[str, BewardDevice]:
+        """Send probes to addresses and collect responses."""
+        pending: set[str] = set()
+        deadlines: deque[tuple[float, str]] = deque()
+        exhausted = False
+        next_send = monotonic()
+        devices: dict[str, BewardDevice] = {}
+
+        while True:
+            now = monotonic()
+            while deadlines and deadlines[0][0] <= now:
+                pending.discard(deadlines.popleft()[1])
+
+            can_send = not exhausted and len(pending) < window
+            if can_send and now >= next_send:
+                address = next(addresses, None)
+                if address is None:
+                    exhausted = True
+                    continue
+                try:
+                    server.sendto(DISCOVERY_REQUEST, (address, port))
+                except OSError as err:
+                    _LOGGER.debug("Failed to probe %s: %s", address, err)
+                else:
+                    pending.add(address)
+                    deadlines.append((now + timeout, address))
+                next_send = max(next_send, now - interval) + interval
+                continue
+
+            if exhausted and not pending:
+                break
+
+            wait = deadlines[0][0] - now if deadlines else timeout
+            if can_send:
+                wait = min(wait, next_send - now)
+            if select.select([server], [], [], max(wait, 0))[0]:
+                Beward._read_sweep_responses(server, pending, devices)
+
+        return devices
+
+    @staticmethod
+    def _read_sweep_responses(
+        server: socket, pending: set[str], devices: dict[str, BewardDevice]
+    ) -> None:
+        """Read all received responses to discovery probes."""
+        while True:
+            try:
+                data, (address, _) = server.recvfrom(1024)
+            except BlockingIOError:
+                return
+            except OSError as err:
+                # E.g. ICMP port unreachable from probed address
+                _LOGGER.debug(err)
+                return
+
+            pending.discard(address)
+            try:
+                dev = Beward.parse_discovery_response(data)
+            except struct.error:
+                _LOGGER.debug("Invalid discovery response from %s", address)
+                continue
+
+            if dev.mac not in devices:
+                _LOGGER.info(
+                    "Discovered %s (ID: %d) at http://%s:%d",
+                    dev.name,
+                    dev.device_id,
+                    dev.host_ip,
+                    dev.http_port,
+                )
+                devices[dev.mac] = dev
+
+    @staticmethod
+    def apply_config(
+        devices: Iterable[BewardGeneric],
+        template: Mapping[str, Mapping[str, Any]],
+        max_workers: int = CONFIG_MAX_WORKERS,
+    ) -> dict[BewardGeneric, ConfigResult]:
+        """
+        Apply configuration template to many Beward devices concurrently.
+
+        Template maps CGI groups to parameters. Only changed parameters are
+        written. Failure of one device does not stop configuration of others.
+        """
+
+        def _apply(device: BewardGeneric) -> ConfigResult:
+            changed = {}
+            try:
+                device.get_config(template)
+                for function, values in template.items():
+                    res = device.set_config(function, values)
+                    if res:
+                        changed[function] = res
+            except Exception as exc:  # noqa: BLE001
+                _LOGGER.debug("Failed to configure %s: %s", device.host, exc)
+                return ConfigResult(changed, exc)
+            return ConfigResult(changed)
+
+        devices = list(devices)
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(devices)))
+        ) as executor:
+            return dict(zip(devices, executor.map(_apply, devices), strict=True))
+
+    @staticmethod
+    def parse_discovery_response(data: bytes) -> BewardDevice:
+        """Decode discovery response packet of Beward device."""
+        # ruff: noqa: ERA001
+        (
+            # packet header (28 bytes):
+            # "\x67\x45\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x48\x02\x00\x00" (packet data length) = 584
+            # packet data (584 bytes):
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00"
+            device_id,  # "\x5f\x06\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03"
+            # "\x21\x00\x00"
+            name,  # "\x49\x50\x43\x31\x37\x32\x34\x00\x00\x00\x00..."
+            host_ip,  # "\x5a\x01\xa8\xc0"
+            mac,  # "\x00\x5a\x22\x30\x07\x5f"
+            http_port,  # "\x50\x00"
+            data_port,  # "\x88\x13"
+            # "\x00\x00"
+            net_mask,  # "\x00\xff\xff\xff"
+            gate_ip,  # "\x01\x01\xa8\xc0"
+            # "\x01\x08\x37\xe0"
+            # "\x01\x01\xa8\xc0" (gate_ip)
+            # "\x88\x13" (data_port)
+            # "\x00\x00\x01\x00\x00\x00"
+            # "\x5a\x01\xa8\xc0" (host_ip)
+            # "\x00\xff\xff\xff" "\x01\x01\xa8\xc0" (net_mask + gate_ip)
+            # "\x88\x13" "\x50\x00" (data_port + http_port)
+            # "\x01\x08\x37\xe0"
+            # "\x88\x13" (data_port)
+            # "\x00\x5a\x22\x30\x07\x5f" (mac)
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x02\x30\x75"
+            # "\x50\x00" "\x88\x13" (http_port + data_port)
+            # "\x00\x00"
+            # "\x01\x01\xa8\xc0" (gate_ip = dns1_ip?)
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x70\x17\x37\x01\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00"
+            # "\x08\x08\x08\x08" (dns2_ip)
+            # "\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x80\x00"
+            # "\x00\x00\x00\x00\x01\x00"
+            # "\xa0\x01\xa8\xc0" (ip?)
+            # "\x00\xff\xff\xff" "\x01\x01\xa8\xc0" (net_mask + gate_ip)
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+            # "\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x38\x71\x32\x4d"
+            # "\x75\x49\x62\x6d\x7a\x32\x67\x66\x4c\x5a\x35\x70\x6d\x42\x54\x51"
+            # "\x49\x69\x49\x77\x6f\x37\x63\x71\x6c\x4e\x64\x30"
+        ) = struct.unpack("<45xL19x64sI6s2H2x2I", data[:156])
+        name = name.replace(b"\x00", b"").decode("utf-8")
+
+        def _unpack_ip(ip_addr: Any) -> str:
+            return inet_ntoa(struct.pack(">I", ip_addr))
+
+        return BewardDevice(
+            device_id=device_id,
+            name=name,
+            host_ip=_unpack_ip(host_ip),
+            http_port=http_port,
+            data_port=data_port,
+            mac=":".join(f"{i:02x}" for i in mac),
+            net_mask=_unpack_ip(net_mask),
+            gate_ip=_unpack_ip(gate_ip),
+        )
+
     @staticmethod
     def factory(
         host_ip: str, username: str, password: str, **kwargs: Any
@@ -254,24 +431,19 @@ class Beward:
         """Return correct class for device."""
         init()
 
-        bwd = BewardGeneric(host_ip, username, password)
+        bwd = BewardGeneric(host_ip, username, password, port=kwargs.get("port"))
         model = bwd.system_info.get("DeviceModel")
         dev_type = bwd.get_device_type(model)
+        cls = get_device_class(dev_type)
 
-        if dev_type is None:
+        if cls is None:
             msg = (
                 f'Unknown device "{model}". '
-                f'Please, open new issue here: {URLS["New Device"]}'
+                f"Please, open new issue here: {URLS['New Device']}"
             )
             raise ValueError(msg)
 
-        inst = None
-
-        if dev_type == BEWARD_CAMERA:
-            inst = BewardCamera(host_ip, username, password, **kwargs)
-
-        elif dev_type == BEWARD_DOORBELL:
-            inst = BewardDoorbell(host_ip, username, password, **kwargs)
+        inst = cls(host_ip, username, password, **kwargs)
 
         _LOGGER.debug("Factory create instance of %s", inst.__class__)
         return inst
@@ -4,14 +4,27 @@
 """Beward camera controller."""
 
 import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
 
 from requests import ConnectTimeout
 
-from beward.const import ALARM_MOTION
+from beward.const import (
+    ALARM_MOTION,
+    CONFIG_MAX_WORKERS,
+    RTSP_TIMEOUT,
+    STOP_TIMEOUT,
+    THUMBNAIL_SIZE,
+)
 
+from .clip import ClipBuffer
 from .core import BewardGeneric
+from .metrics import METRIC_IMAGE_SIZE
+from .rtsp import RtspKeyframeGrabber
+from .thumbnail import ThumbnailPool, default_pool, image_size
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,23 +33,41 @@ class BewardCamera(BewardGeneric):
     """Beward camera controller class."""
 
     # pylint: disable=too-many-arguments
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         host: str,
         username: str,
         password: str,
         rtsp_port: int | None = None,
         stream: int = 0,
+        *,
+        channel: int = 0,
+        thumbnail_pool: ThumbnailPool | None = None,
         **kwargs: Any,
     ) -> None:
-        """Initialize Beward camera controller."""
+        """
+        Initialize Beward camera controller.
+
+        Channel is the default video channel for live image and video URIs.
+        Thumbnails are downscaled by shared pool unless other one is given.
+        """
         super().__init__(host, username, password, **kwargs)
 
         self.last_motion_timestamp = None
         self.last_motion_image = None
+        # Motion snapshots of every video channel
+        self.channel_motion_timestamp: dict[int, datetime] = {}
+        self.channel_motion_image: dict[int, bytes | None] = {}
 
         self.rtsp_port = rtsp_port
         self.stream = stream
+        self.channel = channel
+        self.thumbnail_pool = thumbnail_pool
+        # Whether device can scale images itself, None until detected
+        self.device_scaling: bool | None = None
+
+        self._rtsp_grabber: RtspKeyframeGrabber | None = None
+        self._rtsp_lock = threading.Lock()
 
         self._live_image_url = None
         self._rtsp_live_video_url = None
@@ -45,7 +76,7 @@ class BewardCamera(BewardGeneric):
         """Set the URIs for the camera."""
         self._live_image_url = self.get_url(
             "images",
-            extra_params={"channel": 0},
+            extra_params={"channel": self.channel},
             # Add authentication data
             username=self.username,
             password=self.password,
@@ -60,9 +91,50 @@ class BewardCamera(BewardGeneric):
 
         self._rtsp_live_video_url = (
             f"rtsp://{self.username}:{self.password}@"
-            f"{self.host}:{self.rtsp_port}/av0_{self.stream}"
+            f"{self.host}:{self.rtsp_port}/av{self.channel}_{self.stream}"
         )
 
+    def update_host(self, host: str, port: int | str | None = None) -> bool:
+        """Change address of device and reset URIs of camera."""
+        changed = super().update_host(host, port)
+        if changed:
+            self._live_image_url = None
+            self._rtsp_live_video_url = None
+            self._close_rtsp()
+        return changed
+
+    def close(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Stop listening for alarms and release all resources."""
+        self._close_rtsp()
+        super().close(timeout)
+
+    def _close_rtsp(self) -> None:
+        """Close RTSP session of keyframe grabber."""
+        with self._rtsp_lock:
+            grabber, self._rtsp_grabber = self._rtsp_grabber, None
+        if grabber is not None:
+            grabber.stop()
+
+    def keyframe(
+        self, timeout: float | None = RTSP_TIMEOUT, max_age: float | None = None
+    ) -> bytes | None:
+        """
+        Return the most recent H.264 keyframe of camera video stream.
+
+        RTSP session is opened on first call and is kept until camera is
+        closed, so next keyframes are taken from already flowing stream.
+        Keyframe is returned as Annex B access unit with SPS and PPS.
+        """
+        with self._rtsp_lock:
+            if self._rtsp_grabber is None:
+                self._rtsp_grabber = RtspKeyframeGrabber(
+                    self.rtsp_live_video_url,
+                    reconnect_delay=self.reconnect_delay,
+                    reconnect_max_delay=self.reconnect_max_delay,
+                ).start()
+            grabber = self._rtsp_grabber
+        return grabber.get_keyframe(timeout, max_age)
+
     @property
     def live_image_url(self) -> str:
         """Return URL to get live photo from camera."""
@@ -81,17 +153,100 @@ class BewardCamera(BewardGeneric):
     # pylint: disable=unsubscriptable-object
     def live_image(self) -> bytes | None:
         """Return bytes of camera image."""
-        res = self.query("images", extra_params={"channel": 0})
+        return self.get_image(self.channel)
+
+    def get_image(self, channel: int = 0, **params: Any) -> bytes | None:
+        """Return bytes of image of video channel."""
+        res = self.query("images", extra_params={"channel": channel, **params})
 
-        if res.headers.get("Content-Type") not in ("image/jpeg", "image/png"):
+        if res is None or res.headers.get("Content-Type") not in (
+            "image/jpeg",
+            "image/png",
+        ):
             return None
 
+        if self.metrics is not None:
+            self.metrics.observe(
+                METRIC_IMAGE_SIZE, len(res.content), device=f"{self.host}:{self.port}"
+            )
         return res.content
 
-    def _handle_alarm(self, timestamp: datetime, alarm: str, state: bool) -> None:  # noqa: FBT001
+    def get_images(
+        self,
+        channels: Iterable[int] | None = None,
+        max_workers: int = CONFIG_MAX_WORKERS,
+    ) -> dict[int, bytes | None]:
+        """
+        Fetch images of several video channels in parallel.
+
+        All channels of device are fetched if no channels are given.
+        """
+        channels = list(range(self.channels) if channels is None else channels)
+        if len(channels) <= 1:
+            return {x: self.get_image(x) for x in channels}
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(channels))
+        ) as executor:
+            return dict(
+                zip(channels, executor.map(self.get_image, channels), strict=True)
+            )
+
+    def thumbnail(
+        self, size: tuple[int, int] = THUMBNAIL_SIZE, channel: int | None = None
+    ) -> bytes | None:
+        """
+        Return image of video channel reduced to fit into size.
+
+        Device is asked for reduced image first. If it returns full-size image,
+        image is downscaled locally and device is not asked again. Support is
+        detected only from images touching the requested bounds, as images
+        smaller than size may be full-size ones.
+        """
+        width, height = size
+        channel = self.channel if channel is None else channel
+        if self.device_scaling is False:
+            image = self.get_image(channel)
+        else:
+            image = self.get_image(channel, width=width, height=height)
+        if image is None:
+            return None
+
+        dims = image_size(image)
+        fits = dims is not None and dims[0] <= width and dims[1] <= height
+        if self.device_scaling is None and dims is not None:
+            scaled = fits and (dims[0] == width or dims[1] == height)
+            if scaled or not fits:
+                self.device_scaling = scaled
+                self._log.debug("Device scales images: %s", scaled)
+        if fits:
+            return image
+
+        return (self.thumbnail_pool or default_pool()).thumbnail(image, size)
+
+    def start_clip_buffer(self, **kwargs: Any) -> ClipBuffer:
+        """
+        Start buffering snapshots to freeze them into event clips on alarms.
+
+        Keyword arguments are passed to ClipBuffer.
+        """
+        return ClipBuffer(self, **kwargs).start()
+
+    def _handle_alarm(
+        self,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+        channel: int | None = None,
+    ) -> None:
         """Handle alarms from Beward device."""
-        super()._handle_alarm(timestamp, alarm, state)
+        super()._handle_alarm(timestamp, alarm, state, channel)
 
         if alarm == ALARM_MOTION and state:
-            self.last_motion_timestamp = timestamp
-            self.last_motion_image = self.live_image
+            channel = self.channel if channel is None else channel
+            image = self.get_image(channel)
+            self.channel_motion_timestamp[channel] = timestamp
+            self.channel_motion_image[channel] = image
+            if channel == self.channel:
+                self.last_motion_timestamp = timestamp
+                self.last_motion_image = image
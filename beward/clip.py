@@ -0,0 +1,242 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Buffer of camera snapshots around alarms."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple
+
+from requests import RequestException
+
+from .const import (
+    ALARM_MOTION,
+    ALARM_SENSOR,
+    CLIP_INTERVAL,
+    CLIP_MAX_BYTES,
+    CLIP_POST_FRAMES,
+    CLIP_PRE_FRAMES,
+)
+from .core import local_tz
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from .camera import BewardCamera
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Frame(NamedTuple):
+    """Camera snapshot."""
+
+    timestamp: datetime
+    image: bytes
+
+
+class EventClip:
+    """Snapshots taken before and after alarm."""
+
+    def __init__(self, alarm: str, timestamp: datetime, frames: list[Frame]) -> None:
+        """Initialize event clip with frames taken before alarm."""
+        self.alarm = alarm
+        self.timestamp = timestamp
+        self.frames = frames
+        self.pre_frames = len(frames)
+        self.size = sum(len(x.image) for x in frames)
+
+    def add(self, frame: Frame) -> None:
+        """Add frame taken after alarm."""
+        self.frames.append(frame)
+        self.size += len(frame.image)
+
+
+class ClipBuffer:
+    """
+    Ring of recent camera snapshots which are saved around alarms.
+
+    Snapshots are taken every `interval` seconds. On alarm `pre_frames` last
+    snapshots and `post_frames` next ones are frozen into event clip. Memory
+    used by ring and clips is bounded by `max_bytes`, so completed clips should
+    be passed to listeners or taken by `take()`: the oldest of them are dropped
+    to free memory.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(  # noqa: PLR0913
+        self,
+        camera: BewardCamera,
+        *,
+        interval: float = CLIP_INTERVAL,
+        pre_frames: int = CLIP_PRE_FRAMES,
+        post_frames: int = CLIP_POST_FRAMES,
+        max_bytes: int = CLIP_MAX_BYTES,
+        alarms: Iterable[str] = (ALARM_MOTION, ALARM_SENSOR),
+    ) -> None:
+        """Initialize clip buffer."""
+        self.camera = camera
+        self.interval = interval
+        self.pre_frames = pre_frames
+        self.post_frames = post_frames
+        self.max_bytes = max_bytes
+        self.alarms = frozenset(alarms)
+
+        self._clips: deque[EventClip] = deque()
+        self._ring: deque[Frame] = deque(maxlen=max(pre_frames, 1))
+        self._ring_size = 0
+        self._clips_size = 0
+        self._recording: list[EventClip] = []
+        self._listeners: list[Callable[[EventClip], None]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> ClipBuffer:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop buffer."""
+        self.stop()
+
+    @property
+    def size(self) -> int:
+        """Return number of bytes of buffered images."""
+        return self._ring_size + self._clips_size
+
+    @property
+    def clips(self) -> list[EventClip]:
+        """Return completed clips which are not taken yet."""
+        with self._lock:
+            return list(self._clips)
+
+    def take(self) -> list[EventClip]:
+        """Remove completed clips from buffer and return them."""
+        with self._lock:
+            clips = list(self._clips)
+            self._clips.clear()
+            for clip in clips:
+                self._clips_size -= clip.size
+        return clips
+
+    @property
+    def frames(self) -> list[Frame]:
+        """Return recent snapshots."""
+        with self._lock:
+            return list(self._ring)
+
+    def add_listener(self, listener: Callable[[EventClip], None]) -> None:
+        """Add listener of completed event clips."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[EventClip], None]) -> None:
+        """Remove listener of completed event clips."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _on_alarm(
+        self,
+        device: BewardGeneric,  # noqa: ARG002
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+    ) -> None:
+        """Freeze recent snapshots on alarm."""
+        if not state:
+            return
+
+        with self._lock:
+            frames = list(self._ring)[-self.pre_frames :] if self.pre_frames else []
+            clip = EventClip(alarm, timestamp, frames)
+            self._clips_size += clip.size
+            self._recording.append(clip)
+            self._trim()
+        if not self.post_frames:
+            self._finish([clip])
+
+    def add_frame(self, frame: Frame) -> None:
+        """Add snapshot to ring and to clips which wait for frames after alarm."""
+        finished = []
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self._ring_size -= len(self._ring[0].image)
+            self._ring.append(frame)
+            self._ring_size += len(frame.image)
+
+            for clip in self._recording:
+                clip.add(frame)
+                self._clips_size += len(frame.image)
+                if len(clip.frames) - clip.pre_frames >= self.post_frames:
+                    finished.append(clip)
+            self._trim()
+        self._finish(finished)
+
+    def _finish(self, clips: list[EventClip]) -> None:
+        """Store completed clips and notify listeners."""
+        for clip in clips:
+            with self._lock:
+                if clip not in self._recording:
+                    # Dropped to keep memory budget
+                    continue
+                self._recording.remove(clip)
+                self._clips.append(clip)
+
+            for listener in list(self._listeners):
+                try:
+                    listener(clip)
+                except Exception:
+                    _LOGGER.exception("Error in clip listener")
+
+    def _trim(self) -> None:
+        """
+        Drop data to keep memory budget.
+
+        The oldest completed clips are dropped first, then the oldest snapshots
+        and then clips which are still recorded.
+        """
+        while self.size > self.max_bytes and self._clips:
+            self._drop(self._clips.popleft())
+        while self.size > self.max_bytes and self._ring:
+            self._ring_size -= len(self._ring.popleft().image)
+        while self.size > self.max_bytes and self._recording:
+            self._drop(self._recording.pop(0))
+
+    def _drop(self, clip: EventClip) -> None:
+        """Forget clip."""
+        self._clips_size -= clip.size
+        _LOGGER.debug("Drop %s clip of %s", clip.alarm, clip.timestamp)
+
+    def _run(self) -> None:
+        """Take snapshots until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                image = self.camera.live_image
+            except (RequestException, AttributeError) as exc:
+                _LOGGER.debug("Failed to take snapshot: %s", exc)
+                image = None
+            if image is not None:
+                self.add_frame(Frame(datetime.now(local_tz), image))
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> ClipBuffer:
+        """Start taking snapshots and watching for alarms."""
+        self.camera.add_alarms_handler(self._on_alarm, self.alarms)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="beward-clip-buffer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop taking snapshots."""
+        self.camera.remove_alarms_handler(self._on_alarm)
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
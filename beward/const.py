@@ -23,6 +23,59 @@ If you have ANY issues with this you need to open an issue here:
 
 TIMEOUT = 3
 
+# Devices discovery
+DISCOVERY_PORT = 59123
+DISCOVERY_TIMEOUT = 1
+DISCOVERY_REQUEST = (
+    b"\x67\x45\x00\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+)
+STOP_TIMEOUT = 2
+
+# Unicast discovery sweep: probes per second and max probes awaiting answer
+SWEEP_RATE = 1000
+SWEEP_WINDOW = 256
+
+# Discovery monitor: seconds between probes and missed probes to remove device
+DISCOVERY_INTERVAL = 60
+DISCOVERY_MISSES = 2
+
+# Discovery monitor events
+DISCOVERY_ADDED = "added"
+DISCOVERY_REMOVED = "removed"
+DISCOVERY_CHANGED = "changed"
+
+# Alarms stream reconnection. Backoff is reset only after stream delivered
+# data or stayed up for STREAM_MIN_UPTIME seconds.
+RECONNECT_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+IDLE_TIMEOUT = 10
+STREAM_MIN_UPTIME = 10
+# Connect and headers wait of alarms stream, kept below STOP_TIMEOUT
+STREAM_OPEN_TIMEOUT = 1.5
+
+# Devices configuration
+CONFIG_MAX_WORKERS = 8
+
+# Snapshot relay
+RELAY_MAX_RATE = 1
+
+# Thumbnails
+THUMBNAIL_SIZE = (320, 240)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_CACHE_SIZE = 64
+
+# RTSP sessions
+RTSP_PORT = 554
+RTSP_TIMEOUT = 10
+
+# Event clips: seconds between snapshots, frames before and after alarm and
+# memory budget of one device
+CLIP_INTERVAL = 1
+CLIP_PRE_FRAMES = 3
+CLIP_POST_FRAMES = 3
+CLIP_MAX_BYTES = 4 * 1024 * 1024
+
 # Error strings
 MSG_GENERIC_FAIL = "Sorry.. Something went wrong..."
 
@@ -32,6 +85,16 @@ ALARM_MOTION = "MotionDetection"
 ALARM_SENSOR = "SensorAlarm"
 ALARM_SENSOR_OUT = "SensorOutAlarm"
 
+# Alarm handlers dispatch modes
+DISPATCH_INLINE = "inline"
+DISPATCH_THREAD = "thread"
+DISPATCH_ASYNCIO = "asyncio"
+
+# Alarm dispatch queue overflow policies
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_BLOCK = "block"
+
 # Device types
 BEWARD_CAMERA = "camera"
 BEWARD_DOORBELL = "doorbell"
@@ -6,29 +6,99 @@
 from __future__ import annotations
 
 import contextlib
+import functools
 import logging
-import re
 import socket
 import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from http import HTTPStatus
-from time import sleep
-from typing import Any, Protocol
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, ClassVar, Protocol
 
 import requests
 from requests import ConnectTimeout, PreparedRequest, RequestException, Response
 from requests.auth import HTTPBasicAuth
 
 import beward
-from beward.util import is_valid_fqdn, normalize_fqdn
-
-from .const import ALARM_ONLINE, BEWARD_MODELS, MSG_GENERIC_FAIL, TIMEOUT
+from beward.log import device_logger, redact_url
+from beward.util import backoff_delay, is_valid_fqdn, normalize_fqdn, parse_params
+
+from .const import (
+    ALARM_ONLINE,
+    CONFIG_MAX_WORKERS,
+    IDLE_TIMEOUT,
+    MSG_GENERIC_FAIL,
+    RECONNECT_DELAY,
+    RECONNECT_MAX_DELAY,
+    STOP_TIMEOUT,
+    STREAM_MIN_UPTIME,
+    STREAM_OPEN_TIMEOUT,
+    TIMEOUT,
+)
+from .dispatch import AlarmDispatcher
+from .metrics import (
+    METRIC_ALARM_EVENTS,
+    METRIC_RECONNECTS,
+    METRIC_REQUEST_DURATION,
+    METRIC_REQUESTS,
+)
+from .registry import MODEL_INDEX
+from .tracing import (
+    ATTR_CONTENT_LENGTH,
+    ATTR_STATUS_CODE,
+    TracingAdapter,
+    trace_exchange,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    from .debounce import AlarmDebouncer
+    from .metrics import MetricsRegistry
+    from .recorder import AlarmRecorder
+    from .tracing import Tracer
 
 _LOGGER = logging.getLogger(__name__)
 
 local_tz = datetime.now(timezone.utc).astimezone().tzinfo  # noqa: UP017
 
 
+def _response_socket(resp: Response) -> socket.socket | None:
+    """Return socket of streamed response or None if it is unavailable."""
+    sock = None
+    with contextlib.suppress(AttributeError):
+        sock = resp.raw.connection.sock
+    if sock is None:
+        # Connection was detached from response, look for socket in response stream
+        with contextlib.suppress(AttributeError):
+            sock = resp.raw._fp.fp.raw._sock  # noqa: SLF001
+    return sock
+
+
+def _close_response(resp: Response) -> None:
+    """Close streamed response, shutting down its socket to unblock readers."""
+    sock = _response_socket(resp)
+    if sock is not None:
+        with contextlib.suppress(OSError):
+            sock.shutdown(socket.SHUT_RDWR)
+    with contextlib.suppress(Exception):
+        resp.close()
+
+
+def _check_host(host: str) -> str:
+    """Return normalized host address or raise ValueError for invalid one."""
+    host = normalize_fqdn(host)
+    try:
+        if not is_valid_fqdn(host):
+            socket.inet_aton(host)
+    except OSError as exc:
+        msg = "Not a valid host address"
+        raise ValueError(msg) from exc
+    return host
+
+
 class AlarmHandlerCallback(Protocol):
     """Protocol type for BewardGeneric alarm handler callback."""
 
@@ -47,26 +117,29 @@ class BewardGeneric:
 
     _class_group = "Beward"
 
+    _instances: ClassVar[weakref.WeakSet[BewardGeneric]] = weakref.WeakSet()
+
     @staticmethod
     def get_device_type(model: str | None) -> str | None:
         """Detect device type for model."""
-        if not model:
-            return None
-
-        model = re.sub(r"_rev.+$", "", model)
-
-        for dev_type, models in BEWARD_MODELS.items():
-            if model in models.split():
-                return dev_type
-
-        return None
+        return MODEL_INDEX.lookup(model)
 
-    def __init__(
+    # pylint: disable=too-many-arguments
+    def __init__(  # noqa: PLR0913
         self,
         host: str,
         username: str,
         password: str,
         port: int | str | None = None,
+        *,
+        alarm_dispatcher: AlarmDispatcher | None = None,
+        alarm_debouncer: AlarmDebouncer | None = None,
+        alarm_recorder: AlarmRecorder | None = None,
+        metrics: MetricsRegistry | None = None,
+        tracer: Tracer | None = None,
+        reconnect_delay: float = RECONNECT_DELAY,
+        reconnect_max_delay: float = RECONNECT_MAX_DELAY,
+        idle_timeout: float = IDLE_TIMEOUT,
         **kwargs: Any,  # noqa: ARG002
     ) -> None:
         """Initialize generic Beward device controller."""
@@ -75,24 +148,22 @@ class BewardGeneric:
         self._sysinfo = None
         self._listen_alarms = False
         self._listener = None
+        self._stop_event = threading.Event()
+        self._alarm_responses: set[Response] = set()
+        self._alarm_responses_lock = threading.Lock()
 
         if port is None:
             with contextlib.suppress(IndexError):
                 port = host.split(":")[1]
-        host = normalize_fqdn(host)
-        try:
-            if not is_valid_fqdn(host):
-                socket.inet_aton(host)
-        except OSError as exc:
-            msg = "Not a valid host address"
-            raise ValueError(msg) from exc
 
-        self.host = host
+        self.host = _check_host(host)
         self.port = int(port) if port else 80
+        self._log = device_logger(__name__, self.host, self.port)
         self.username = username
         self.password = password
         self.session = requests.session()
         self.params = {}
+        self._config: dict[str, dict[str, str]] = {}
 
         self.last_activity = None
         self.alarm_state = {
@@ -102,14 +173,134 @@ class BewardGeneric:
             ALARM_ONLINE: datetime.min,
         }
         self._alarm_handlers = set()
+        self._alarm_subscriptions: dict[AlarmHandlerCallback, frozenset | None] = {}
+        self._listen_filter: frozenset[str] | None = None
+        self._alarm_filter: frozenset[str] | None = None
+        self._listen_channel: int | str = 0
+        self._channel_filter: frozenset[int] | None = None
+        self._stream_restart = False
+        # Callbacks of alarms receivers which index device by its address
+        self._address_listeners: list[Callable[[BewardGeneric], None]] = []
+        self._channel_handlers: dict[int, Callable] = {}
+        self.channel_alarm_state: dict[int, dict[str, bool]] = {}
+        self.channel_alarm_timestamp: dict[int, dict[str, datetime]] = {}
+        self._compile_dispatch_table()
         self._alarm_listeners = []
+        self.alarm_dispatcher = alarm_dispatcher or AlarmDispatcher()
+        self.alarm_debouncer = alarm_debouncer
+        self.alarm_recorder = alarm_recorder
+        self.metrics = metrics
+        self.tracer = tracer
+        if tracer is not None:
+            self.session.mount("http://", TracingAdapter())
+
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.idle_timeout = idle_timeout
+        self.reconnects = 0
+        self.last_error: Exception | None = None
+        self._stream_lines = 0
+
+        self._instances.add(self)
 
     def __del__(self) -> None:
         """Destructor."""
-        self._listen_alarms = False
+        # Never join listeners here: it can hang garbage collection
+        if hasattr(self, "_stop_event"):
+            self._signal_stop()
+
+    def __enter__(self) -> BewardGeneric:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and release all resources."""
+        self.close()
+
+    def start(self, channel: int = 0, alarms: Any = None) -> BewardGeneric:
+        """Start listening for alarms from Beward device."""
+        self.listen_alarms(channel, alarms)
+        return self
 
-        if self._listener:
-            self._listener.join()
+    def update_host(self, host: str, port: int | str | None = None) -> bool:
+        """
+        Change address of device, e.g. after its DHCP lease is changed.
+
+        Alarms streams, including ones of AlarmHub, are reconnected to new
+        address, and AlarmReceiver routes notifications from it. Return True
+        if address is changed.
+        """
+        host = _check_host(host)
+        port = int(port) if port else self.port
+        if (host, port) == (self.host, self.port):
+            return False
+
+        self._log.info("Device address changed to %s:%d", host, port)
+        self.host = host
+        self.port = port
+        self._log = device_logger(__name__, host, port)
+
+        with self._alarm_responses_lock:
+            responses = list(self._alarm_responses)
+        for resp in responses:
+            _close_response(resp)
+        for listener in list(self._address_listeners):
+            listener(self)
+        return True
+
+    def _signal_stop(self) -> None:
+        """Ask alarm listeners to stop and unblock their sockets."""
+        self._listen_alarms = False
+        self._stop_event.set()
+
+        with self._alarm_responses_lock:
+            responses = list(self._alarm_responses)
+        for resp in responses:
+            _close_response(resp)
+
+    def _join_listeners(self, timeout: float) -> bool:
+        """Wait for alarm listeners to stop. Return False on timeout."""
+        deadline = monotonic() + timeout
+        for listener in self._alarm_listeners:
+            if listener is not threading.current_thread():
+                listener.join(max(0, deadline - monotonic()))
+        self._alarm_listeners = [x for x in self._alarm_listeners if x.is_alive()]
+        return not self._alarm_listeners
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> bool:
+        """
+        Stop listening for alarms.
+
+        Returns False if some listeners are still alive after timeout.
+        """
+        self._signal_stop()
+        return self._join_listeners(timeout)
+
+    def close(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Stop listening for alarms and release all resources."""
+        self.stop(timeout)
+        if self.alarm_debouncer is not None:
+            self.alarm_debouncer.close()
+        self.alarm_dispatcher.close()
+        self.session.close()
+        self._instances.discard(self)
+
+    @classmethod
+    def stop_all(cls, timeout: float = STOP_TIMEOUT) -> bool:
+        """
+        Stop alarm listeners of all Beward devices at once.
+
+        Returns False if some listeners are still alive after timeout.
+        """
+        devices = list(cls._instances)
+        for device in devices:
+            device._signal_stop()  # noqa: SLF001
+
+        deadline = monotonic() + timeout
+        res = True
+        for device in devices:
+            res &= device._join_listeners(max(0, deadline - monotonic()))  # noqa: SLF001
+        return res
 
     def get_url(
         self,
@@ -144,7 +335,10 @@ class BewardGeneric:
     def query(self, function: str, extra_params: dict | None = None) -> Response | None:
         """Query data from Beward device."""
         url = self.get_url(function)
-        _LOGGER.debug("Querying %s", beward.redact_auth_from_url(url))
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug(
+                "Querying %s", redact_url(url), extra={"function": function}
+            )
 
         response = None
 
@@ -157,115 +351,448 @@ class BewardGeneric:
         # Add authentication data
         auth = HTTPBasicAuth(self.username, self.password)
 
+        start = perf_counter() if self.metrics is not None else 0
         try:
-            req = self.session.get(url, params=params, auth=auth, timeout=TIMEOUT)
-            _LOGGER.debug("_query ret %s", req.status_code)
+            if self.tracer is None:
+                req = self.session.get(url, params=params, auth=auth, timeout=TIMEOUT)
+            else:
+                with trace_exchange(
+                    self.tracer, self.host, self.port, function
+                ) as span:
+                    req = self.session.get(
+                        url, params=params, auth=auth, timeout=TIMEOUT
+                    )
+                    span.set_attribute(ATTR_STATUS_CODE, req.status_code)
+                    span.set_attribute(ATTR_CONTENT_LENGTH, len(req.content))
+            self._log.debug("_query ret %s", req.status_code)
 
         except Exception:
-            _LOGGER.exception("Error!")
+            self._log.exception("Error!", extra={"function": function})
+            if self.metrics is not None:
+                self._record_request(function, "error", start)
             raise
 
+        if self.metrics is not None:
+            self._record_request(function, req.status_code, start)
+
         if req.status_code in (200, 204):
             response = req
 
         if response is None:  # pragma: no cover
-            _LOGGER.debug(MSG_GENERIC_FAIL)
+            self._log.debug(MSG_GENERIC_FAIL)
         return response
 
-    def add_alarms_handler(self, handler: AlarmHandlerCallback) -> BewardGeneric:
-        """Add alarms handler."""
+    def _record_request(self, function: str, status: int | str, start: float) -> None:
+        """Record metrics of finished HTTP request."""
+        device = f"{self.host}:{self.port}"
+        self.metrics.inc(
+            METRIC_REQUESTS, device=device, function=function, status=status
+        )
+        self.metrics.observe(
+            METRIC_REQUEST_DURATION,
+            perf_counter() - start,
+            device=device,
+            function=function,
+        )
+
+    def _record_reconnect(self) -> None:
+        """Count reconnection of alarms stream."""
+        self.reconnects += 1
+        if self.metrics is not None:
+            self.metrics.inc(METRIC_RECONNECTS, device=f"{self.host}:{self.port}")
+
+    def add_alarms_handler(
+        self, handler: AlarmHandlerCallback, alarms: Iterable[str] | None = None
+    ) -> BewardGeneric:
+        """
+        Add alarms handler.
+
+        If alarms are given, handler is called only for these alarm types.
+        """
         self._alarm_handlers.add(handler)
+        self._alarm_subscriptions[handler] = frozenset(alarms) if alarms else None
+        self._compile_dispatch_table()
         return self
 
     def remove_alarms_handler(self, handler: AlarmHandlerCallback) -> BewardGeneric:
         """Remove alarms handler."""
         if handler in self._alarm_handlers:
             self._alarm_handlers.remove(handler)
+            self._alarm_subscriptions.pop(handler, None)
+            self._compile_dispatch_table()
             self._listen_alarms = len(self._alarm_handlers) != 0
+            if not self._listen_alarms:
+                self._signal_stop()
         return self
 
-    def _handle_alarm(self, timestamp: datetime, alarm: str, state: bool) -> None:  # noqa: FBT001
-        """Handle alarms from Beward device."""
-        _LOGGER.debug("Handle alarm: %s; State: %s", alarm, state)
+    def _compile_dispatch_table(self) -> None:
+        """Build table of handlers interested in every alarm type."""
+        wildcard = tuple(h for h, a in self._alarm_subscriptions.items() if a is None)
+        table = {}
+        for handler, alarms in self._alarm_subscriptions.items():
+            for alarm in alarms or ():
+                table.setdefault(alarm, list(wildcard)).append(handler)
+
+        self._wildcard_handlers = wildcard
+        self._dispatch_table = {k: tuple(v) for k, v in table.items()}
+        self._update_alarm_filter()
+
+    @property
+    def subscribed_alarms(self) -> frozenset[str] | None:
+        """Return alarm types handlers are subscribed to or None for all types."""
+        if self._wildcard_handlers or not self._dispatch_table:
+            return None
+        return frozenset(self._dispatch_table)
+
+    def _update_alarm_filter(self) -> None:
+        """
+        Update set of alarm types to pick from alarms stream.
+
+        Open alarms stream is restarted to request changed alarm types.
+        """
+        alarm_filter = self._listen_filter or self.subscribed_alarms
+        if alarm_filter == self._alarm_filter:
+            return
+
+        self._alarm_filter = alarm_filter
+        self._stream_restart = True
+        with self._alarm_responses_lock:
+            responses = list(self._alarm_responses)
+        for resp in responses:
+            _close_response(resp)
+
+    def _handle_alarm(
+        self,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+        channel: int | None = None,  # noqa: ARG002
+    ) -> None:
+        """
+        Handle alarms from Beward device.
+
+        Channel is given for alarms of video channels, None for device-wide ones.
+        """
+        self._log.debug("Handle alarm: %s; State: %s", alarm, state)
 
         self.last_activity = timestamp
         self.alarm_timestamp[alarm] = timestamp
         self.alarm_state[alarm] = state
 
-        for handler in self._alarm_handlers:  # type: AlarmHandlerCallback
-            handler(self, timestamp, alarm, state)
+        self.alarm_dispatcher.dispatch(
+            self,
+            self._dispatch_table.get(alarm, self._wildcard_handlers),
+            timestamp,
+            alarm,
+            state,
+        )
+
+    def _alarms_params(self, channel: int | Iterable[int], alarms: Any) -> dict:
+        """
+        Make request parameters for alarms stream.
+
+        If no alarms are given, requests alarm types handlers are subscribed to.
+        Several channels are requested as semicolon separated list.
+        """
+        self._listen_filter = frozenset(alarms) if alarms else None
+        self._update_alarm_filter()
+
+        if isinstance(channel, int):
+            self._channel_filter = None
+        else:
+            channels = sorted(set(channel))
+            self._channel_filter = frozenset(channels)
+            channel = (
+                channels[0] if len(channels) == 1 else ";".join(map(str, channels))
+            )
+        self._listen_channel = channel
+        return self._stream_params(self._alarm_filter)
+
+    def _stream_params(self, alarm_filter: frozenset[str] | None) -> dict:
+        """Make request parameters of alarms stream for given alarm types."""
+        return {
+            "channel": self._listen_channel,
+            "parameter": ";".join(sorted(alarm_filter or ())),
+        }
+
+    def listen_alarms(
+        self, channel: int | Iterable[int] = 0, alarms: Any = None
+    ) -> None:
+        """
+        Listen for alarms from Beward device.
 
-    def listen_alarms(self, channel: int = 0, alarms: Any = None) -> None:
-        """Listen for alarms from Beward device."""
+        Several channels can be listened by one stream if device supports it.
+        """
         if alarms is None:  # pragma: no cover
             alarms = {}
 
         url = self.get_url("alarmchangestate")
-        _LOGGER.debug("Querying %s", beward.redact_auth_from_url(url))
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug(
+                "Querying %s", redact_url(url), extra={"function": "alarmchangestate"}
+            )
 
-        params = self.params.copy()
-        params.update({"channel": channel, "parameter": ";".join(set(alarms))})
+        self._alarms_params(channel, alarms)
         auth = HTTPBasicAuth(self.username, self.password)
 
         self._listen_alarms = len(self._alarm_handlers) != 0
+        self._stop_event.clear()
+        self._alarm_listeners = [x for x in self._alarm_listeners if x.is_alive()]
 
         self._listener = threading.Thread(
-            target=self.__alarms_listener, args=(url, params, auth), daemon=True
+            target=self.__alarms_listener, args=(auth,), daemon=True
         )
         self._listener.start()
         self._alarm_listeners.append(self._listener)
 
-        _LOGGER.debug("Return from listen_alarms()")
+        self._log.debug("Return from listen_alarms()")
 
-    def __alarms_listener(self, url: str, params: Any, auth: Any) -> None:
+    def __alarms_listener(self, auth: Any) -> None:
+        attempt = 0
         while self._listen_alarms:
+            # Build request on every attempt to follow changes of device address
+            # and of subscribed alarm types
+            self._stream_restart = False
+            url = self.get_url("alarmchangestate")
+            params = {**self.params, **self._stream_params(self._alarm_filter)}
+            start = perf_counter() if self.metrics is not None else 0
             try:
-                resp = requests.get(
-                    url, params=params, auth=auth, stream=True, timeout=10
-                )
-            except RequestException:  # pragma: no cover
+                resp = self._open_alarms_stream(url, params, auth)
+            except RequestException as exc:
+                self._log.debug("Alarms stream connection failed: %s", exc)
+                self.last_error = exc
+                if self.metrics is not None:
+                    self._record_request("alarmchangestate", "error", start)
+            else:
+                self._log.debug("_query ret %s", resp.status_code)
+                if self.metrics is not None:
+                    self._record_request("alarmchangestate", resp.status_code, start)
+
+                if resp.status_code != HTTPStatus.OK:
+                    resp.close()
+                    self.last_error = requests.HTTPError(
+                        f"Unexpected response status {resp.status_code}",
+                        response=resp,
+                    )
+                else:
+                    started = monotonic()
+                    received = self.__read_alarms_stream(resp)
+                    uptime = monotonic() - started
+                    if received or uptime >= min(STREAM_MIN_UPTIME, self.idle_timeout):
+                        # Reset backoff only if stream really worked, so devices
+                        # which drop streams at once are not hammered
+                        attempt = 0
+
+            if not self._listen_alarms:
                 break
-            _LOGGER.debug("_query ret %s", resp.status_code)
+            if self._stream_restart:
+                self._log.debug("Alarms subscriptions changed, restart stream")
+                continue
+
+            delay = backoff_delay(
+                attempt, self.reconnect_delay, self.reconnect_max_delay
+            )
+            attempt += 1
+            self._record_reconnect()
+            self._log.debug("Reconnect to alarms stream in %.1f seconds", delay)
+            self._stop_event.wait(delay)
+
+        self._set_online(state=False)
+
+    def _open_alarms_stream(self, url: str, params: Any, auth: Any) -> Response:
+        """
+        Send request for alarms stream and return streamed response.
+
+        Connect and headers wait are bounded by STREAM_OPEN_TIMEOUT to keep
+        stop() responsive, idle timeout is applied once headers are received.
+        """
+        timeout = min(TIMEOUT, STREAM_OPEN_TIMEOUT, self.idle_timeout)
+        if self.tracer is None:
+            return requests.get(
+                url, params=params, auth=auth, stream=True, timeout=timeout
+            )
+
+        with trace_exchange(
+            self.tracer, self.host, self.port, "alarmchangestate"
+        ) as span:
+            # Traced session of device is long-lived, unlike the response
+            resp = self.session.get(
+                url, params=params, auth=auth, stream=True, timeout=timeout
+            )
+            span.set_attribute(ATTR_STATUS_CODE, resp.status_code)
+        return resp
+
+    def _set_online(self, *, state: bool) -> None:
+        """Handle change of device online state, skipping repeated states."""
+        if self.alarm_state.get(ALARM_ONLINE) != state:
+            self._handle_alarm(datetime.now(local_tz), ALARM_ONLINE, state)
+
+    def __read_alarms_stream(self, resp: Response) -> bool:
+        """Read alarms stream. Return whether any line was received."""
+        lines = self._stream_lines
+        # Register response before checking for stop, so stop() either sees
+        # the response or the listener sees the stop request
+        with self._alarm_responses_lock:
+            self._alarm_responses.add(resp)
+        if not self._listen_alarms or self._stream_restart:
+            with self._alarm_responses_lock:
+                self._alarm_responses.discard(resp)
+            _close_response(resp)
+            return False
 
+        # Read timeout works as a watchdog for stalled streams
+        sock = _response_socket(resp)
+        if sock is not None:
+            with contextlib.suppress(OSError):
+                sock.settimeout(self.idle_timeout)
+        try:
+            self._read_alarms(resp)
+        except (RequestException, OSError, ValueError, AttributeError) as exc:
+            if self._listen_alarms:
+                self._log.debug("Alarms stream interrupted: %s", exc)
+                self.last_error = exc
+        finally:
+            with self._alarm_responses_lock:
+                self._alarm_responses.discard(resp)
+            resp.close()
+
+        self._set_online(state=False)
+        return self._stream_lines != lines
+
+    def _read_alarms(self, resp: Response) -> None:
+        """Read alarms stream from Beward device."""
+        self._set_online(state=True)
+
+        for line in resp.iter_lines(chunk_size=1, decode_unicode=True):
             if not self._listen_alarms:  # pragma: no cover
                 break
 
-            if resp.status_code != HTTPStatus.OK:  # pragma: no cover
-                sleep(TIMEOUT)
-                continue
-
-            self._handle_alarm(datetime.now(local_tz), ALARM_ONLINE, state=True)
-
-            for line in resp.iter_lines(chunk_size=1, decode_unicode=True):
-                if not self._listen_alarms:  # pragma: no cover
-                    break
+            if line:
+                self._stream_lines += 1
+                if self.alarm_recorder is not None:
+                    self.alarm_recorder.record(self, line)
+                try:
+                    self._process_alarm_line(line)
+                except ValueError as exc:
+                    # Single malformed line must not tear down the stream
+                    self._log.warning("Invalid alarm %r: %s", line, exc)
+
+    def _process_alarm_line(self, line: str) -> None:
+        """Parse line of alarms stream and handle alarm."""
+        self._log.debug("Alarm: %s", line)
+
+        date, time, alert, state, channel = str(line).split(";", 5)
+        if self._alarm_filter is not None and alert not in self._alarm_filter:
+            return
+        channel = int(channel)
+        if self._channel_filter is not None and channel not in self._channel_filter:
+            return
+        if self.metrics is not None:
+            self.metrics.inc(
+                METRIC_ALARM_EVENTS, device=f"{self.host}:{self.port}", alarm=alert
+            )
+
+        timestamp = datetime.strptime(date + " " + time, "%Y-%m-%d %H:%M:%S").replace(
+            tzinfo=local_tz
+        )
+        state = state != "0"
 
-                if line:
-                    _LOGGER.debug("Alarm: %s", line)
+        if self.alarm_debouncer is None:
+            self._handle_channel_alarm(channel, timestamp, alert, state)
+            return
 
-                    date, time, alert, state, _ = str(line).split(";", 5)
-                    timestamp = datetime.strptime(
-                        date + " " + time, "%Y-%m-%d %H:%M:%S"
-                    ).replace(tzinfo=local_tz)
-                    state = state != "0"
+        handler = self._channel_handlers.get(channel)
+        if handler is None:
+            handler = functools.partial(self._handle_channel_alarm, channel)
+            self._channel_handlers[channel] = handler
+        self.alarm_debouncer.process(timestamp, alert, state, handler, channel)
 
-                    self._handle_alarm(timestamp, alert, state)
+    def _handle_channel_alarm(
+        self,
+        channel: int,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+    ) -> None:
+        """Update state of device channel and handle alarm."""
+        self.channel_alarm_state.setdefault(channel, {})[alarm] = state
+        self.channel_alarm_timestamp.setdefault(channel, {})[alarm] = timestamp
+        self._handle_alarm(timestamp, alarm, state, channel=channel)
 
-            self._handle_alarm(datetime.now(local_tz), ALARM_ONLINE, state=False)
+    @property
+    def alarm_repeats(self) -> dict[str, int]:
+        """Return number of raw events aggregated into last state of alarms."""
+        if self.alarm_debouncer is None:
+            return {}
+        return self.alarm_debouncer.repeats
 
-        self._handle_alarm(
-            datetime.now(local_tz), ALARM_ONLINE, state=False
-        )  # pragma: no cover
+    def get_info(
+        self,
+        function: str,
+        keys: Iterable[str] | None = None,
+        types: Mapping[str, Callable[[str], Any]] | None = None,
+    ) -> dict:
+        """
+        Get info from Beward device.
+
+        Only `keys` are returned if they are given. Values of keys listed in
+        `types` are converted by given callables. Raises HTTPError if device
+        rejects request.
+        """
+        res = self.query(function, extra_params={"action": "get"})
+        if res is None:
+            msg = f"Failed to get parameters of {function}"
+            raise requests.HTTPError(msg)
+        # Use declared charset only: charset detection is slow
+        return parse_params(res.content, res.encoding or "utf-8", keys, types)
+
+    def get_config(
+        self, functions: Iterable[str], max_workers: int = CONFIG_MAX_WORKERS
+    ) -> dict[str, dict[str, str]]:
+        """
+        Read parameters of several CGI groups in one parallel batch.
+
+        Read values are cached to diff against them on writing.
+        """
+        functions = list(dict.fromkeys(functions))
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(functions)))
+        ) as executor:
+            config = dict(
+                zip(functions, executor.map(self.get_info, functions), strict=True)
+            )
+
+        self._config.update(config)
+        return config
+
+    def set_config(
+        self, function: str, values: Mapping[str, Any], *, force: bool = False
+    ) -> dict[str, str]:
+        """
+        Write parameters of CGI group.
+
+        Only keys which differ from cached read of the group are written, unless
+        `force` is set. Returns written parameters.
+        """
+        if force:
+            current = {}
+        elif function in self._config:
+            current = self._config[function]
+        else:
+            current = self.get_config([function])[function]
+
+        changed = {
+            key: str(val) for key, val in values.items() if current.get(key) != str(val)
+        }
+        if not changed:
+            return changed
 
-    def get_info(self, function: str) -> dict:
-        """Get info from Beward device."""
-        info = {}
-        data = self.query(function, extra_params={"action": "get"}).text
-        for env in data.splitlines():
-            (key, val) = env.split("=", 2)
-            info[key] = val
+        if self.query(function, extra_params={"action": "set", **changed}) is None:
+            msg = f"Failed to set parameters of {function}"
+            raise requests.HTTPError(msg)
 
-        return info
+        self._config.setdefault(function, {}).update(changed)
+        return changed
 
     @property
     def system_info(self) -> dict:
@@ -274,11 +801,19 @@ class BewardGeneric:
             return self._sysinfo
 
         self._sysinfo = {}
-        with contextlib.suppress(ConnectTimeout):
+        with contextlib.suppress(ConnectTimeout, requests.HTTPError):
             self._sysinfo = self.get_info("systeminfo")
 
         return self._sysinfo
 
+    @property
+    def channels(self) -> int:
+        """Return number of video channels of device."""
+        try:
+            return max(1, int(self.system_info.get("ChannelNum", 1)))
+        except ValueError:
+            return 1
+
     @property
     # pylint: disable=unsubscriptable-object
     def device_type(self) -> str | None:
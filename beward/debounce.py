@@ -0,0 +1,158 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Alarms debouncer."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable, Mapping
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+AlarmEmitter = Callable[["datetime", str, bool], None]
+
+
+class _AlarmState:
+    """Debounced state of one alarm type of one channel."""
+
+    __slots__ = ("active", "release_timer", "repeats", "since")
+
+    def __init__(self) -> None:
+        """Initialize debounced alarm state."""
+        self.active = False
+        self.since = 0.0
+        self.repeats = 0
+        self.release_timer: threading.Timer | None = None
+
+
+class AlarmDebouncer:
+    """
+    Edge-triggered alarm state engine.
+
+    Passes only real state transitions of every alarm type of every channel,
+    so alarms of different channels never mask each other. Repeated active
+    events are counted instead of being handled. An active state is held for at
+    least `hold` seconds, and it is released only if no new active events came
+    within `release` seconds. Both times can be set per alarm type by mapping.
+    """
+
+    def __init__(
+        self,
+        hold: float | Mapping[str, float] = 0,
+        release: float | Mapping[str, float] = 0,
+    ) -> None:
+        """Initialize alarms debouncer."""
+        self.hold = hold
+        self.release = release
+
+        self._states: dict[tuple[int, str], _AlarmState] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _get_time(value: float | Mapping[str, float], alarm: str) -> float:
+        """Get time setting for alarm type."""
+        if isinstance(value, Mapping):
+            return value.get(alarm, 0)
+        return value
+
+    @property
+    def repeats(self) -> dict[str, int]:
+        """Return number of events aggregated into last state of every alarm."""
+        repeats: dict[str, int] = {}
+        for (_, alarm), alarm_state in self._states.items():
+            repeats[alarm] = repeats.get(alarm, 0) + alarm_state.repeats
+        return repeats
+
+    @property
+    def channel_repeats(self) -> dict[int, dict[str, int]]:
+        """Return number of aggregated events of every alarm per channel."""
+        repeats: dict[int, dict[str, int]] = {}
+        for (channel, alarm), alarm_state in self._states.items():
+            repeats.setdefault(channel, {})[alarm] = alarm_state.repeats
+        return repeats
+
+    def process(
+        self,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+        emit: AlarmEmitter,
+        channel: int = 0,
+    ) -> None:
+        """Process raw alarm event of channel and emit state transitions."""
+        with self._lock:
+            alarm_state = self._states.setdefault((channel, alarm), _AlarmState())
+
+            if state:
+                if alarm_state.release_timer is not None:
+                    alarm_state.release_timer.cancel()
+                    alarm_state.release_timer = None
+
+                if alarm_state.active:
+                    alarm_state.repeats += 1
+                    return
+
+                alarm_state.active = True
+                alarm_state.since = monotonic()
+                alarm_state.repeats = 1
+
+            else:
+                if not alarm_state.active or alarm_state.release_timer is not None:
+                    return
+
+                delay = max(
+                    self._get_time(self.release, alarm),
+                    self._get_time(self.hold, alarm)
+                    - (monotonic() - alarm_state.since),
+                )
+                if delay > 0 and not self._closed:
+                    alarm_state.release_timer = threading.Timer(
+                        delay,
+                        self._release,
+                        args=(alarm_state, timestamp, alarm, emit),
+                    )
+                    alarm_state.release_timer.daemon = True
+                    alarm_state.release_timer.start()
+                    return
+
+                alarm_state.active = False
+
+        emit(timestamp, alarm, state)
+
+    def _release(
+        self,
+        alarm_state: _AlarmState,
+        timestamp: datetime,
+        alarm: str,
+        emit: AlarmEmitter,
+    ) -> None:
+        """Emit delayed release of alarm."""
+        with self._lock:
+            if alarm_state.release_timer is not threading.current_thread():
+                return
+            alarm_state.release_timer = None
+            alarm_state.active = False
+
+        emit(timestamp, alarm, False)  # noqa: FBT003
+
+    def close(self) -> None:
+        """Cancel all pending releases."""
+        with self._lock:
+            self._closed = True
+            timers = [x.release_timer for x in self._states.values()]
+            for alarm_state in self._states.values():
+                alarm_state.release_timer = None
+
+        for timer in timers:
+            if timer is not None:
+                timer.cancel()
+                if timer is not threading.current_thread():
+                    timer.join()
@@ -0,0 +1,254 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Alarm handlers dispatcher."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from .const import (
+    DISPATCH_ASYNCIO,
+    DISPATCH_INLINE,
+    DISPATCH_THREAD,
+    OVERFLOW_BLOCK,
+    OVERFLOW_COALESCE,
+    OVERFLOW_DROP_OLDEST,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import datetime
+
+    from .core import AlarmHandlerCallback, BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+DISPATCH_MODES = (DISPATCH_INLINE, DISPATCH_THREAD, DISPATCH_ASYNCIO)
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_BLOCK)
+
+
+class _AlarmEvent:
+    """Queued alarm event."""
+
+    __slots__ = ("alarm", "device", "enqueued", "handlers", "state", "timestamp")
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        device: BewardGeneric,
+        handlers: tuple[AlarmHandlerCallback, ...],
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+    ) -> None:
+        """Initialize queued alarm event."""
+        self.device = device
+        self.handlers = handlers
+        self.timestamp = timestamp
+        self.alarm = alarm
+        self.state = state
+        self.enqueued = monotonic()
+
+
+# pylint: disable=too-many-instance-attributes
+class AlarmDispatcher:
+    """
+    Deliver alarm events of one Beward device to its handlers.
+
+    In inline mode handlers are called on the listener thread. In thread and
+    asyncio modes events are put to a bounded queue and delivered in order by
+    a thread pool or an event loop, so slow handlers do not stall the stream.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(  # noqa: PLR0913
+        self,
+        mode: str = DISPATCH_INLINE,
+        *,
+        executor: Executor | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        queue_size: int = 100,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+        late_after: float = 1.0,
+        block_timeout: float | None = None,
+    ) -> None:
+        """Initialize alarm handlers dispatcher."""
+        if mode not in DISPATCH_MODES:
+            msg = f'Unknown dispatch mode "{mode}"'
+            raise ValueError(msg)
+        if overflow not in OVERFLOW_POLICIES:
+            msg = f'Unknown overflow policy "{overflow}"'
+            raise ValueError(msg)
+        if queue_size < 1:
+            msg = "Queue size must be positive"
+            raise ValueError(msg)
+
+        self.mode = mode
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.late_after = late_after
+        self.block_timeout = block_timeout
+
+        self._executor = executor
+        self._own_executor = False
+        if mode == DISPATCH_THREAD and executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="beward-dispatch"
+            )
+            self._own_executor = True
+
+        self._loop = loop
+        if mode == DISPATCH_ASYNCIO and loop is None:
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError as exc:
+                msg = "Event loop is required for asyncio dispatch mode"
+                raise ValueError(msg) from exc
+
+        self._queue: deque[_AlarmEvent] = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._draining = False
+        self._closed = False
+        self._tasks: set[asyncio.Future] = set()
+
+        self.dispatched = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.late = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return dispatcher counters."""
+        return {
+            "queued": len(self._queue),
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "late": self.late,
+        }
+
+    # pylint: disable=too-many-arguments
+    def dispatch(
+        self,
+        device: BewardGeneric,
+        handlers: Iterable[AlarmHandlerCallback],
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+    ) -> None:
+        """Deliver alarm event to handlers."""
+        if self.mode == DISPATCH_INLINE:
+            for handler in handlers:  # type: AlarmHandlerCallback
+                handler(device, timestamp, alarm, state)
+            self.dispatched += 1
+            return
+
+        event = _AlarmEvent(device, tuple(handlers), timestamp, alarm, state)
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return
+
+            if len(self._queue) >= self.queue_size and not self._make_room(event):
+                return
+
+            self._queue.append(event)
+            self._schedule()
+
+    def _make_room(self, event: _AlarmEvent) -> bool:
+        """Apply overflow policy. Return False if event must not be queued."""
+        if self.overflow == OVERFLOW_COALESCE:
+            for idx, queued in enumerate(self._queue):
+                if queued.alarm == event.alarm:
+                    event.enqueued = queued.enqueued
+                    self._queue[idx] = event
+                    self.coalesced += 1
+                    return False
+
+        elif self.overflow == OVERFLOW_BLOCK:
+            if self.mode == DISPATCH_ASYNCIO and self._on_loop_thread():
+                # Queue is drained by event loop, so it can't wait for itself
+                self.dropped += 1
+                return False
+            if (
+                self._not_full.wait_for(
+                    lambda: len(self._queue) < self.queue_size or self._closed,
+                    self.block_timeout,
+                )
+                and not self._closed
+            ):
+                return True
+            self.dropped += 1
+            return False
+
+        self._queue.popleft()
+        self.dropped += 1
+        return True
+
+    def _on_loop_thread(self) -> bool:
+        """Return whether caller runs in event loop of dispatcher."""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _schedule(self) -> None:
+        """Schedule queue draining. Must be called with lock held."""
+        if self._draining:
+            return
+
+        try:
+            if self.mode == DISPATCH_THREAD:
+                self._executor.submit(self._drain)
+            else:
+                self._loop.call_soon_threadsafe(self._drain)
+        except RuntimeError as exc:
+            # Executor is shut down or event loop is closed, next event retries
+            _LOGGER.warning("Failed to schedule alarm handlers: %s", exc)
+            return
+        self._draining = True
+
+    def _drain(self) -> None:
+        """Deliver all queued events."""
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._draining = False
+                    return
+
+                event = self._queue.popleft()
+                self._not_full.notify()
+
+            if monotonic() - event.enqueued > self.late_after:
+                self.late += 1
+
+            for handler in event.handlers:
+                try:
+                    res = handler(
+                        event.device, event.timestamp, event.alarm, event.state
+                    )
+                    if self.mode == DISPATCH_ASYNCIO and inspect.isawaitable(res):
+                        task = asyncio.ensure_future(res, loop=self._loop)
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                except Exception:
+                    _LOGGER.exception("Error in alarm handler %s", handler)
+            self.dispatched += 1
+
+    def close(self, *, wait: bool = True) -> None:
+        """Stop accepting new events and release dispatcher resources."""
+        with self._lock:
+            self._closed = True
+            self._not_full.notify_all()
+
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
@@ -24,9 +24,15 @@ class BewardDoorbell(BewardCamera):
         self.last_ding_timestamp = None
         self.last_ding_image = None
 
-    def _handle_alarm(self, timestamp: datetime, alarm: str, state: bool) -> None:  # noqa: FBT001
+    def _handle_alarm(
+        self,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+        channel: int | None = None,
+    ) -> None:
         """Handle alarms from Beward device."""
-        super()._handle_alarm(timestamp, alarm, state)
+        super()._handle_alarm(timestamp, alarm, state, channel)
 
         if alarm == ALARM_SENSOR and state:
             self.last_ding_timestamp = timestamp
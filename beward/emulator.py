@@ -0,0 +1,760 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Local emulator of Beward devices for integration and load testing."""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import hashlib
+import itertools
+import logging
+import os
+import re
+import socket
+import socketserver
+import struct
+import threading
+from collections import Counter
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .const import (
+    ALARM_MOTION,
+    ALARM_SENSOR,
+    DISCOVERY_PORT,
+    DISCOVERY_REQUEST,
+)
+from .rtsp import NAL_FU_A, NAL_STAP_A, START_CODE
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_DATA_LENGTH = 584
+
+# Smallest valid JPEG image (1x1 pixel)
+DEFAULT_IMAGE = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABALDA4MChAODQ4SERATGCgaGBYWGDEjJR0oOjM9"
+    "PDkzODdASFxOQERXRTc4UG1RV19iZ2hnPk1xeXBkeFxlZ2P/wAALCAABAAEBAREA/8QAHwAA"
+    "AQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQAAAF9AQIDAAQR"
+    "BRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3ODk6Q0RF"
+    "RkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWmp6ip"
+    "qrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/9oACAEB"
+    "AAA/ACv/2Q=="
+)
+
+
+def build_discovery_response(  # noqa: PLR0913
+    device_id: int,
+    name: str,
+    host_ip: str,
+    mac: str,
+    *,
+    http_port: int = 80,
+    data_port: int = 5000,
+    net_mask: str = "255.255.255.0",
+    gate_ip: str = "0.0.0.0",  # noqa: S104
+) -> bytes:
+    """Encode discovery response packet of Beward device."""
+
+    def _pack_ip(ip_addr: str) -> int:
+        return struct.unpack(">I", socket.inet_aton(ip_addr))[0]
+
+    packet = bytearray(28 + DISCOVERY_DATA_LENGTH)
+    struct.pack_into(
+        "<45xL19x64sI6s2H2x2I",
+        packet,
+        0,
+        device_id,
+        name.encode("utf-8"),
+        _pack_ip(host_ip),
+        bytes.fromhex(mac.replace(":", "")),
+        http_port,
+        data_port,
+        _pack_ip(net_mask),
+        _pack_ip(gate_ip),
+    )
+    packet[:28] = DISCOVERY_REQUEST[:24] + struct.pack("<I", DISCOVERY_DATA_LENGTH)
+    return bytes(packet)
+
+
+class _EmulatorHandler(BaseHTTPRequestHandler):
+    """HTTP requests handler of emulated Beward device."""
+
+    server: _EmulatorServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        """Register client connection."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self) -> None:
+        """Unregister client connection."""
+        with self.server.lock:
+            self.server.connections.discard(self.connection)
+        super().finish()
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        """Log HTTP request."""
+        _LOGGER.debug(fmt, *args)
+
+    def do_GET(self) -> None:
+        """Handle GET request."""
+        device = self.server.device
+        device.requests += 1
+
+        if device.latency and device.stop_event.wait(device.latency):
+            return
+
+        if self.headers.get("Authorization") != device.authorization:
+            self.send_error(HTTPStatus.UNAUTHORIZED)
+            return
+
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        function = url.path.removeprefix("/cgi-bin/").removesuffix("_cgi")
+
+        if function == "alarmchangestate":
+            self._stream_alarms(query)
+        elif function == "images":
+            channel = query.get("channel", "0")
+            if not channel.isdigit():
+                self.send_error(HTTPStatus.BAD_REQUEST)
+            elif int(channel) >= device.channels:
+                self.send_error(HTTPStatus.NOT_FOUND)
+            elif device.thumbnail is not None and "width" in query:
+                self._send(device.thumbnail, "image/jpeg")
+            else:
+                self._send(device.image, "image/jpeg")
+        elif function in device.params and query.get("action") == "set":
+            query.pop("action")
+            device.params[function].update(query)
+            device.writes += 1
+            self._send(b"OK\r\n", "text/plain")
+        elif function in device.params:
+            body = "".join(f"{k}={v}\r\n" for k, v in device.params[function].items())
+            self._send(body.encode(), "text/plain")
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        """Send response."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_alarms(self, query: dict[str, str]) -> None:
+        """Stream alarms until client disconnects or emulator stops."""
+        device = self.server.device
+        wanted = set(filter(None, query.get("parameter", "").split(";")))
+        channels = [
+            int(x)
+            for x in query.get("channel", "0").split(";")
+            if x.isdigit() and int(x) < device.channels
+        ]
+        alarms = [
+            (alarm, channel)
+            for channel in channels
+            for alarm in device.alarms
+            if not wanted or alarm in wanted
+        ]
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        interval = 1 / device.event_rate if device.event_rate else None
+        states = dict.fromkeys(alarms, False)
+        events = itertools.cycle(alarms) if alarms and device.event_rate else iter(())
+        sent = 0
+        with contextlib.suppress(OSError):
+            for alarm, channel in events:
+                if device.max_events is not None and sent >= device.max_events:
+                    break
+                state = states[alarm, channel] = not states[alarm, channel]
+                now = datetime.now()  # noqa: DTZ005
+                self.wfile.write(
+                    f"{now:%Y-%m-%d;%H:%M:%S};{alarm};{int(state)};{channel}\r\n".encode()
+                )
+                self.wfile.flush()
+                sent += 1
+                device.events_sent += 1
+                if device.stop_event.wait(interval):
+                    return
+
+            # Hold connection open like real device does
+            device.stop_event.wait()
+
+
+class _EmulatorServer(ThreadingHTTPServer):
+    """HTTP server of emulated Beward device."""
+
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, device: BewardEmulator, address: tuple[str, int]) -> None:
+        """Initialize HTTP server."""
+        self.device = device
+        self.connections: set[socket.socket] = set()
+        self.lock = threading.Lock()
+        super().__init__(address, _EmulatorHandler)
+
+    def close_connections(self) -> None:
+        """Close all client connections including idle keep-alive ones."""
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            with contextlib.suppress(OSError):
+                conn.shutdown(socket.SHUT_RDWR)
+
+
+# pylint: disable=too-many-instance-attributes
+class BewardEmulator:
+    """
+    Emulator of Beward device CGI API.
+
+    Serves systeminfo, rtsp, images and streaming alarmchangestate functions on
+    a local port. Alarms are generated at `event_rate` events per second for
+    every requested channel. If thumbnail is given, it is served for images
+    requested with size.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        username: str = "admin",
+        password: str = "admin",  # noqa: S107
+        *,
+        model: str = "DS06M",
+        device_id: int = 1,
+        mac: str | None = None,
+        event_rate: float = 0,
+        alarms: tuple[str, ...] = (ALARM_MOTION, ALARM_SENSOR),
+        max_events: int | None = None,
+        latency: float = 0,
+        image: bytes = DEFAULT_IMAGE,
+        channels: int = 1,
+        thumbnail: bytes | None = None,
+    ) -> None:
+        """Initialize Beward device emulator."""
+        self.host = host
+        self.username = username
+        self.password = password
+        self.device_id = device_id
+        self.mac = mac or ":".join(
+            f"{x:02x}" for x in struct.pack(">HI", 0x005A, device_id)
+        )
+        self.event_rate = event_rate
+        self.alarms = alarms
+        self.max_events = max_events
+        self.latency = latency
+        self.image = image
+        self.channels = channels
+        self.thumbnail = thumbnail
+
+        self.authorization = "Basic " + base64.b64encode(
+            f"{username}:{password}".encode("latin1")
+        ).decode("ascii")
+        self.params: dict[str, dict[str, Any]] = {
+            "systeminfo": {
+                "HostName": f"IPC{device_id}",
+                "ChannelNum": channels,
+                "DeviceID": device_id,
+                "SoftwareVersion": "3.1.0.0.6.18",
+                "DeviceModel": model,
+            },
+            "rtsp": {
+                "RtspSwitch": "open",
+                "RtspAuth": "open",
+                "RtspPort": 554,
+            },
+        }
+
+        self.requests = 0
+        self.events_sent = 0
+        self.writes = 0
+        self.stop_event = threading.Event()
+
+        self._server = _EmulatorServer(self, (host, port))
+        self.port = self._server.server_address[1]
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> BewardEmulator:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop emulator."""
+        self.stop()
+
+    def discovery_response(self) -> bytes:
+        """Return discovery response packet of emulated device."""
+        return build_discovery_response(
+            self.device_id,
+            str(self.params["systeminfo"]["HostName"]),
+            self.host,
+            self.mac,
+            http_port=self.port,
+        )
+
+    def start(self) -> BewardEmulator:
+        """Start serving requests."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name=f"beward-emulator-{self.port}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving requests and close all connections."""
+        self.stop_event.set()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.close_connections()
+        self._server.server_close()
+
+
+class DiscoveryResponder:
+    """Responder to UDP discovery requests on behalf of emulated devices."""
+
+    def __init__(
+        self,
+        devices: list[BewardEmulator],
+        host: str = "127.0.0.1",
+        port: int = DISCOVERY_PORT,
+    ) -> None:
+        """Initialize discovery responder."""
+        self.devices = devices
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.05)
+        self.port = self._sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> DiscoveryResponder:
+        """Start answering discovery requests."""
+        self._thread = threading.Thread(
+            target=self._serve, name="beward-discovery", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _serve(self) -> None:
+        """Answer discovery requests."""
+        while not self._stop.is_set():
+            try:
+                data, addr = self._sock.recvfrom(1024)
+            except TimeoutError:
+                continue
+            if data[:4] != DISCOVERY_REQUEST[:4]:
+                continue
+            for device in self.devices:
+                self._sock.sendto(device.discovery_response(), addr)
+
+    def stop(self) -> None:
+        """Stop answering discovery requests."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sock.close()
+
+
+class EmulatorFleet:
+    """Fleet of emulated Beward devices on localhost."""
+
+    def __init__(
+        self,
+        count: int,
+        *,
+        discovery_port: int | None = 0,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Initialize fleet of emulated devices.
+
+        Keyword arguments are passed to every BewardEmulator. Set discovery_port
+        to None to disable discovery responder.
+        """
+        self.devices = [
+            BewardEmulator(device_id=idx + 1, **kwargs) for idx in range(count)
+        ]
+        self.discovery = None
+        if discovery_port is not None:
+            self.discovery = DiscoveryResponder(self.devices, port=discovery_port)
+
+    def __enter__(self) -> EmulatorFleet:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop all devices."""
+        self.stop()
+
+    def start(self) -> EmulatorFleet:
+        """Start all emulated devices."""
+        for device in self.devices:
+            device.start()
+        if self.discovery is not None:
+            self.discovery.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop all emulated devices."""
+        if self.discovery is not None:
+            self.discovery.stop()
+        # Signal all devices first, so open streams are closed in parallel
+        for device in self.devices:
+            device.stop_event.set()
+        for device in self.devices:
+            device.stop()
+
+
+# Synthetic H.264 parameter sets of emulated RTSP stream
+RTSP_SPS = b"\x67\x42\xc0\x1f\xda\x01\x40\x16\xe8"
+RTSP_PPS = b"\x68\xce\x3c\x80"
+RTSP_PAYLOAD_TYPE = 96
+RTSP_REALM = "Beward"
+RTSP_SESSION = "42424242"
+
+
+def build_rtp_packet(
+    seq: int, timestamp: int, payload: bytes, *, marker: bool = False
+) -> bytes:
+    """Encode RTP packet of emulated RTSP stream."""
+    return (
+        struct.pack(
+            ">BBHII",
+            0x80,
+            (0x80 if marker else 0) | RTSP_PAYLOAD_TYPE,
+            seq & 0xFFFF,
+            timestamp & 0xFFFFFFFF,
+            0x42455741,
+        )
+        + payload
+    )
+
+
+def packetize_h264(nal: bytes, mtu: int) -> list[bytes]:
+    """Split H.264 NAL unit into RTP payloads, fragmenting large one by FU-A."""
+    if len(nal) <= mtu:
+        return [nal]
+
+    indicator = (nal[0] & 0xE0) | NAL_FU_A
+    chunks = [nal[idx : idx + mtu] for idx in range(1, len(nal), mtu)]
+    payloads = []
+    for idx, chunk in enumerate(chunks):
+        header = nal[0] & 0x1F
+        if idx == 0:
+            header |= 0x80
+        if idx == len(chunks) - 1:
+            header |= 0x40
+        payloads.append(bytes((indicator, header)) + chunk)
+    return payloads
+
+
+class _RtspHandler(socketserver.StreamRequestHandler):
+    """RTSP requests handler of emulated device."""
+
+    server: _RtspServer
+
+    def setup(self) -> None:
+        """Register client connection."""
+        super().setup()
+        self.stopped = threading.Event()
+        self.write_lock = threading.Lock()
+        with self.server.lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self) -> None:
+        """Unregister client connection."""
+        with self.server.lock:
+            self.server.connections.discard(self.connection)
+        super().finish()
+
+    def handle(self) -> None:
+        """Handle RTSP requests until client disconnects."""
+        emulator = self.server.emulator
+        streamer = None
+        with contextlib.suppress(OSError):
+            while not emulator.stop_event.is_set():
+                request = self._read_request()
+                if request is None:
+                    break
+                method, uri, headers = request
+                emulator.requests[method] += 1
+
+                if not self._authorized(method, uri, headers):
+                    self._reply(headers, 401, {"WWW-Authenticate": emulator.challenge})
+                elif method == "DESCRIBE":
+                    self._reply(
+                        headers,
+                        200,
+                        {"Content-Base": uri + "/", "Content-Type": "application/sdp"},
+                        emulator.sdp().encode(),
+                    )
+                elif method == "SETUP":
+                    session = f"{RTSP_SESSION};timeout={emulator.session_timeout}"
+                    transport = headers.get("transport", "")
+                    self._reply(
+                        headers, 200, {"Session": session, "Transport": transport}
+                    )
+                elif method == "PLAY":
+                    self._reply(headers, 200)
+                    if streamer is None:
+                        streamer = threading.Thread(target=self._stream, daemon=True)
+                        streamer.start()
+                elif method == "TEARDOWN":
+                    self._reply(headers, 200)
+                    break
+                else:
+                    self._reply(headers, 200)
+
+        self.stopped.set()
+        if streamer is not None:
+            streamer.join()
+
+    def _read_request(self) -> tuple[str, str, dict[str, str]] | None:
+        """Read request line and headers."""
+        line = self.rfile.readline().decode("latin1").strip()
+        if not line:
+            return None
+        method, uri, _ = line.split(" ", 2)
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode("latin1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return method, uri, headers
+
+    def _authorized(self, method: str, uri: str, headers: dict[str, str]) -> bool:
+        """Check authorization of request."""
+        emulator = self.server.emulator
+        if emulator.username is None:
+            return True
+
+        authorization = headers.get("authorization", "")
+        if emulator.auth == "basic":
+            token = f"{emulator.username}:{emulator.password}".encode()
+            return authorization == "Basic " + base64.b64encode(token).decode()
+
+        fields = dict(re.findall(r'(\w+)="?([^",]*)"?', authorization))
+        ha1 = hashlib.md5(  # noqa: S324
+            f"{emulator.username}:{RTSP_REALM}:{emulator.password}".encode()
+        ).hexdigest()
+        ha2 = hashlib.md5(f"{method}:{uri}".encode()).hexdigest()  # noqa: S324
+        response = hashlib.md5(  # noqa: S324
+            f"{ha1}:{emulator.nonce}:{ha2}".encode()
+        ).hexdigest()
+        return authorization.startswith("Digest ") and fields.get("response") == (
+            response
+        )
+
+    def _reply(
+        self,
+        request: dict[str, str],
+        status: int,
+        headers: dict[str, str] | None = None,
+        body: bytes = b"",
+    ) -> None:
+        """Send response."""
+        lines = [
+            f"RTSP/1.0 {status} {HTTPStatus(status).phrase}",
+            f"CSeq: {request.get('cseq', 0)}",
+        ]
+        lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+        lines.append(f"Content-Length: {len(body)}")
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+        with self.write_lock:
+            self.wfile.write(data)
+
+    def _stream(self) -> None:
+        """Send emulated H.264 video stream as interleaved RTP packets."""
+        emulator = self.server.emulator
+        seq = 0
+        with contextlib.suppress(OSError):
+            for frame in itertools.count():
+                if self.stopped.is_set() or emulator.stop_event.is_set():
+                    break
+
+                timestamp = frame * 90000 // emulator.fps
+                if frame % emulator.gop == 0:
+                    params = b"".join(
+                        struct.pack(">H", len(x)) + x for x in (RTSP_SPS, RTSP_PPS)
+                    )
+                    payloads = [
+                        bytes((NAL_STAP_A,)) + params,
+                        *packetize_h264(
+                            emulator.idr_frame(emulator.keyframes_sent), emulator.mtu
+                        ),
+                    ]
+                    emulator.keyframes_sent += 1
+                else:
+                    payloads = [b"\x41" + struct.pack(">I", frame) + bytes(100)]
+
+                for idx, payload in enumerate(payloads):
+                    packet = build_rtp_packet(
+                        seq, timestamp, payload, marker=idx == len(payloads) - 1
+                    )
+                    seq += 1
+                    with self.write_lock:
+                        self.wfile.write(
+                            b"$\x00" + struct.pack(">H", len(packet)) + packet
+                        )
+                self.stopped.wait(1 / emulator.fps)
+
+
+class _RtspServer(socketserver.ThreadingTCPServer):
+    """RTSP server of emulated device."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, emulator: RtspEmulator, address: tuple[str, int]) -> None:
+        """Initialize RTSP server."""
+        self.emulator = emulator
+        self.connections: set[socket.socket] = set()
+        self.lock = threading.Lock()
+        super().__init__(address, _RtspHandler)
+
+    def close_connections(self) -> None:
+        """Close all client connections."""
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            with contextlib.suppress(OSError):
+                conn.shutdown(socket.SHUT_RDWR)
+
+
+# pylint: disable=too-many-instance-attributes
+class RtspEmulator:
+    """
+    Stand-in of Beward RTSP server.
+
+    Streams synthetic H.264 video by RTP interleaved in RTSP connection: every
+    `gop` frame is a keyframe with index in its first bytes. Requests are
+    authorized by Digest or Basic scheme if username is given.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        username: str | None = None,
+        password: str | None = None,
+        *,
+        auth: str = "digest",
+        fps: int = 25,
+        gop: int = 5,
+        idr_size: int = 4000,
+        mtu: int = 1400,
+        session_timeout: int = 60,
+    ) -> None:
+        """Initialize RTSP server emulator."""
+        self.host = host
+        self.username = username
+        self.password = password
+        self.auth = auth
+        self.fps = fps
+        self.gop = gop
+        self.idr_size = idr_size
+        self.mtu = mtu
+        self.session_timeout = session_timeout
+
+        self.nonce = os.urandom(8).hex()
+        self.requests: Counter[str] = Counter()
+        self.keyframes_sent = 0
+        self.stop_event = threading.Event()
+
+        self._server = _RtspServer(self, (host, port))
+        self.port = self._server.server_address[1]
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> RtspEmulator:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop emulator."""
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """Return URL of emulated video stream."""
+        auth = f"{self.username}:{self.password}@" if self.username else ""
+        return f"rtsp://{auth}{self.host}:{self.port}/av0_0"
+
+    @property
+    def challenge(self) -> str:
+        """Return value of WWW-Authenticate header."""
+        if self.auth == "basic":
+            return f'Basic realm="{RTSP_REALM}"'
+        return f'Digest realm="{RTSP_REALM}", nonce="{self.nonce}"'
+
+    def sdp(self) -> str:
+        """Return session description of emulated stream."""
+        sprop = ",".join(base64.b64encode(x).decode() for x in (RTSP_SPS, RTSP_PPS))
+        return (
+            "v=0\r\n"
+            f"o=- 0 0 IN IP4 {self.host}\r\n"
+            "s=Beward\r\n"
+            "t=0 0\r\n"
+            "m=audio 0 RTP/AVP 8\r\n"
+            "a=control:track2\r\n"
+            f"m=video 0 RTP/AVP {RTSP_PAYLOAD_TYPE}\r\n"
+            f"a=rtpmap:{RTSP_PAYLOAD_TYPE} H264/90000\r\n"
+            f"a=fmtp:{RTSP_PAYLOAD_TYPE} packetization-mode=1;"
+            f"sprop-parameter-sets={sprop}\r\n"
+            "a=control:track1\r\n"
+        )
+
+    def idr_frame(self, index: int) -> bytes:
+        """Return keyframe NAL unit with given index."""
+        return b"\x65" + struct.pack(">I", index) + bytes(self.idr_size)
+
+    def keyframe(self, index: int) -> bytes:
+        """Return access unit of keyframe with given index in Annex B format."""
+        return b"".join(
+            START_CODE + x for x in (RTSP_SPS, RTSP_PPS, self.idr_frame(index))
+        )
+
+    def start(self) -> RtspEmulator:
+        """Start serving RTSP requests."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name=f"beward-rtsp-emulator-{self.port}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving requests and close all connections."""
+        self.stop_event.set()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.close_connections()
+        self._server.server_close()
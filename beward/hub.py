@@ -0,0 +1,647 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Alarms multiplexer for many Beward devices."""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import errno
+import logging
+import os
+import selectors
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from http import HTTPStatus
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+import requests
+
+from .const import ALARM_ONLINE, STOP_TIMEOUT, TIMEOUT
+from .core import local_tz
+from .util import backoff_delay
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often to check connection deadlines and idle streams
+CHECK_INTERVAL = 0.25
+# Maximum size of response headers
+MAX_HEADERS_SIZE = 65536
+# Number of threads resolving device addresses for every selector loop
+RESOLVER_WORKERS = 2
+# Number of threads handling alarms, as handlers can block, e.g. taking images
+HANDLER_WORKERS = 4
+
+
+# pylint: disable=too-many-instance-attributes
+class _AlarmStream:
+    """Alarms stream connection of one Beward device."""
+
+    def __init__(
+        self, device: BewardGeneric, channel: int | Iterable[int], alarms: Any
+    ) -> None:
+        """Initialize alarms stream connection."""
+        self.device = device
+        device._alarms_params(channel, alarms)  # noqa: SLF001
+        self.alarm_filter: frozenset[str] | None = None
+
+        self.sock: socket.socket | None = None
+        self.resolving: Future | None = None
+        # Device address which stream is connected to
+        self.target: tuple[str, int] | None = None
+        # Resolved addresses of device which are not tried yet
+        self.addresses: list[tuple] = []
+        self.attempt = 0
+        self.next_connect = 0.0
+        # Alarm handling calls, delivered in order outside of selector loop
+        self.calls: deque[tuple[Callable[..., None], tuple]] = deque()
+        self.calls_lock = threading.Lock()
+        self.delivering = False
+        self.reset()
+
+    @property
+    def outdated(self) -> bool:
+        """Return whether subscriptions or address of device are changed."""
+        device = self.device
+        return self.alarm_filter != device._alarm_filter or (  # noqa: SLF001
+            self.target != (device.host, device.port)
+        )
+
+    def build_request(self) -> bytes:
+        """
+        Build request for alarms stream.
+
+        Request is built on every connection to follow changes of device
+        address and of subscribed alarm types.
+        """
+        device = self.device
+        self.alarm_filter = device._alarm_filter  # noqa: SLF001
+        url = device.get_url(
+            "alarmchangestate",
+            extra_params=device._stream_params(self.alarm_filter),  # noqa: SLF001
+        )
+        parts = urlsplit(url)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        auth = base64.b64encode(
+            f"{device.username}:{device.password}".encode("latin1")
+        ).decode()
+        return (
+            f"GET {target} HTTP/1.1\r\n"
+            f"Host: {device.host}:{device.port}\r\n"
+            f"Authorization: Basic {auth}\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode()
+
+    def reset(self) -> None:
+        """Reset connection state."""
+        self.outbuf = b""
+        self.raw = bytearray()
+        self.body = bytearray()
+        self.headers_done = False
+        self.chunked = False
+        self.chunk_left: int | None = None
+        self.online = False
+        self.deadline = 0.0
+        self.last_rx = 0.0
+
+    def decode_chunks(self) -> bool:
+        """Move chunked data to body. Return False after the last chunk."""
+        raw = self.raw
+        while raw:
+            if self.chunk_left is None:
+                idx = raw.find(b"\r\n")
+                if idx < 0:
+                    return True
+                size = int(bytes(raw[:idx]).split(b";", 1)[0], 16)
+                del raw[: idx + 2]
+                if size == 0:
+                    return False
+                self.chunk_left = size
+
+            elif self.chunk_left:
+                chunk = raw[: self.chunk_left]
+                self.body += chunk
+                del raw[: len(chunk)]
+                self.chunk_left -= len(chunk)
+
+            else:
+                if len(raw) < 2:  # noqa: PLR2004
+                    return True
+                del raw[:2]
+                self.chunk_left = None
+
+        return True
+
+
+class _HubLoop:
+    """Selector loop servicing alarms streams from one thread."""
+
+    def __init__(self, name: str, workers: Executor) -> None:
+        """Initialize selector loop."""
+        self.name = name
+        self.streams: dict[BewardGeneric, _AlarmStream] = {}
+        self._workers = workers
+        self._deliveries: set[Future] = set()
+        self._deliveries_lock = threading.Lock()
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)  # noqa: FBT003
+        self._wake_w.setblocking(False)  # noqa: FBT003
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self._pending: deque[tuple[bool, Any]] = deque()
+        self._resolved: deque[_AlarmStream] = deque()
+        self._resolver = ThreadPoolExecutor(
+            RESOLVER_WORKERS, thread_name_prefix=f"{name}-resolver"
+        )
+        self._running = False
+        self._thread: threading.Thread | None = None
+        self._next_check = 0.0
+
+    def start(self) -> None:
+        """Start selector loop thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask selector loop to stop."""
+        self._running = False
+        if self._thread is None:
+            self._close()
+        else:
+            self._wake()
+
+    def join(self, timeout: float) -> bool:
+        """Wait for selector loop to stop. Return False on timeout."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def add(self, stream: _AlarmStream) -> None:
+        """Add alarms stream to loop."""
+        self._pending.append((True, stream))
+        self._wake()
+
+    def remove(self, device: BewardGeneric) -> None:
+        """Remove alarms stream of device from loop."""
+        self._pending.append((False, device))
+        self._wake()
+
+    def _wake(self) -> None:
+        """Wake up selector loop."""
+        with contextlib.suppress(OSError):
+            self._wake_w.send(b"\0")
+
+    def _run(self) -> None:
+        """Service alarms streams until stopped."""
+        try:
+            while self._running:
+                self._process_pending()
+                self._process_resolved()
+
+                timeout = max(0.0, self._next_check - monotonic())
+                for key, mask in self._selector.select(timeout):
+                    stream = key.data
+                    if stream is None:
+                        self._drain_wake()
+                    elif mask & selectors.EVENT_WRITE:
+                        self._on_writable(stream)
+                    else:
+                        self._on_readable(stream)
+
+                now = monotonic()
+                if now >= self._next_check:
+                    self._next_check = now + CHECK_INTERVAL
+                    self._check_timers(now)
+
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        """Close all connections and release loop resources."""
+        self._process_pending()
+        for stream in self.streams.values():
+            self._disconnect(stream, None, reconnect=False)
+        self._resolver.shutdown(wait=False, cancel_futures=True)
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _drain_wake(self) -> None:
+        """Read all wake up signals."""
+        with contextlib.suppress(BlockingIOError):
+            while self._wake_r.recv(4096):
+                pass
+
+    def _process_pending(self) -> None:
+        """Apply pending additions and removals of streams."""
+        while self._pending:
+            add, item = self._pending.popleft()
+            if add:
+                self.streams[item.device] = item
+            elif item in self.streams:
+                self._disconnect(self.streams.pop(item), None, reconnect=False)
+
+    def _process_resolved(self) -> None:
+        """Connect streams which device addresses are resolved."""
+        while self._resolved:
+            stream = self._resolved.popleft()
+            future, stream.resolving = stream.resolving, None
+            if self.streams.get(stream.device) is not stream:
+                # Stream was removed while resolving
+                continue
+
+            try:
+                stream.addresses = future.result()
+            except OSError as exc:
+                self._disconnect(stream, exc)
+                continue
+            self._connect(stream, monotonic())
+
+    def _resolve(self, stream: _AlarmStream) -> None:
+        """Start resolving of device address outside of selector loop."""
+
+        def _done(_future: Future) -> None:
+            self._resolved.append(stream)
+            self._wake()
+
+        device = stream.device
+        stream.target = (device.host, device.port)
+        stream.resolving = self._resolver.submit(
+            socket.getaddrinfo, device.host, device.port, type=socket.SOCK_STREAM
+        )
+        stream.resolving.add_done_callback(_done)
+
+    def _check_timers(self, now: float) -> None:
+        """Connect streams, check connection deadlines and idle streams."""
+        for stream in list(self.streams.values()):
+            if stream.sock is None:
+                if stream.resolving is None and stream.next_connect <= now:
+                    self._resolve(stream)
+
+            elif stream.outdated:
+                # Request stream again for new alarm types or device address
+                self._disconnect(stream, None, reconnect=False)
+                self._resolve(stream)
+
+            elif not stream.headers_done:
+                if now > stream.deadline:
+                    self._disconnect(stream, TimeoutError("Connection timed out"))
+
+            elif now - stream.last_rx > stream.device.idle_timeout:
+                self._disconnect(stream, TimeoutError("Alarms stream is idle"))
+
+    def _connect(self, stream: _AlarmStream, now: float) -> None:
+        """Start non-blocking connection to the next resolved device address."""
+        family, kind, proto, _, address = stream.addresses.pop(0)
+        try:
+            sock = socket.socket(family, kind, proto)
+        except OSError as exc:
+            self._disconnect(stream, exc)
+            return
+        sock.setblocking(False)  # noqa: FBT003
+        try:
+            err = sock.connect_ex(address)
+        except OSError as exc:
+            sock.close()
+            self._disconnect(stream, exc)
+            return
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            self._disconnect(stream, OSError(err, os.strerror(err)))
+            return
+
+        stream.sock = sock
+        stream.outbuf = stream.build_request()
+        stream.deadline = now + TIMEOUT
+        self._selector.register(sock, selectors.EVENT_WRITE, stream)
+
+    def _on_writable(self, stream: _AlarmStream) -> None:
+        """Send request to device."""
+        sock = stream.sock
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            self._disconnect(stream, OSError(err, os.strerror(err)))
+            return
+
+        try:
+            sent = sock.send(stream.outbuf)
+        except BlockingIOError:  # pragma: no cover
+            return
+        except OSError as exc:  # pragma: no cover
+            self._disconnect(stream, exc)
+            return
+
+        stream.outbuf = stream.outbuf[sent:]
+        if not stream.outbuf:
+            self._selector.modify(sock, selectors.EVENT_READ, stream)
+
+    def _on_readable(self, stream: _AlarmStream) -> None:
+        """Receive and process data from device."""
+        try:
+            data = stream.sock.recv(65536)
+        except BlockingIOError:  # pragma: no cover
+            return
+        except OSError as exc:
+            self._disconnect(stream, exc)
+            return
+
+        if not data:
+            self._disconnect(stream, None)
+            return
+
+        stream.last_rx = monotonic()
+        if not stream.headers_done:
+            stream.raw += data
+            data = self._parse_headers(stream)
+            if data is None:
+                return
+
+        if stream.chunked:
+            stream.raw += data
+            try:
+                more = stream.decode_chunks()
+            except ValueError as exc:
+                self._disconnect(stream, exc)
+                return
+        else:
+            stream.body += data
+            more = True
+
+        self._process_lines(stream)
+        if not more:
+            self._disconnect(stream, None)
+
+    def _parse_headers(self, stream: _AlarmStream) -> bytes | None:
+        """Parse response headers. Return body data received with them."""
+        idx = stream.raw.find(b"\r\n\r\n")
+        if idx < 0:
+            if len(stream.raw) > MAX_HEADERS_SIZE:
+                self._disconnect(stream, ValueError("Response headers too long"))
+            return None
+
+        lines = bytes(stream.raw[:idx]).decode("latin1").split("\r\n")
+        data = bytes(stream.raw[idx + 4 :])
+        stream.raw.clear()
+
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            self._disconnect(stream, ValueError(f"Bad status line: {lines[0]}"))
+            return None
+        if status != HTTPStatus.OK:
+            self._disconnect(
+                stream,
+                requests.HTTPError(f"Unexpected response status {status}"),
+            )
+            return None
+
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if (
+                name.strip().lower() == "transfer-encoding"
+                and "chunked" in value.lower()
+            ):
+                stream.chunked = True
+
+        stream.headers_done = True
+        stream.addresses = []
+        stream.online = True
+        self._call(
+            stream,
+            stream.device._handle_alarm,  # noqa: SLF001
+            datetime.now(local_tz),
+            ALARM_ONLINE,
+            True,  # noqa: FBT003
+        )
+        return data
+
+    def _call(
+        self, stream: _AlarmStream, func: Callable[..., None], *args: Any
+    ) -> None:
+        """
+        Queue alarm handling call of stream.
+
+        Handlers can block, e.g. camera takes image on motion, so they are
+        called by workers to not stall other streams of loop.
+        """
+        with stream.calls_lock:
+            stream.calls.append((func, args))
+            if stream.delivering:
+                return
+            stream.delivering = True
+
+        try:
+            future = self._workers.submit(self._deliver, stream)
+        except RuntimeError:
+            # Workers are shut down
+            with stream.calls_lock:
+                stream.calls.clear()
+                stream.delivering = False
+            return
+        with self._deliveries_lock:
+            self._deliveries.add(future)
+        future.add_done_callback(self._delivered)
+
+    @property
+    def deliveries(self) -> set[Future]:
+        """Return running deliveries of alarm handling calls."""
+        with self._deliveries_lock:
+            return set(self._deliveries)
+
+    def _delivered(self, future: Future) -> None:
+        """Forget finished delivery."""
+        with self._deliveries_lock:
+            self._deliveries.discard(future)
+
+    @staticmethod
+    def _deliver(stream: _AlarmStream) -> None:
+        """Make all queued alarm handling calls of stream in order."""
+        while True:
+            with stream.calls_lock:
+                if not stream.calls:
+                    stream.delivering = False
+                    return
+                func, args = stream.calls.popleft()
+
+            try:
+                func(*args)
+            except Exception:  # noqa: BLE001
+                stream.device._log.exception(  # noqa: SLF001
+                    "Error handling alarm: %s", args[-1]
+                )
+
+    def _process_lines(self, stream: _AlarmStream) -> None:
+        """Handle all complete lines of alarms stream."""
+        body = stream.body
+        while (idx := body.find(b"\n")) >= 0:
+            line = bytes(body[:idx]).rstrip(b"\r").decode("utf-8", "replace")
+            del body[: idx + 1]
+            if not line:
+                continue
+
+            # Reset backoff only when stream really delivers data
+            stream.attempt = 0
+            self._call(stream, stream.device._process_alarm_line, line)  # noqa: SLF001
+
+    def _disconnect(
+        self,
+        stream: _AlarmStream,
+        error: Exception | None,
+        *,
+        reconnect: bool = True,
+    ) -> None:
+        """Close stream connection and schedule reconnection."""
+        device = stream.device
+        if stream.sock is not None:
+            self._selector.unregister(stream.sock)
+            stream.sock.close()
+            stream.sock = None
+
+        if error is not None:
+            device._log.debug("Alarms stream failed: %s", error)  # noqa: SLF001
+            device.last_error = error
+
+        if stream.online:
+            self._call(
+                stream,
+                device._handle_alarm,  # noqa: SLF001
+                datetime.now(local_tz),
+                ALARM_ONLINE,
+                False,  # noqa: FBT003
+            )
+        stream.reset()
+
+        if reconnect and stream.addresses:
+            # Try the next address of device at once
+            self._connect(stream, monotonic())
+        elif reconnect:
+            delay = backoff_delay(
+                stream.attempt, device.reconnect_delay, device.reconnect_max_delay
+            )
+            stream.attempt += 1
+            stream.next_connect = monotonic() + delay
+            device._record_reconnect()  # noqa: SLF001
+
+
+class AlarmHub:
+    """
+    Alarms multiplexer for many Beward devices.
+
+    Services alarms streams of all added devices from a small fixed number of
+    threads using selectors, instead of one listener thread per device. Alarms
+    are handled by the same code path as in BewardGeneric.listen_alarms(), by
+    a pool of `workers` threads, in order for every device. Stopped hub can't
+    be started again.
+    """
+
+    def __init__(self, threads: int = 1, workers: int = HANDLER_WORKERS) -> None:
+        """Initialize alarms multiplexer."""
+        if threads < 1 or workers < 1:
+            msg = "Number of threads must be positive"
+            raise ValueError(msg)
+
+        self._workers = ThreadPoolExecutor(
+            workers, thread_name_prefix="beward-hub-worker"
+        )
+        self._loops = [
+            _HubLoop(f"beward-hub-{idx}", self._workers) for idx in range(threads)
+        ]
+        self._assignment: dict[BewardGeneric, _HubLoop] = {}
+        self._load = dict.fromkeys(self._loops, 0)
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopped = False
+
+    def __enter__(self) -> AlarmHub:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop multiplexer."""
+        self.stop()
+
+    @property
+    def devices(self) -> list[BewardGeneric]:
+        """Return list of serviced devices."""
+        return list(self._assignment)
+
+    def add_device(
+        self,
+        device: BewardGeneric,
+        channel: int | Iterable[int] = 0,
+        alarms: Any = None,
+    ) -> AlarmHub:
+        """Start servicing alarms stream of device."""
+        if alarms is None:
+            alarms = {}
+
+        stream = _AlarmStream(device, channel, alarms)
+        with self._lock:
+            if device in self._assignment:
+                prev = self._assignment.pop(device)
+                self._load[prev] -= 1
+                prev.remove(device)
+
+            loop = min(self._loops, key=self._load.__getitem__)
+            self._assignment[device] = loop
+            self._load[loop] += 1
+        loop.add(stream)
+        return self
+
+    def remove_device(self, device: BewardGeneric) -> AlarmHub:
+        """Stop servicing alarms stream of device."""
+        with self._lock:
+            loop = self._assignment.pop(device, None)
+            if loop is not None:
+                self._load[loop] -= 1
+        if loop is not None:
+            loop.remove(device)
+        return self
+
+    def start(self) -> AlarmHub:
+        """Start multiplexer threads."""
+        if self._stopped:
+            msg = "Stopped alarms multiplexer can't be started again"
+            raise RuntimeError(msg)
+        if not self._started:
+            self._started = True
+            for loop in self._loops:
+                loop.start()
+        return self
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> bool:
+        """
+        Stop multiplexer threads and close all connections.
+
+        Returns False if some threads are still alive or alarms are still
+        handled after timeout.
+        """
+        self._stopped = True
+        for loop in self._loops:
+            loop.stop()
+
+        deadline = monotonic() + timeout
+        res = True
+        for loop in self._loops:
+            res &= loop.join(max(0, deadline - monotonic()))
+
+        deliveries = set().union(*(x.deliveries for x in self._loops))
+        _, pending = wait(deliveries, max(0, deadline - monotonic()))
+        self._workers.shutdown(wait=False)
+        return res and not pending
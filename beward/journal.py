@@ -0,0 +1,443 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Append-only journal of alarm events."""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import struct
+import threading
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from .core import local_tz
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+# Event record: UTC timestamp, device ID, alarm ID, state
+RECORD = struct.Struct("<dHH?3x")
+
+# Index of every day has header with number of indexed records and section per
+# device. Section has first and last record numbers for every minute of day.
+INDEX_MAGIC = b"BWJ1"
+INDEX_HEADER = struct.Struct("<4sI")
+SECTION_HEADER = struct.Struct("<H6x")
+BUCKET = struct.Struct("<II")
+BUCKETS = 24 * 60
+SECTION_SIZE = SECTION_HEADER.size + BUCKETS * BUCKET.size
+EMPTY = 0xFFFFFFFF
+
+LOG_SUFFIX = ".events"
+INDEX_SUFFIX = ".index"
+CATALOG_FILE = "catalog"
+CATALOG_DEVICE = "d"
+CATALOG_ALARM = "a"
+
+# Number of days kept open for writing
+OPEN_DAYS = 2
+
+
+class JournalEvent(NamedTuple):
+    """Journaled alarm event."""
+
+    timestamp: datetime
+    device: str
+    alarm: str
+    state: bool
+
+
+def device_key(device: BewardGeneric | str) -> str:
+    """Return name of device in journal."""
+    if isinstance(device, str):
+        return device
+    return f"{device.host}:{device.port}"
+
+
+def _split_timestamp(timestamp: float) -> tuple[date, int]:
+    """Return UTC day and minute of day of timestamp."""
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)  # noqa: UP017
+    return moment.date(), moment.hour * 60 + moment.minute
+
+
+class _DayIndex:
+    """Memory-mapped index of one day of journal."""
+
+    def __init__(self, path: Path, *, writable: bool = False) -> None:
+        """Open index, creating it if necessary."""
+        if writable and not path.exists():
+            path.write_bytes(INDEX_HEADER.pack(INDEX_MAGIC, 0))
+
+        self._file: BinaryIO = path.open("r+b" if writable else "rb")
+        self._writable = writable
+        self._map = self._open_map()
+        if INDEX_HEADER.unpack_from(self._map)[0] != INDEX_MAGIC:
+            self.close()
+            msg = f"Invalid journal index {path}"
+            raise ValueError(msg)
+
+        self.sections: dict[int, int] = {}
+        for offset in range(INDEX_HEADER.size, len(self._map), SECTION_SIZE):
+            (device,) = SECTION_HEADER.unpack_from(self._map, offset)
+            self.sections[device] = offset
+
+    def _open_map(self) -> mmap.mmap:
+        """Map index file to memory."""
+        access = mmap.ACCESS_WRITE if self._writable else mmap.ACCESS_READ
+        return mmap.mmap(self._file.fileno(), 0, access=access)
+
+    @property
+    def count(self) -> int:
+        """Return number of indexed records."""
+        return INDEX_HEADER.unpack_from(self._map)[1]
+
+    def close(self) -> None:
+        """Close index."""
+        self._map.close()
+        self._file.close()
+
+    def reset(self) -> None:
+        """Remove all entries from index."""
+        self._map.close()
+        self._file.truncate(INDEX_HEADER.size)
+        self._map = self._open_map()
+        INDEX_HEADER.pack_into(self._map, 0, INDEX_MAGIC, 0)
+        self.sections.clear()
+
+    def _add_section(self, device: int) -> int:
+        """Append empty section of device and return its offset."""
+        offset = len(self._map)
+        self._map.close()
+        self._file.seek(offset)
+        self._file.write(SECTION_HEADER.pack(device) + BUCKET.pack(EMPTY, 0) * BUCKETS)
+        self._file.flush()
+        self._map = self._open_map()
+        self.sections[device] = offset
+        return offset
+
+    def add(self, number: int, device: int, minute: int) -> None:
+        """Add record to index."""
+        offset = self.sections.get(device)
+        if offset is None:
+            offset = self._add_section(device)
+        pos = offset + SECTION_HEADER.size + minute * BUCKET.size
+        first, _ = BUCKET.unpack_from(self._map, pos)
+        BUCKET.pack_into(self._map, pos, number if first == EMPTY else first, number)
+        INDEX_HEADER.pack_into(self._map, 0, INDEX_MAGIC, number + 1)
+
+    def spans(
+        self, devices: Iterable[int] | None, first_minute: int, last_minute: int
+    ) -> list[tuple[int, int]]:
+        """
+        Return ranges of record numbers of devices within minutes of day.
+
+        Ranges of minute buckets are merged when they overlap or adjoin, so
+        records of other devices between them are not read.
+        """
+        ranges = []
+        offsets = (
+            self.sections.values()
+            if devices is None
+            else [self.sections[x] for x in devices if x in self.sections]
+        )
+        for offset in offsets:
+            pos = offset + SECTION_HEADER.size
+            for first, last in BUCKET.iter_unpack(
+                self._map[
+                    pos + first_minute * BUCKET.size : pos
+                    + (last_minute + 1) * BUCKET.size
+                ]
+            ):
+                if first != EMPTY:
+                    ranges.append((first, min(last + 1, self.count)))
+
+        merged: list[tuple[int, int]] = []
+        for start, stop in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            elif start < stop:
+                merged.append((start, stop))
+        return merged
+
+
+class _DayWriter:
+    """Appender of records to journal of one day."""
+
+    def __init__(self, log_path: Path, index_path: Path) -> None:
+        """Open journal of day for appending."""
+        self._log = log_path.open("ab")
+        size = self._log.tell()
+        self.count = size // RECORD.size
+        if size % RECORD.size:
+            # Drop record torn by crash
+            self._log.truncate(self.count * RECORD.size)
+
+        try:
+            self.index = _DayIndex(index_path, writable=True)
+        except ValueError:
+            index_path.unlink()
+            self.index = _DayIndex(index_path, writable=True)
+        if self.index.count != self.count:
+            _LOGGER.debug("Rebuild journal index %s", index_path)
+            self.index.reset()
+            data = log_path.read_bytes()[: self.count * RECORD.size]
+            for number, (timestamp, device, _, _) in enumerate(
+                RECORD.iter_unpack(data)
+            ):
+                self.index.add(number, device, _split_timestamp(timestamp)[1])
+
+    def append(self, record: bytes, device: int, minute: int) -> None:
+        """Append record to journal."""
+        self._log.write(record)
+        self._log.flush()
+        self.index.add(self.count, device, minute)
+        self.count += 1
+
+    def close(self) -> None:
+        """Close journal of day."""
+        self._log.close()
+        self.index.close()
+
+
+class EventJournal:
+    """
+    Append-only journal of alarm events.
+
+    Events are kept in binary logs per day with fixed-size records, and
+    memory-mapped index of every day points to records of each device within
+    each minute. So range queries read only needed parts of logs.
+
+    Journal is alarms handler, so it is attached to devices by
+    `device.add_alarms_handler(journal)`. Devices are named by "host:port".
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open journal in directory, creating it if necessary."""
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.events = 0
+
+        self._names: dict[str, list[str]] = {CATALOG_DEVICE: [], CATALOG_ALARM: []}
+        self._ids: dict[str, dict[str, int]] = {CATALOG_DEVICE: {}, CATALOG_ALARM: {}}
+        catalog = self.path / CATALOG_FILE
+        if catalog.exists():
+            for line in catalog.read_text("utf-8").splitlines():
+                kind, _, name = line.partition("\t")
+                if kind in self._names:
+                    self._ids[kind][name] = len(self._names[kind])
+                    self._names[kind].append(name)
+        self._catalog = catalog.open("a", encoding="utf-8")
+
+        self._days: dict[date, _DayWriter] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> EventJournal:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and close journal."""
+        self.close()
+
+    def __call__(
+        self,
+        device: BewardGeneric,
+        timestamp: datetime,
+        alarm: str,
+        state: bool,  # noqa: FBT001
+    ) -> None:
+        """Append alarm event of device to journal."""
+        self.append(timestamp, device_key(device), alarm, state=state)
+
+    def _name_id(self, kind: str, name: str) -> int:
+        """Return ID of name, adding it to catalog if necessary."""
+        name_id = self._ids[kind].get(name)
+        if name_id is None:
+            name_id = self._ids[kind][name] = len(self._names[kind])
+            self._names[kind].append(name)
+            self._catalog.write(f"{kind}\t{name}\n")
+            self._catalog.flush()
+        return name_id
+
+    def _file_path(self, day: date, suffix: str) -> Path:
+        """Return path of journal file of day."""
+        return self.path / (day.isoformat() + suffix)
+
+    def _day_writer(self, day: date) -> _DayWriter:
+        """Return writer of day, closing the oldest ones."""
+        writer = self._days.get(day)
+        if writer is None:
+            if len(self._days) >= OPEN_DAYS:
+                self._days.pop(min(self._days)).close()
+            writer = self._days[day] = _DayWriter(
+                self._file_path(day, LOG_SUFFIX), self._file_path(day, INDEX_SUFFIX)
+            )
+        return writer
+
+    def append(
+        self, timestamp: datetime, device: str, alarm: str, *, state: bool
+    ) -> None:
+        """Append alarm event to journal."""
+        moment = timestamp.timestamp()
+        day, minute = _split_timestamp(moment)
+        with self._lock:
+            device_id = self._name_id(CATALOG_DEVICE, device)
+            record = RECORD.pack(
+                moment, device_id, self._name_id(CATALOG_ALARM, alarm), state
+            )
+            self._day_writer(day).append(record, device_id, minute)
+            self.events += 1
+
+    def days(self) -> list[date]:
+        """Return days which have journaled events."""
+        return sorted(
+            date.fromisoformat(x.stem) for x in self.path.glob("*" + LOG_SUFFIX)
+        )
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        *,
+        devices: Iterable[BewardGeneric | str] | None = None,
+        alarms: Iterable[str] | None = None,
+    ) -> Iterator[JournalEvent]:
+        """
+        Return events since start and before end in order they were journaled.
+
+        Events can be filtered by devices and alarm types.
+        """
+        device_ids = alarm_ids = None
+        if devices is not None:
+            names = self._ids[CATALOG_DEVICE]
+            device_ids = {names[x] for x in map(device_key, devices) if x in names}
+        if alarms is not None:
+            names = self._ids[CATALOG_ALARM]
+            alarm_ids = {names[x] for x in alarms if x in names}
+
+        days = self.days()
+        if not days:
+            return
+        start_ts = start.timestamp() if start is not None else -float("inf")
+        end_ts = end.timestamp() if end is not None else float("inf")
+        first_day, first_minute = (
+            _split_timestamp(start_ts) if start is not None else (days[0], 0)
+        )
+        last_day, last_minute = (
+            _split_timestamp(end_ts) if end is not None else (days[-1], BUCKETS - 1)
+        )
+
+        for day in days:
+            if first_day <= day <= last_day:
+                yield from self._query_day(
+                    day,
+                    (
+                        first_minute if day == first_day else 0,
+                        last_minute if day == last_day else BUCKETS - 1,
+                    ),
+                    (start_ts, end_ts),
+                    device_ids,
+                    alarm_ids,
+                )
+
+    def _query_day(
+        self,
+        day: date,
+        minutes: tuple[int, int],
+        period: tuple[float, float],
+        device_ids: set[int] | None,
+        alarm_ids: set[int] | None,
+    ) -> Iterator[JournalEvent]:
+        """Return events of one day."""
+        log_path = self._file_path(day, LOG_SUFFIX)
+        with self._lock:
+            try:
+                index = _DayIndex(self._file_path(day, INDEX_SUFFIX))
+            except (OSError, ValueError):
+                spans = [(0, log_path.stat().st_size // RECORD.size)]
+            else:
+                spans = index.spans(device_ids, *minutes)
+                index.close()
+        if not spans:
+            return
+
+        with log_path.open("rb") as file:
+            for start, stop in spans:
+                file.seek(start * RECORD.size)
+                data = file.read((stop - start) * RECORD.size)
+                yield from self._decode(
+                    data[: len(data) - len(data) % RECORD.size],
+                    period,
+                    device_ids,
+                    alarm_ids,
+                )
+
+    def _decode(
+        self,
+        data: bytes,
+        period: tuple[float, float],
+        device_ids: set[int] | None,
+        alarm_ids: set[int] | None,
+    ) -> Iterator[JournalEvent]:
+        """Return matching events of journal records."""
+        device_names = self._names[CATALOG_DEVICE]
+        alarm_names = self._names[CATALOG_ALARM]
+        for timestamp, device, alarm, state in RECORD.iter_unpack(data):
+            if not period[0] <= timestamp < period[1]:
+                continue
+            if device_ids is not None and device not in device_ids:
+                continue
+            if alarm_ids is not None and alarm not in alarm_ids:
+                continue
+            yield JournalEvent(
+                datetime.fromtimestamp(timestamp, local_tz),
+                device_names[device],
+                alarm_names[alarm],
+                state,
+            )
+
+    def replay(
+        self,
+        device: BewardGeneric,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        *,
+        alarms: Iterable[str] | None = None,
+    ) -> int:
+        """
+        Replay journaled events of device into its alarms handlers.
+
+        Events go through device dispatcher, but do not change current state
+        of device alarms. Journal itself is skipped, so replayed events are not
+        journaled twice. Return number of replayed events.
+        """
+        count = 0
+        for event in self.query(start, end, devices=[device], alarms=alarms):
+            handlers = tuple(
+                x
+                for x in device._dispatch_table.get(  # noqa: SLF001
+                    event.alarm,
+                    device._wildcard_handlers,  # noqa: SLF001
+                )
+                if x is not self
+            )
+            device.alarm_dispatcher.dispatch(
+                device, handlers, event.timestamp, event.alarm, event.state
+            )
+            count += 1
+        return count
+
+    def close(self) -> None:
+        """Close journal files."""
+        with self._lock:
+            for writer in self._days.values():
+                writer.close()
+            self._days.clear()
+            self._catalog.close()
@@ -0,0 +1,163 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Logging helpers of Beward client."""
+
+from __future__ import annotations
+
+import functools
+import logging
+import urllib.parse
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, MutableMapping
+
+
+def split_auth_from_netloc(
+    netloc: str,
+) -> tuple[str, tuple[str | None, str | None]]:
+    """
+    Parse out and remove the auth information from a netloc.
+
+    Returns: (netloc, (username, password)).
+    """
+    if "@" not in netloc:
+        return netloc, (None, None)
+
+    # Split from the right because that's how urllib.parse.urlsplit()
+    # behaves if more than one @ is present (which can be checked using
+    # the password attribute of urlsplit()'s return value).
+    auth, netloc = netloc.rsplit("@", 1)
+    pw = None
+    if ":" in auth:
+        # Split from the left because that's how urllib.parse.urlsplit()
+        # behaves if more than one : is present (which again can be checked
+        # using the password attribute of the return value)
+        user, pw = auth.split(":", 1)
+    else:
+        user, pw = auth, None
+
+    user = urllib.parse.unquote(user)
+    if pw is not None:
+        pw = urllib.parse.unquote(pw)
+
+    return netloc, (user, pw)
+
+
+def redact_auth_from_url(netloc: str) -> str:
+    """
+    Replace the sensitive data in a netloc with "****", if it exists.
+
+    For example:
+        - "user:pass@example.com" returns "user:****@example.com"
+        - "accesstoken@example.com" returns "****@example.com"
+    """
+    netloc, (user, password) = split_auth_from_netloc(netloc)
+    if user is None:
+        return netloc
+    if password is None:
+        user = "****"
+        password = ""
+    else:
+        user = urllib.parse.quote(user)
+        password = ":****"  # noqa: S105
+    return f"{user}{password}@{netloc}"
+
+
+@functools.lru_cache(maxsize=1024)
+def redact_url(url: str) -> str:
+    """
+    Replace the sensitive data in URL with "****", if it exists.
+
+    Results are cached, so every device URL is redacted only once.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if "@" not in parts.netloc:
+        return url
+    return urllib.parse.urlunsplit(
+        parts._replace(netloc=redact_auth_from_url(parts.netloc))
+    )
+
+
+# Devices, "host:port", which debug is enabled for regardless of logger level
+_DEBUG_DEVICES: set[str] = set()
+
+
+def set_device_debug(device: str, *, enabled: bool = True) -> None:
+    """
+    Enable or disable debug logging of one device, "host:port".
+
+    Level of shared logger is not changed, so other devices do not even build
+    their debug records.
+    """
+    if enabled:
+        _DEBUG_DEVICES.add(device)
+    else:
+        _DEBUG_DEVICES.discard(device)
+
+
+class DeviceLoggerAdapter(logging.LoggerAdapter):
+    """
+    Logger of one Beward device.
+
+    Adds `device` field to every emitted record, merged with fields passed as
+    `extra` argument. Fields are built only if the record is actually emitted.
+    Debug records of devices enabled by set_device_debug() are emitted even if
+    level of logger is higher.
+    """
+
+    def isEnabledFor(self, level: int) -> bool:  # noqa: N802
+        """Return whether records of level are emitted for device."""
+        if level >= logging.DEBUG and self.extra["device"] in _DEBUG_DEVICES:
+            return not self.logger.disabled
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        """Log record if it is enabled for device."""
+        if self.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            # Level of logger is already checked for device
+            self.logger._log(level, msg, args, **kwargs)  # noqa: SLF001
+
+    def process(
+        self, msg: Any, kwargs: MutableMapping[str, Any]
+    ) -> tuple[Any, MutableMapping[str, Any]]:
+        """Add device fields to log record."""
+        extra = kwargs.get("extra")
+        kwargs["extra"] = {**self.extra, **extra} if extra else self.extra
+        return msg, kwargs
+
+
+class DeviceFilter(logging.Filter):
+    """
+    Filter of records of Beward devices for handlers.
+
+    Records of listed devices pass at any level, records of other devices and
+    records without `device` field pass from `level` only, e.g. to route debug
+    of some devices to separate handler.
+    """
+
+    def __init__(self, devices: Iterable[str], level: int = logging.INFO) -> None:
+        """Initialize filter."""
+        super().__init__()
+        self.devices = frozenset(devices)
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether record should be logged."""
+        return (
+            record.levelno >= self.level
+            or getattr(record, "device", None) in self.devices
+        )
+
+
+def device_logger(name: str, host: str, port: int) -> DeviceLoggerAdapter:
+    """
+    Return logger of Beward device.
+
+    All devices share logger `name`, and records are told apart by `device`
+    field, "host:port". Use set_device_debug() to enable debug for some devices
+    only.
+    """
+    return DeviceLoggerAdapter(logging.getLogger(name), {"device": f"{host}:{port}"})
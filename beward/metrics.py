@@ -0,0 +1,204 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Built-in metrics of Beward client."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+from collections.abc import Callable, Mapping, Sequence
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+METRIC_REQUESTS = "beward_requests_total"
+METRIC_REQUEST_DURATION = "beward_request_duration_seconds"
+METRIC_ALARM_EVENTS = "beward_alarm_events_total"
+METRIC_RECONNECTS = "beward_alarm_reconnects_total"
+METRIC_IMAGE_SIZE = "beward_image_size_bytes"
+METRIC_DISCOVERY_DURATION = "beward_discovery_duration_seconds"
+METRIC_DISCOVERY_DEVICES = "beward_discovery_devices_total"
+
+METRICS_HELP = {
+    METRIC_REQUESTS: "Number of HTTP requests to devices by response status.",
+    METRIC_REQUEST_DURATION: "Duration of HTTP requests to devices.",
+    METRIC_ALARM_EVENTS: "Number of alarm events received from devices.",
+    METRIC_RECONNECTS: "Number of alarm stream reconnections.",
+    METRIC_IMAGE_SIZE: "Size of images received from cameras.",
+    METRIC_DISCOVERY_DURATION: "Duration of discovery of devices.",
+    METRIC_DISCOVERY_DEVICES: "Number of devices found by discovery.",
+}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRICS_BUCKETS = {
+    METRIC_IMAGE_SIZE: SIZE_BUCKETS,
+}
+
+LabelsKey = tuple[tuple[str, str], ...]
+MetricsExporter = Callable[[str, str, Mapping[str, str], float], None]
+
+
+class _Histogram:
+    """Cumulative histogram of observed values."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        """Initialize histogram."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add value to histogram."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Return cumulative counts of values per upper bound."""
+        res = []
+        total = 0
+        for bound, count in zip((*self.bounds, math.inf), self.counts, strict=True):
+            total += count
+            res.append((bound, total))
+        return res
+
+
+def _format_value(value: float) -> str:
+    """Format value in Prometheus text format."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: LabelsKey) -> str:
+    """Format labels in Prometheus text format."""
+    if not labels:
+        return ""
+    items = ",".join(
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels
+    )
+    return "{" + items + "}"
+
+
+class MetricsRegistry:
+    """
+    Registry of counters and histograms of Beward client.
+
+    Pass it to devices as `metrics` argument to collect requests, alarms and
+    images statistics. Collected values can be rendered in Prometheus text
+    format or pushed to exporter callbacks on every update. Devices without
+    registry skip all instrumentation.
+    """
+
+    def __init__(self, buckets: Mapping[str, Sequence[float]] | None = None) -> None:
+        """Initialize metrics registry."""
+        self.buckets = {**METRICS_BUCKETS, **(buckets or {})}
+
+        self._counters: dict[str, dict[LabelsKey, float]] = {}
+        self._histograms: dict[str, dict[LabelsKey, _Histogram]] = {}
+        self._exporters: list[MetricsExporter] = []
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter: MetricsExporter) -> MetricsRegistry:
+        """
+        Add exporter callback.
+
+        Exporter is called with metric kind ("counter" or "histogram"), name,
+        labels and value on every update.
+        """
+        self._exporters.append(exporter)
+        return self
+
+    def remove_exporter(self, exporter: MetricsExporter) -> MetricsRegistry:
+        """Remove exporter callback."""
+        if exporter in self._exporters:
+            self._exporters.remove(exporter)
+        return self
+
+    def _export(
+        self, kind: str, name: str, labels: dict[str, str], value: float
+    ) -> None:
+        """Push update to exporters."""
+        for exporter in self._exporters:
+            try:
+                exporter(kind, name, labels, value)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Metrics exporter failed")
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment counter."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        if self._exporters:
+            self._export("counter", name, dict(key), value)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Add value to histogram."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(
+                    self.buckets.get(name, DURATION_BUCKETS)
+                )
+            hist.observe(value)
+        if self._exporters:
+            self._export("histogram", name, dict(key), value)
+
+    def get(self, name: str, **labels: Any) -> float:
+        """Return current value of counter or number of histogram observations."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            if name in self._histograms:
+                hist = self._histograms[name].get(key)
+                return hist.count if hist is not None else 0
+            return self._counters.get(name, {}).get(key, 0)
+
+    def reset(self) -> None:
+        """Forget all collected values."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Render all collected values in Prometheus text format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in METRICS_HELP:
+                    lines.append(f"# HELP {name} {METRICS_HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(
+                    f"{name}{_format_labels(key)} {_format_value(value)}"
+                    for key, value in sorted(self._counters[name].items())
+                )
+
+            for name in sorted(self._histograms):
+                if name in METRICS_HELP:
+                    lines.append(f"# HELP {name} {METRICS_HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    for bound, count in hist.buckets():
+                        labels = _format_labels((*key, ("le", _format_value(bound))))
+                        lines.append(f"{name}_bucket{labels} {count}")
+                    labels = _format_labels(key)
+                    lines.append(f"{name}_sum{labels} {_format_value(hist.sum)}")
+                    lines.append(f"{name}_count{labels} {hist.count}")
+
+        return "\n".join(lines) + "\n" if lines else ""
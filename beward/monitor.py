@@ -0,0 +1,171 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Continuous discovery of Beward devices."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+
+from . import Beward, BewardDevice
+from .const import (
+    DISCOVERY_ADDED,
+    DISCOVERY_CHANGED,
+    DISCOVERY_INTERVAL,
+    DISCOVERY_MISSES,
+    DISCOVERY_REMOVED,
+)
+from .util import normalize_mac
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DiscoveryEvent(NamedTuple):
+    """Change of discovered Beward devices."""
+
+    kind: str
+    device: BewardDevice
+    previous: BewardDevice | None = None
+
+
+class DiscoveryMonitor:
+    """
+    Monitor which periodically discovers Beward devices and reports changes.
+
+    Results of every probe are compared with known devices by MAC address.
+    Devices are reported as removed only after `remove_after` missed probes,
+    as discovery responses can be lost. Addresses of tracked device instances
+    are updated in place when they change.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], dict[str, BewardDevice]] | None = None,
+        interval: float = DISCOVERY_INTERVAL,
+        *,
+        remove_after: int = DISCOVERY_MISSES,
+    ) -> None:
+        """
+        Initialize discovery monitor.
+
+        Probe is a callable returning discovered devices by MAC addresses,
+        by default Beward.discovery. E.g. to monitor routed networks use:
+
+            DiscoveryMonitor(functools.partial(Beward.sweep, "10.1.0.0/16"))
+        """
+        self.probe = probe or Beward.discovery
+        self.interval = interval
+        self.remove_after = remove_after
+        self.devices: dict[str, BewardDevice] = {}
+
+        self._misses: dict[str, int] = {}
+        self._listeners: list[Callable[[DiscoveryEvent], None]] = []
+        self._tracked: dict[str, BewardGeneric] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> DiscoveryMonitor:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop monitor."""
+        self.stop()
+
+    def add_listener(self, listener: Callable[[DiscoveryEvent], None]) -> None:
+        """Add listener of discovery events."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[DiscoveryEvent], None]) -> None:
+        """Remove listener of discovery events."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def track(self, device: BewardGeneric, mac: str) -> None:
+        """
+        Update address of device instance when device with MAC moves.
+
+        MAC address can be given in any case and with any separators.
+        """
+        self._tracked[normalize_mac(mac)] = device
+
+    def untrack(self, mac: str) -> None:
+        """Stop tracking address of device instance."""
+        self._tracked.pop(normalize_mac(mac), None)
+
+    def poll(self) -> list[DiscoveryEvent]:
+        """Probe devices once and return changes since last probe."""
+        found = self.probe()
+
+        events = []
+        with self._lock:
+            for mac, dev in found.items():
+                self._misses.pop(mac, None)
+                previous = self.devices.get(mac)
+                if previous is None:
+                    events.append(DiscoveryEvent(DISCOVERY_ADDED, dev))
+                elif previous != dev:
+                    events.append(DiscoveryEvent(DISCOVERY_CHANGED, dev, previous))
+                self.devices[mac] = dev
+
+            for mac in [x for x in self.devices if x not in found]:
+                misses = self._misses.get(mac, 0) + 1
+                if misses < self.remove_after:
+                    self._misses[mac] = misses
+                    continue
+                self._misses.pop(mac, None)
+                events.append(DiscoveryEvent(DISCOVERY_REMOVED, self.devices.pop(mac)))
+
+        for event in events:
+            self._process(event)
+        return events
+
+    def _process(self, event: DiscoveryEvent) -> None:
+        """Update tracked device and notify listeners about event."""
+        _LOGGER.debug("Device %s %s", event.device.mac, event.kind)
+
+        device = self._tracked.get(normalize_mac(event.device.mac))
+        if device is not None and event.kind != DISCOVERY_REMOVED:
+            try:
+                device.update_host(event.device.host_ip, event.device.http_port)
+            except Exception:
+                _LOGGER.exception("Error updating address of %s", event.device.mac)
+
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                _LOGGER.exception("Error in discovery listener")
+
+    def _run(self) -> None:
+        """Probe devices until stopped."""
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as exc:  # noqa: BLE001
+                _LOGGER.debug("Discovery failed: %s", exc)
+            self._stop_event.wait(self.interval)
+
+    def start(self) -> DiscoveryMonitor:
+        """Start probing devices in background."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="beward-discovery-monitor", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop probing devices."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,251 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Receiver of alarms pushed by Beward devices."""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import socket
+import threading
+import urllib.parse
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+from .core import local_tz
+from .util import normalize_mac
+
+if TYPE_CHECKING:
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum size of notification body
+MAX_BODY_SIZE = 65536
+
+TOKEN_HEADER = "X-Beward-Token"  # noqa: S105
+
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    """HTTP requests handler of alarms receiver."""
+
+    server: _ReceiverServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        """Log HTTP request."""
+        _LOGGER.debug(fmt, *args)
+
+    def _reply(self, status: HTTPStatus) -> None:
+        """Send short text response."""
+        body = status.phrase.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        """Handle notification passed in query parameters."""
+        self._handle(b"")
+
+    def do_POST(self) -> None:
+        """Handle notification passed in query parameters or request body."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._reply(HTTPStatus.BAD_REQUEST)
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+        self._handle(self.rfile.read(length))
+
+    def _handle(self, body: bytes) -> None:
+        """Route notification to its device."""
+        receiver = self.server.receiver
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+
+        mac = None
+        if receiver.token is not None:
+            token = query.get("token") or self.headers.get(TOKEN_HEADER) or ""
+            if not hmac.compare_digest(token.encode(), receiver.token.encode()):
+                receiver.unauthorized += 1
+                self._reply(HTTPStatus.FORBIDDEN)
+                return
+            # MAC addresses are trusted only from authorized senders
+            mac = query.get("mac") or self.headers.get("X-Device-MAC")
+
+        device = receiver.find_device(self.client_address[0], mac)
+        if device is None:
+            receiver.unknown += 1
+            _LOGGER.debug("Notification from unknown device %s", self.client_address)
+            self._reply(HTTPStatus.NOT_FOUND)
+            return
+
+        try:
+            lines = receiver.parse_notification(query, body)
+        except ValueError as exc:
+            device._log.debug("Invalid notification: %s", exc)  # noqa: SLF001
+            self._reply(HTTPStatus.BAD_REQUEST)
+            return
+
+        # Notification is accepted once validated: failing handler is a local
+        # problem, and resending the notification would only repeat alarms
+        for line in lines:
+            try:
+                device._process_alarm_line(line)  # noqa: SLF001
+            except Exception:  # noqa: BLE001
+                device._log.exception("Error handling alarm %s", line)  # noqa: SLF001
+
+        receiver.events += len(lines)
+        self._reply(HTTPStatus.OK)
+
+
+class _ReceiverServer(ThreadingHTTPServer):
+    """HTTP server of alarms receiver."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, receiver: AlarmReceiver, address: tuple[str, int]) -> None:
+        """Initialize HTTP server."""
+        self.receiver = receiver
+        super().__init__(address, _ReceiverHandler)
+
+
+class AlarmReceiver:
+    """
+    Local HTTP endpoint which receives alarms pushed by Beward devices.
+
+    Devices configured for HTTP notifications call into receiver, so many
+    devices report through one listening socket instead of holding long-lived
+    alarms streams. Notifications are routed to devices by source address.
+
+    If `token` is given, notifications must pass it in `token` parameter or
+    `X-Beward-Token` header, otherwise they are rejected. Only then devices
+    can also be identified by `mac` parameter or `X-Device-MAC` header, e.g.
+    behind NAT.
+
+    Alarms can be passed either in query parameters:
+
+        GET /?alarm=MotionDetection&state=1&channel=0&time=2019-07-28+00:57:27
+
+    or in request body as lines of alarms stream:
+
+        2019-07-28;00:57:27;MotionDetection;1;0
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, *, token: str | None = None
+    ) -> None:
+        """Initialize alarms receiver."""
+        self.token = token
+        self._by_address: dict[str, BewardGeneric] = {}
+        self._by_mac: dict[str, BewardGeneric] = {}
+        self.events = 0
+        self.unknown = 0
+        self.unauthorized = 0
+
+        self._server = _ReceiverServer(self, (host, port))
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> AlarmReceiver:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop receiver."""
+        self.stop()
+
+    def add_device(self, device: BewardGeneric, mac: str | None = None) -> None:
+        """
+        Add device to route its notifications.
+
+        Source address of device is followed when it is changed by update_host().
+        """
+        self._index_address(device)
+        if mac:
+            self._by_mac[normalize_mac(mac)] = device
+        listeners = device._address_listeners  # noqa: SLF001
+        if self._index_address not in listeners:
+            listeners.append(self._index_address)
+
+    def _index_address(self, device: BewardGeneric) -> None:
+        """Index device by its current address."""
+        for key in [k for k, v in self._by_address.items() if v is device]:
+            del self._by_address[key]
+        try:
+            address = socket.gethostbyname(device.host)
+        except OSError:
+            address = device.host
+        self._by_address[address] = device
+
+    def remove_device(self, device: BewardGeneric) -> None:
+        """Remove device from receiver."""
+        for index in (self._by_address, self._by_mac):
+            for key in [k for k, v in index.items() if v is device]:
+                del index[key]
+        listeners = device._address_listeners  # noqa: SLF001
+        if self._index_address in listeners:
+            listeners.remove(self._index_address)
+
+    def find_device(self, address: str, mac: str | None = None) -> BewardGeneric | None:
+        """Return device by MAC address if given or by source address."""
+        if mac:
+            device = self._by_mac.get(normalize_mac(mac))
+            if device is not None:
+                return device
+        return self._by_address.get(address)
+
+    @staticmethod
+    def parse_notification(query: dict[str, str], body: bytes) -> list[str]:
+        """Return lines of alarms stream from notification."""
+        lines = [x.strip() for x in body.decode("latin1").splitlines() if x.strip()]
+
+        alarm = query.get("alarm")
+        if alarm:
+            timestamp = query.get("time") or datetime.now(local_tz).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            date, _, time = timestamp.partition(" ")
+            state = query.get("state", "1")
+            lines.append(f"{date};{time};{alarm};{state};{query.get('channel', '0')}")
+
+        # Validate all lines before any of them is handled
+        for line in lines:
+            date, time, _, _, channel = line.split(";", 5)
+            datetime.strptime(date + " " + time, "%Y-%m-%d %H:%M:%S")  # noqa: DTZ007
+            int(channel)
+        if not lines:
+            msg = "No alarms in notification"
+            raise ValueError(msg)
+        return lines
+
+    def start(self) -> AlarmReceiver:
+        """Start receiving notifications."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.1},
+            name="beward-receiver",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop receiving notifications."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
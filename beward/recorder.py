@@ -0,0 +1,141 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Recorder and replayer of raw alarms streams."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .journal import device_key
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AlarmRecorder:
+    """
+    Recorder of raw lines of alarms streams.
+
+    Every line is written with its receive time and device name, tab separated:
+
+        1722117447.123456	192.168.1.10:80	2019-07-28;00:57:27;MotionDetection;1;0
+
+    Recorder is attached to devices by `alarm_recorder` argument.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open recording file for appending."""
+        self.path = Path(path)
+        self.lines = 0
+        self._file = self.path.open("a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> AlarmRecorder:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and close recording."""
+        self.close()
+
+    def record(self, device: BewardGeneric | str, line: str) -> None:
+        """Write line received from device. Lines are ignored after closing."""
+        entry = f"{time.time():.6f}\t{device_key(device)}\t{line}\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(entry)
+            self.lines += 1
+
+    def close(self) -> None:
+        """Close recording file."""
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path: str | Path) -> Iterator[tuple[float, str, str]]:
+    """Return receive time, device name and line of every recorded line."""
+    with Path(path).open(encoding="utf-8") as file:
+        for entry in file:
+            timestamp, device, line = entry.rstrip("\n").split("\t", 2)
+            yield float(timestamp), device, line
+
+
+class AlarmReplayer:
+    """
+    Replayer of recorded alarms streams.
+
+    Lines are fed to devices through the same parsing and handling path as live
+    alarms streams. Recorded intervals between lines are kept at `speed` 1,
+    shortened at greater speeds, and skipped at speed 0.
+    """
+
+    def __init__(self, path: str | Path, speed: float = 1) -> None:
+        """Initialize replayer."""
+        if speed < 0:
+            msg = "Speed must not be negative"
+            raise ValueError(msg)
+
+        self.path = Path(path)
+        self.speed = speed
+        self.lines = 0
+        self.errors = 0
+        self.skipped = 0
+        self.duration = 0.0
+        self._stop_event = threading.Event()
+
+    @property
+    def rate(self) -> float:
+        """Return number of replayed lines per second."""
+        return self.lines / self.duration if self.duration else 0.0
+
+    def replay(self, devices: BewardGeneric | Mapping[str, BewardGeneric]) -> int:
+        """
+        Replay recording and return number of replayed lines.
+
+        Lines of all devices are fed to one device if it is given, otherwise to
+        devices mapped by names. Lines of unmapped devices are skipped.
+        """
+        self._stop_event.clear()
+        self.lines = self.errors = self.skipped = 0
+        start = time.monotonic()
+        first = None
+
+        for timestamp, name, line in read_recording(self.path):
+            device = devices.get(name) if isinstance(devices, Mapping) else devices
+            if device is None:
+                self.skipped += 1
+                continue
+
+            if first is None:
+                first = timestamp
+            if self.speed:
+                delay = start + (timestamp - first) / self.speed - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            if self._stop_event.is_set():
+                break
+
+            try:
+                device._process_alarm_line(line)  # noqa: SLF001
+            except ValueError as exc:
+                _LOGGER.debug("Invalid recorded line %r: %s", line, exc)
+                self.errors += 1
+            self.lines += 1
+
+        self.duration = time.monotonic() - start
+        return self.lines
+
+    def stop(self) -> None:
+        """Stop replaying."""
+        self._stop_event.set()
@@ -0,0 +1,202 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Registries of Beward device models and classes."""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Any
+
+from .const import BEWARD_CAMERA, BEWARD_DOORBELL, BEWARD_MODELS
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    from .core import BewardGeneric
+
+_LOGGER = logging.getLogger(__name__)
+
+REVISION_MARK = "_rev"
+WILDCARD = "*"
+
+# Entry points group of device classes provided by other packages
+ENTRY_POINTS_GROUP = "beward.devices"
+
+
+def strip_revision(model: str) -> str:
+    """Remove revision suffix from model name, e.g. "DS06M_rev2" -> "DS06M"."""
+    idx = model.find(REVISION_MARK)
+    if idx < 0 or len(model) == idx + len(REVISION_MARK):
+        return model
+    return model[:idx]
+
+
+class ModelIndex:
+    """
+    Index of device models to device types.
+
+    Model names ending with "*" match all models with that prefix. Exact names
+    take priority over prefixes, and longer prefixes over shorter ones.
+    """
+
+    def __init__(self, models: Mapping[str, str] | None = None) -> None:
+        """
+        Initialize models index.
+
+        Models can be given as mapping of device types to space separated lists
+        of models, like BEWARD_MODELS.
+        """
+        self._exact: dict[str, str] = {}
+        self._prefixes: dict[str, str] = {}
+        self._prefix_lengths: tuple[int, ...] = ()
+        self._lock = threading.Lock()
+
+        for dev_type, names in (models or {}).items():
+            for model in names.split():
+                self.register(model, dev_type)
+
+    def __contains__(self, model: str) -> bool:
+        """Check if model or models prefix with "*" at the end is registered."""
+        if model.endswith(WILDCARD):
+            return model[: -len(WILDCARD)] in self._prefixes
+        return model in self._exact
+
+    def register(self, model: str, dev_type: str) -> None:
+        """Register device model or models prefix with "*" at the end."""
+        with self._lock:
+            if model.endswith(WILDCARD):
+                self._prefixes[model[: -len(WILDCARD)]] = dev_type
+                self._update_prefix_lengths()
+            else:
+                self._exact[model] = dev_type
+
+    def unregister(self, model: str) -> None:
+        """Unregister device model or models prefix."""
+        with self._lock:
+            if model.endswith(WILDCARD):
+                self._prefixes.pop(model[: -len(WILDCARD)], None)
+                self._update_prefix_lengths()
+            else:
+                self._exact.pop(model, None)
+
+    def _update_prefix_lengths(self) -> None:
+        """Update lengths of prefixes to check on lookup, longest first."""
+        self._prefix_lengths = tuple(
+            sorted({len(x) for x in self._prefixes}, reverse=True)
+        )
+
+    def lookup(self, model: str | None) -> str | None:
+        """Return device type of model or None for unknown models."""
+        if not model:
+            return None
+
+        dev_type = self._exact.get(model)
+        if dev_type is not None:
+            return dev_type
+
+        model = strip_revision(model)
+        dev_type = self._exact.get(model)
+        if dev_type is not None:
+            return dev_type
+
+        for length in self._prefix_lengths:
+            dev_type = self._prefixes.get(model[:length])
+            if dev_type is not None:
+                return dev_type
+
+        return None
+
+
+MODEL_INDEX = ModelIndex(BEWARD_MODELS)
+
+
+def register_model(model: str, dev_type: str) -> None:
+    """Register device model or models prefix with "*" at the end."""
+    MODEL_INDEX.register(model, dev_type)
+
+
+def unregister_model(model: str) -> None:
+    """Unregister device model or models prefix."""
+    MODEL_INDEX.unregister(model)
+
+
+# Device classes by device types. Classes given as "module:Class" strings are
+# imported only on first use.
+_device_classes: dict[str, type[BewardGeneric] | str] = {
+    BEWARD_CAMERA: "beward.camera:BewardCamera",
+    BEWARD_DOORBELL: "beward.doorbell:BewardDoorbell",
+}
+_device_classes_lock = threading.Lock()
+_entry_points_loaded = False
+
+
+def register_device_class(
+    dev_type: str, cls: type[BewardGeneric] | str | None = None
+) -> Any:
+    """
+    Register class of devices of given type.
+
+    Class can be given as "module:Class" string to import it lazily. Without
+    class returns decorator:
+
+        @register_device_class("intercom")
+        class BewardIntercom(BewardDoorbell):
+            ...
+    """
+    if cls is None:
+
+        def decorator(cls: type[BewardGeneric]) -> type[BewardGeneric]:
+            register_device_class(dev_type, cls)
+            return cls
+
+        return decorator
+
+    with _device_classes_lock:
+        _device_classes[dev_type] = cls
+    return cls
+
+
+def unregister_device_class(dev_type: str) -> None:
+    """Unregister class of devices of given type."""
+    with _device_classes_lock:
+        _device_classes.pop(dev_type, None)
+
+
+def _load_entry_points() -> None:
+    """Register device classes provided by other packages."""
+    global _entry_points_loaded  # noqa: PLW0603 pylint: disable=global-statement
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+
+    for entry in entry_points(group=ENTRY_POINTS_GROUP):
+        with _device_classes_lock:
+            _device_classes.setdefault(entry.name, entry.value)
+
+
+def get_device_class(dev_type: str | None) -> type[BewardGeneric] | None:
+    """Return class of devices of given type, importing it if necessary."""
+    if dev_type is None:
+        return None
+
+    cls = _device_classes.get(dev_type)
+    if cls is None:
+        _load_entry_points()
+        cls = _device_classes.get(dev_type)
+        if cls is None:
+            return None
+
+    if isinstance(cls, str):
+        module, _, name = cls.partition(":")
+        _LOGGER.debug("Import device class %s", cls)
+        resolved: Callable = getattr(importlib.import_module(module), name)
+        with _device_classes_lock:
+            if _device_classes.get(dev_type) == cls:
+                _device_classes[dev_type] = resolved
+        cls = resolved
+
+    return cls
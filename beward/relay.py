@@ -0,0 +1,204 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Snapshot relay which serves cached camera images to many clients."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from requests import RequestException
+
+from .const import RELAY_MAX_RATE
+
+if TYPE_CHECKING:
+    from .camera import BewardCamera
+
+_LOGGER = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG"
+
+
+class _Snapshot:
+    """Latest cached image of one camera."""
+
+    def __init__(self, camera: BewardCamera) -> None:
+        """Initialize snapshot."""
+        self.camera = camera
+        self.image: bytes | None = None
+        self.etag: str | None = None
+        self.fetched = -float("inf")
+        # Held while image is fetched from device, so concurrent clients wait
+        # for the same fetch instead of making their own
+        self.lock = threading.Lock()
+        self.device_requests = 0
+        self.client_requests = 0
+
+    def get(self, interval: float) -> tuple[bytes | None, str | None]:
+        """Return image not older than interval, fetching it if necessary."""
+        self.client_requests += 1
+        if monotonic() - self.fetched < interval:
+            return self.image, self.etag
+
+        with self.lock:
+            if monotonic() - self.fetched < interval:
+                return self.image, self.etag
+
+            self.device_requests += 1
+            try:
+                image = self.camera.live_image
+            except (RequestException, AttributeError) as exc:
+                _LOGGER.debug(
+                    "Failed to fetch image from %s: %s", self.camera.host, exc
+                )
+                image = None
+
+            # Failed fetches are retried no more often than successful ones
+            self.fetched = monotonic()
+            if image is not None:
+                self.image = image
+                self.etag = (
+                    '"' + hashlib.blake2b(image, digest_size=8).hexdigest() + '"'
+                )
+
+            return self.image, self.etag
+
+
+class _RelayHandler(BaseHTTPRequestHandler):
+    """HTTP requests handler of snapshot relay."""
+
+    server: _RelayServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        """Log HTTP request."""
+        _LOGGER.debug(fmt, *args)
+
+    def do_GET(self) -> None:
+        """Handle GET request."""
+        relay = self.server.relay
+        name = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path.lstrip("/"))
+        snapshot = relay.snapshots.get(name)
+        if snapshot is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        image, etag = snapshot.get(relay.interval)
+        if image is None:
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+
+        if etag in (
+            x.strip() for x in self.headers.get("If-None-Match", "").split(",")
+        ):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content_type = "image/png" if image.startswith(PNG_SIGNATURE) else "image/jpeg"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(image)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(image)
+
+
+class _RelayServer(ThreadingHTTPServer):
+    """HTTP server of snapshot relay."""
+
+    daemon_threads = True
+
+    def __init__(self, relay: SnapshotRelay, address: tuple[str, int]) -> None:
+        """Initialize HTTP server."""
+        self.relay = relay
+        super().__init__(address, _RelayHandler)
+
+
+class SnapshotRelay:
+    """
+    Local HTTP server which relays camera snapshots to many clients.
+
+    Every camera image is fetched from device no more than `max_rate` times per
+    second whatever number of clients is. Concurrent requests wait for one
+    fetch, and clients can revalidate cached images by ETag. Clients do not
+    need device credentials.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_rate: float = RELAY_MAX_RATE,
+    ) -> None:
+        """Initialize snapshot relay."""
+        if max_rate <= 0:
+            msg = "Max rate must be positive"
+            raise ValueError(msg)
+
+        self.interval = 1 / max_rate
+        self.snapshots: dict[str, _Snapshot] = {}
+
+        self._server = _RelayServer(self, (host, port))
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> SnapshotRelay:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and stop relay."""
+        self.stop()
+
+    def add_camera(self, camera: BewardCamera, name: str | None = None) -> str:
+        """Add camera to relay and return URL of its snapshots."""
+        name = name or camera.host
+        self.snapshots[name] = _Snapshot(camera)
+        return self.url(name)
+
+    def remove_camera(self, name: str) -> None:
+        """Remove camera from relay."""
+        self.snapshots.pop(name, None)
+
+    def url(self, name: str) -> str:
+        """Return URL of camera snapshots."""
+        return f"http://{self.host}:{self.port}/{urllib.parse.quote(name)}"
+
+    def stats(self, name: str) -> dict[str, int]:
+        """Return numbers of client and device requests for camera."""
+        snapshot = self.snapshots[name]
+        return {
+            "client_requests": snapshot.client_requests,
+            "device_requests": snapshot.device_requests,
+        }
+
+    def start(self) -> SnapshotRelay:
+        """Start serving snapshots."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.1},
+            name="beward-relay",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving snapshots."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
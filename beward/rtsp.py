@@ -0,0 +1,530 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""RTSP client which grabs H.264 keyframes from Beward cameras."""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import socket
+import struct
+import threading
+from time import monotonic
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from .const import RECONNECT_DELAY, RECONNECT_MAX_DELAY, RTSP_PORT, RTSP_TIMEOUT
+from .log import redact_url, split_auth_from_netloc
+from .util import backoff_delay
+
+if TYPE_CHECKING:
+    from typing import BinaryIO
+
+_LOGGER = logging.getLogger(__name__)
+
+START_CODE = b"\x00\x00\x00\x01"
+
+# H.264 NAL unit types (RFC 6184)
+NAL_IDR = 5
+NAL_SPS = 7
+NAL_PPS = 8
+NAL_STAP_A = 24
+NAL_FU_A = 28
+
+RTP_VERSION = 2
+RTP_HEADER_SIZE = 12
+# Interleaved channel of RTP packets in TCP connection
+RTP_CHANNEL = 0
+# Session timeout if server does not tell it
+SESSION_TIMEOUT = 60
+
+
+def nal_type(nal: bytes) -> int:
+    """Return type of H.264 NAL unit."""
+    return nal[0] & 0x1F
+
+
+class H264Depacketizer:
+    """
+    Reassembler of H.264 access units from RTP packets (RFC 6184).
+
+    Single NAL unit, STAP-A and FU-A packets are supported. Access units
+    damaged by packet loss are dropped. Only keyframes are kept.
+    """
+
+    def __init__(
+        self,
+        payload_type: int | None = None,
+        sps: bytes | None = None,
+        pps: bytes | None = None,
+    ) -> None:
+        """Initialize depacketizer with parameter sets from SDP, if any."""
+        self.payload_type = payload_type
+        self.sps = sps
+        self.pps = pps
+        self.keyframe: bytes | None = None
+        self.keyframes = 0
+        self.dropped = 0
+
+        self._nals: list[bytes] = []
+        self._fu: bytearray | None = None
+        self._broken = False
+        # Whether current access unit has keyframe, even if partly lost
+        self._idr = False
+        self._seq: int | None = None
+        self._timestamp: int | None = None
+
+    def feed(self, packet: bytes) -> bytes | None:
+        """
+        Process RTP packet.
+
+        Return keyframe access unit in Annex B format when it is completed.
+        """
+        if len(packet) < RTP_HEADER_SIZE or packet[0] >> 6 != RTP_VERSION:
+            return None
+        if self.payload_type is not None and packet[1] & 0x7F != self.payload_type:
+            return None
+
+        offset = RTP_HEADER_SIZE + 4 * (packet[0] & 0x0F)
+        if packet[0] & 0x10:
+            # Header extension
+            if offset + 4 > len(packet):
+                return None
+            (length,) = struct.unpack(">H", packet[offset + 2 : offset + 4])
+            offset += 4 + 4 * length
+        end = len(packet) - (packet[-1] if packet[0] & 0x20 else 0)
+        if offset > end:
+            # Truncated packet, handled as lost one
+            return None
+
+        seq, timestamp = struct.unpack(">HI", packet[2:8])
+
+        result = None
+        gap = self._seq is not None and seq != (self._seq + 1) & 0xFFFF
+        if gap:
+            self._broken = True
+        if timestamp != self._timestamp and (
+            self._nals or self._fu is not None or self._idr
+        ):
+            # Access unit is ended without marker
+            result = self._finish()
+        if gap:
+            self._broken = True
+            self._fu = None
+        self._seq = seq
+        self._timestamp = timestamp
+
+        if offset < end:
+            self._depacketize(packet[offset:end])
+        if packet[1] & 0x80:
+            result = self._finish() or result
+        return result
+
+    def _depacketize(self, payload: bytes) -> None:
+        """Extract NAL units from RTP payload."""
+        kind = nal_type(payload)
+        if kind < NAL_STAP_A:
+            self._add_nal(payload)
+
+        elif kind == NAL_STAP_A:
+            idx = 1
+            while idx + 2 <= len(payload):
+                (size,) = struct.unpack(">H", payload[idx : idx + 2])
+                idx += 2
+                if not size or idx + size > len(payload):
+                    self._broken = True
+                    return
+                self._add_nal(payload[idx : idx + size])
+                idx += size
+
+        elif kind == NAL_FU_A and len(payload) > 2:  # noqa: PLR2004
+            indicator, header = payload[0], payload[1]
+            if header & 0x1F == NAL_IDR:
+                self._idr = True
+            if header & 0x80:
+                self._fu = bytearray(((indicator & 0xE0) | (header & 0x1F),))
+            elif self._fu is None:
+                # Start of fragmented NAL unit is lost
+                self._broken = True
+                return
+            self._fu += payload[2:]
+            if header & 0x40:
+                self._add_nal(bytes(self._fu))
+                self._fu = None
+
+    def _add_nal(self, nal: bytes) -> None:
+        """Add NAL unit to current access unit."""
+        kind = nal_type(nal)
+        if kind == NAL_IDR:
+            self._idr = True
+        if kind == NAL_SPS:
+            self.sps = nal
+        elif kind == NAL_PPS:
+            self.pps = nal
+        else:
+            self._nals.append(nal)
+
+    def _finish(self) -> bytes | None:
+        """Complete current access unit and return it if it is keyframe."""
+        nals, broken, idr = self._nals, self._broken, self._idr
+        self._nals = []
+        self._fu = None
+        self._broken = self._idr = False
+
+        if not idr:
+            return None
+        if broken or self.sps is None or self.pps is None:
+            self.dropped += 1
+            return None
+
+        self.keyframe = b"".join(START_CODE + x for x in [self.sps, self.pps, *nals])
+        self.keyframes += 1
+        return self.keyframe
+
+
+def parse_sdp(
+    sdp: str, base_url: str
+) -> tuple[str, int | None, bytes | None, bytes | None]:
+    """
+    Find H.264 video track in session description.
+
+    Return track URL, RTP payload type and SPS and PPS parameter sets.
+    """
+    media = None
+    control = None
+    payload_type = None
+    sps = pps = None
+    for line in sdp.splitlines():
+        if line.startswith("m="):
+            if media == "video" and payload_type is not None:
+                break
+            media = line[2:].split(" ", 1)[0]
+            control = payload_type = None
+            sps = pps = None
+        elif media != "video":
+            continue
+        elif line.startswith("a=control:"):
+            control = line[10:].strip()
+        elif match := re.match(r"a=rtpmap:(\d+) H264/", line, re.IGNORECASE):
+            payload_type = int(match.group(1))
+        elif match := re.search(r"sprop-parameter-sets=([^;\s]+)", line):
+            sets = [base64.b64decode(x) for x in match.group(1).split(",") if x]
+            sps = next((x for x in sets if nal_type(x) == NAL_SPS), None)
+            pps = next((x for x in sets if nal_type(x) == NAL_PPS), None)
+
+    if media != "video" or payload_type is None:
+        msg = "No H.264 video track in RTSP stream"
+        raise ConnectionError(msg)
+
+    if not control or control == "*":
+        url = base_url
+    elif control.startswith("rtsp://"):
+        url = control
+    else:
+        url = urljoin(base_url if base_url.endswith("/") else base_url + "/", control)
+    return url, payload_type, sps, pps
+
+
+# pylint: disable=too-many-instance-attributes
+class RtspClient:
+    """RTSP client which receives RTP packets interleaved in TCP connection."""
+
+    def __init__(self, url: str, timeout: float = RTSP_TIMEOUT) -> None:
+        """Initialize RTSP client."""
+        parts = urlsplit(url)
+        netloc, (self.username, self.password) = split_auth_from_netloc(parts.netloc)
+        self.url = urlunsplit(parts._replace(netloc=netloc))
+        self.host = parts.hostname or ""
+        self.port = parts.port or RTSP_PORT
+        self.timeout = timeout
+
+        self.session: str | None = None
+        self.session_timeout = SESSION_TIMEOUT
+        self.depacketizer = H264Depacketizer()
+
+        self._sock: socket.socket | None = None
+        self._rfile: BinaryIO | None = None
+        self._cseq = 0
+        self._challenge: dict[str, str] | None = None
+        self._write_lock = threading.Lock()
+
+    def connect(self) -> None:
+        """Open connection and start playing video track."""
+        self._sock = socket.create_connection((self.host, self.port), self.timeout)
+        self._rfile = self._sock.makefile("rb")
+
+        headers, body = self.request(
+            "DESCRIBE", self.url, {"Accept": "application/sdp"}
+        )
+        base_url = headers.get("content-base", self.url)
+        track, payload_type, sps, pps = parse_sdp(body.decode("utf-8"), base_url)
+        self.depacketizer = H264Depacketizer(payload_type, sps, pps)
+
+        headers, _ = self.request(
+            "SETUP",
+            track,
+            {"Transport": f"RTP/AVP/TCP;unicast;interleaved={RTP_CHANNEL}-1"},
+        )
+        session, *params = headers.get("session", "").split(";")
+        self.session = session.strip() or None
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "timeout" and value.isdigit():
+                self.session_timeout = int(value)
+
+        self.request("PLAY", base_url, {"Range": "npt=0.000-"})
+
+    def close(self) -> None:
+        """Close connection, unblocking its reader."""
+        if self._sock is not None:
+            with contextlib.suppress(OSError):
+                self._sock.shutdown(socket.SHUT_RDWR)
+            self._sock.close()
+        if self._rfile is not None:
+            with contextlib.suppress(OSError):
+                self._rfile.close()
+
+    def _authorization(self, method: str, uri: str) -> str | None:
+        """Return Authorization header for request."""
+        if self._challenge is None or self.username is None:
+            return None
+
+        password = self.password or ""
+        if self._challenge.get("scheme") == "basic":
+            token = base64.b64encode(f"{self.username}:{password}".encode()).decode()
+            return f"Basic {token}"
+
+        def _md5(value: str) -> str:
+            return hashlib.md5(value.encode()).hexdigest()  # noqa: S324
+
+        realm = self._challenge.get("realm", "")
+        nonce = self._challenge.get("nonce", "")
+        ha1 = _md5(f"{self.username}:{realm}:{password}")
+        ha2 = _md5(f"{method}:{uri}")
+        fields = (
+            f'username="{self.username}", realm="{realm}", nonce="{nonce}", uri="{uri}"'
+        )
+        if "auth" in self._challenge.get("qop", "").split(","):
+            cnonce = os.urandom(8).hex()
+            response = _md5(f"{ha1}:{nonce}:00000001:{cnonce}:auth:{ha2}")
+            fields += f', qop=auth, nc=00000001, cnonce="{cnonce}"'
+        else:
+            response = _md5(f"{ha1}:{nonce}:{ha2}")
+        return f'Digest {fields}, response="{response}"'
+
+    def _send(self, method: str, uri: str, headers: dict[str, str]) -> None:
+        """Send request."""
+        self._cseq += 1
+        lines = [f"{method} {uri} RTSP/1.0", f"CSeq: {self._cseq}"]
+        authorization = self._authorization(method, uri)
+        if authorization:
+            lines.append(f"Authorization: {authorization}")
+        if self.session:
+            lines.append(f"Session: {self.session}")
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        data = ("\r\n".join(lines) + "\r\n\r\n").encode()
+        with self._write_lock:
+            self._sock.sendall(data)
+
+    def request(
+        self, method: str, uri: str, headers: dict[str, str] | None = None
+    ) -> tuple[dict[str, str], bytes]:
+        """Send request and return headers and body of response."""
+        for _ in range(2):
+            _LOGGER.debug("RTSP %s %s", method, redact_url(uri))
+            self._send(method, uri, headers or {})
+            status, resp_headers, body = self._read_response()
+            if status != 401 or "www-authenticate" not in resp_headers:  # noqa: PLR2004
+                break
+            if self._challenge is not None and "stale=true" not in (
+                resp_headers["www-authenticate"].lower()
+            ):
+                break
+            self._challenge = self._parse_challenge(resp_headers["www-authenticate"])
+
+        if status != 200:  # noqa: PLR2004
+            msg = f"RTSP {method} failed with status {status}"
+            raise ConnectionError(msg)
+        return resp_headers, body
+
+    @staticmethod
+    def _parse_challenge(header: str) -> dict[str, str]:
+        """Parse WWW-Authenticate header."""
+        scheme, _, params = header.partition(" ")
+        challenge = {"scheme": scheme.lower()}
+        challenge.update(
+            (k.lower(), v) for k, v in re.findall(r'(\w+)="?([^",]*)"?', params)
+        )
+        return challenge
+
+    def _read_exact(self, size: int) -> bytes:
+        """Read exactly size bytes."""
+        data = self._rfile.read(size)
+        if len(data) != size:
+            msg = "RTSP connection closed"
+            raise ConnectionError(msg)
+        return data
+
+    def _read_response(self, first: bytes = b"") -> tuple[int, dict[str, str], bytes]:
+        """Read response, skipping interleaved packets before it."""
+        while not first:
+            first = self._read_exact(1)
+            if first == b"$":
+                self._read_exact(struct.unpack(">xH", self._read_exact(3))[0])
+                first = b""
+        status_line = (first + self._rfile.readline()).decode("latin1")
+        try:
+            status = int(status_line.split(" ", 2)[1])
+        except (IndexError, ValueError) as exc:
+            msg = f"Invalid RTSP response: {status_line!r}"
+            raise ConnectionError(msg) from exc
+
+        headers = {}
+        while True:
+            line = self._rfile.readline().decode("latin1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        body = self._read_exact(int(headers.get("content-length", 0)))
+        return status, headers, body
+
+    def keepalive(self) -> None:
+        """Send keep-alive request without waiting for response."""
+        self._send("GET_PARAMETER", self.url, {})
+
+    def read_packet(self) -> tuple[int, bytes]:
+        """Return next interleaved packet and its channel."""
+        while True:
+            first = self._read_exact(1)
+            if first == b"$":
+                channel, size = struct.unpack(">BH", self._read_exact(3))
+                return channel, self._read_exact(size)
+            if first == b"R":
+                # Response to keep-alive request
+                self._read_response(first)
+
+
+class RtspKeyframeGrabber:
+    """
+    Background RTSP session which keeps the most recent H.264 keyframe.
+
+    Session is reopened after failures. Keyframes are returned as Annex B
+    access units with SPS and PPS, ready to be passed to decoder.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        timeout: float = RTSP_TIMEOUT,
+        reconnect_delay: float = RECONNECT_DELAY,
+        reconnect_max_delay: float = RECONNECT_MAX_DELAY,
+    ) -> None:
+        """Initialize keyframe grabber."""
+        self.url = url
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        self.keyframe: bytes | None = None
+        self.keyframe_time = 0.0
+        self.last_error: Exception | None = None
+
+        self._client: RtspClient | None = None
+        self._updated = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> RtspKeyframeGrabber:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and close session."""
+        self.stop()
+
+    def get_keyframe(
+        self, timeout: float | None = None, max_age: float | None = None
+    ) -> bytes | None:
+        """
+        Return the most recent keyframe.
+
+        If no keyframe is received yet or it is older than `max_age` seconds,
+        wait for next one up to `timeout` seconds.
+        """
+        oldest = None if max_age is None else monotonic() - max_age
+        with self._updated:
+            self._updated.wait_for(
+                lambda: (
+                    self.keyframe is not None
+                    and (oldest is None or self.keyframe_time >= oldest)
+                ),
+                timeout,
+            )
+            return self.keyframe
+
+    def _run(self) -> None:
+        """Keep RTSP session until stopped."""
+        attempt = 0
+        while not self._stop_event.is_set():
+            client = self._client = RtspClient(self.url, self.timeout)
+            received = self.keyframe_time
+            try:
+                client.connect()
+                self._receive(client)
+            except (OSError, ValueError, struct.error) as exc:
+                if not self._stop_event.is_set():
+                    _LOGGER.debug("RTSP session failed: %s", exc)
+                    self.last_error = exc
+            finally:
+                client.close()
+
+            # Session which accepts requests but sends no video is failed too
+            if self.keyframe_time != received:
+                attempt = 0
+            delay = backoff_delay(
+                attempt, self.reconnect_delay, self.reconnect_max_delay
+            )
+            attempt += 1
+            self._stop_event.wait(delay)
+
+    def _receive(self, client: RtspClient) -> None:
+        """Receive packets and keep keyframes."""
+        next_keepalive = monotonic() + client.session_timeout / 2
+        while not self._stop_event.is_set():
+            channel, packet = client.read_packet()
+            if channel == RTP_CHANNEL:
+                keyframe = client.depacketizer.feed(packet)
+                if keyframe is not None:
+                    with self._updated:
+                        self.keyframe = keyframe
+                        self.keyframe_time = monotonic()
+                        self._updated.notify_all()
+
+            if monotonic() >= next_keepalive:
+                client.keepalive()
+                next_keepalive = monotonic() + client.session_timeout / 2
+
+    def start(self) -> RtspKeyframeGrabber:
+        """Open RTSP session in background."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="beward-rtsp", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Close RTSP session."""
+        self._stop_event.set()
+        if self._client is not None:
+            self._client.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
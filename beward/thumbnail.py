@@ -0,0 +1,159 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Downscaling of camera images to thumbnails."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+from .const import THUMBNAIL_CACHE_SIZE, THUMBNAIL_QUALITY
+
+_LOGGER = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start of frame markers, which contain image dimensions
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(image: bytes) -> tuple[int, int] | None:
+    """Return width and height of JPEG or PNG image without decoding it."""
+    if image.startswith(PNG_SIGNATURE):
+        if len(image) < 24:  # noqa: PLR2004
+            return None
+        return struct.unpack(">II", image[16:24])
+
+    if not image.startswith(b"\xff\xd8"):
+        return None
+    idx = 2
+    while idx + 9 <= len(image):
+        if image[idx] != 0xFF:  # noqa: PLR2004
+            return None
+        marker = image[idx + 1]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", image[idx + 5 : idx + 9])
+            return width, height
+        (length,) = struct.unpack(">H", image[idx + 2 : idx + 4])
+        idx += 2 + length
+    return None
+
+
+def downscale(
+    image: bytes, size: tuple[int, int], quality: int = THUMBNAIL_QUALITY
+) -> bytes:
+    """Downscale image to fit into size and return it as JPEG."""
+    try:
+        from PIL import Image  # noqa: PLC0415
+    except ImportError as exc:  # pragma: no cover
+        msg = 'Pillow is required to downscale images: pip install "beward[thumbnails]"'
+        raise ImportError(msg) from exc
+
+    with Image.open(io.BytesIO(image)) as img:
+        # Let JPEG decoder skip unnecessary resolution: much faster than full decode
+        img.draft("RGB", size)
+        thumb = img.convert("RGB")
+    thumb.thumbnail(size)
+
+    out = io.BytesIO()
+    thumb.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+class ThumbnailPool:
+    """
+    Pool of worker processes which downscale images.
+
+    Results are cached by source frame and size, so the same frame is
+    downscaled only once, even if requested concurrently. With `max_workers=0`
+    images are downscaled in calling thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        cache_size: int = THUMBNAIL_CACHE_SIZE,
+        quality: int = THUMBNAIL_QUALITY,
+    ) -> None:
+        """Initialize thumbnails pool."""
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.quality = quality
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: OrderedDict[tuple, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+    def __enter__(self) -> ThumbnailPool:  # noqa: PYI034
+        """Enter the runtime context."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Exit the runtime context and shut down workers."""
+        self.close()
+
+    def _submit(self, image: bytes, size: tuple[int, int]) -> Future:
+        """Start downscaling of image."""
+        if self.max_workers == 0:
+            future: Future = Future()
+            try:
+                future.set_result(downscale(image, size, self.quality))
+            except Exception as exc:  # noqa: BLE001
+                future.set_exception(exc)
+            return future
+
+        if self._executor is None:
+            # Workers are started only on first use
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        return self._executor.submit(downscale, image, size, self.quality)
+
+    def thumbnail(self, image: bytes, size: tuple[int, int]) -> bytes:
+        """Return image downscaled to fit into size."""
+        key = (hashlib.blake2b(image, digest_size=16).digest(), tuple(size))
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            else:
+                self.misses += 1
+                future = self._submit(image, size)
+                self._cache[key] = future
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+            raise
+
+    def close(self) -> None:
+        """Shut down worker processes and clear cache."""
+        with self._lock:
+            self._cache.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_default_pool: ThumbnailPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool() -> ThumbnailPool:
+    """Return thumbnails pool shared by all cameras."""
+    global _default_pool  # noqa: PLW0603 pylint: disable=global-statement
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ThumbnailPool()
+        return _default_pool
@@ -0,0 +1,248 @@
+#  Copyright (c) 2019-2024, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+"""Tracing of HTTP exchanges with Beward devices."""
+
+from __future__ import annotations
+
+import contextlib
+import ipaddress
+import logging
+import socket
+import threading
+from collections import deque
+from time import perf_counter, time_ns
+from typing import TYPE_CHECKING, Any, Protocol
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool
+from urllib3.connection import HTTPConnection
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_DEVICE = "beward.device"
+ATTR_FUNCTION = "beward.function"
+ATTR_PEER_NAME = "net.peer.name"
+ATTR_PEER_PORT = "net.peer.port"
+ATTR_CONNECTION_REUSED = "net.connection.reused"
+ATTR_METHOD = "http.method"
+ATTR_STATUS_CODE = "http.status_code"
+ATTR_CONTENT_LENGTH = "http.response_content_length"
+ATTR_PHASE = "beward.phase."
+
+PHASE_DNS = "dns"
+PHASE_CONNECT = "connect"
+PHASE_AUTH = "auth"
+PHASE_WAIT = "wait"
+PHASE_TRANSFER = "transfer"
+PHASE_TOTAL = "total"
+
+_local = threading.local()
+
+
+class Span(Protocol):
+    """Protocol type for span, compatible with OpenTelemetry spans."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set attribute of span."""
+
+
+class Tracer(Protocol):
+    """Protocol type for tracer, compatible with OpenTelemetry tracers."""
+
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, Any] | None = None
+    ) -> contextlib.AbstractContextManager[Span]:
+        """Start new span and make it current."""
+
+
+def _is_ip_address(host: str) -> bool:
+    """Check if host is IP address literal."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class _TracedConnection(HTTPConnection):
+    """HTTP connection which records timings of its phases."""
+
+    def _new_conn(self) -> socket.socket:
+        """Establish new connection and record DNS and TCP connect times."""
+        phases = getattr(_local, "phases", None)
+        if phases is None:
+            return super()._new_conn()
+
+        start = perf_counter()
+        host = self._dns_host
+        try:
+            if not _is_ip_address(host):
+                # Resolve once here to split resolution from connection time
+                with contextlib.suppress(OSError):
+                    self._dns_host = socket.getaddrinfo(
+                        host, self.port, type=socket.SOCK_STREAM
+                    )[0][4][0]
+                phases[PHASE_DNS] = perf_counter() - start
+            try:
+                sock = super()._new_conn()
+            except Exception:
+                if self._dns_host == host:
+                    raise
+                # Let urllib3 try all resolved addresses
+                self._dns_host = host
+                sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+
+        phases[PHASE_CONNECT] = perf_counter() - start - phases.get(PHASE_DNS, 0)
+        return sock
+
+    def request(self, *args: Any, **kwargs: Any) -> Any:
+        """Send request and record its time."""
+        phases = getattr(_local, "phases", None)
+        if phases is not None:
+            phases["requests"] += 1
+            phases.setdefault("first_request", perf_counter())
+            phases["request"] = perf_counter()
+        res = super().request(*args, **kwargs)
+        if phases is not None:
+            phases["sent"] = perf_counter()
+        return res
+
+    def getresponse(self, *args: Any, **kwargs: Any) -> Any:
+        """Receive response headers and record their time."""
+        res = super().getresponse(*args, **kwargs)
+        phases = getattr(_local, "phases", None)
+        if phases is not None:
+            phases["headers"] = perf_counter()
+        return res
+
+
+class _TracedConnectionPool(HTTPConnectionPool):
+    """Pool of traced HTTP connections."""
+
+    ConnectionCls = _TracedConnection
+
+
+class TracingAdapter(HTTPAdapter):
+    """Transport adapter of requests session which records timings of phases."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize pool manager with traced connections."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme,
+            "http": _TracedConnectionPool,
+        }
+
+
+def _phase_timings(phases: dict[str, Any], start: float, end: float) -> dict:
+    """Calculate durations of exchange phases."""
+    res = {PHASE_TOTAL: end - start}
+    for phase in (PHASE_DNS, PHASE_CONNECT):
+        if phase in phases:
+            res[phase] = phases[phase]
+    if phases["requests"] > 1:
+        res[PHASE_AUTH] = phases["request"] - phases["first_request"]
+    if "headers" in phases:
+        res[PHASE_WAIT] = phases["headers"] - phases["sent"]
+        res[PHASE_TRANSFER] = end - phases["headers"]
+    return res
+
+
+@contextlib.contextmanager
+def trace_exchange(
+    tracer: Tracer, host: str, port: int, function: str
+) -> Iterator[Span]:
+    """
+    Trace HTTP exchange with Beward device.
+
+    Requests must be sent by session with TracingAdapter mounted to record
+    timings of phases. Phase durations are set as span attributes in seconds.
+    """
+    attributes = {
+        ATTR_DEVICE: f"{host}:{port}",
+        ATTR_FUNCTION: function,
+        ATTR_PEER_NAME: host,
+        ATTR_PEER_PORT: port,
+        ATTR_METHOD: "GET",
+    }
+    with tracer.start_as_current_span(
+        f"beward {function}", attributes=attributes
+    ) as span:
+        phases = _local.phases = {"requests": 0}
+        start = perf_counter()
+        try:
+            yield span
+        finally:
+            end = perf_counter()
+            _local.phases = None
+            span.set_attribute(ATTR_CONNECTION_REUSED, PHASE_CONNECT not in phases)
+            for phase, duration in _phase_timings(phases, start, end).items():
+                span.set_attribute(ATTR_PHASE + phase, duration)
+
+
+class RecordedSpan:
+    """Span recorded by SpanRecorder."""
+
+    def __init__(self, name: str, attributes: Mapping[str, Any] | None) -> None:
+        """Initialize span."""
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_time = time_ns()
+        self.end_time: int | None = None
+        self.exception: BaseException | None = None
+
+    def __repr__(self) -> str:
+        """Return string representation of span."""
+        return f"<RecordedSpan {self.name} {self.attributes}>"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set attribute of span."""
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        """Record exception raised within span."""
+        self.exception = exception
+
+
+class SpanRecorder:
+    """
+    Minimal tracer which keeps recent finished spans.
+
+    Use it when OpenTelemetry is not available. Every finished span is also
+    passed to callback if it is given.
+    """
+
+    def __init__(
+        self,
+        maxlen: int = 1000,
+        callback: Callable[[RecordedSpan], None] | None = None,
+    ) -> None:
+        """Initialize span recorder."""
+        self.spans: deque[RecordedSpan] = deque(maxlen=maxlen)
+        self.callback = callback
+
+    @contextlib.contextmanager
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, Any] | None = None
+    ) -> Iterator[RecordedSpan]:
+        """Start new span and record it when finished."""
+        span = RecordedSpan(name, attributes)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            span.end_time = time_ns()
+            self.spans.append(span)
+            if self.callback is not None:
+                try:
+                    self.callback(span)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Span callback failed")
@@ -3,7 +3,14 @@
 #  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
 """Utilities."""
 
+import contextlib
+import random
 import re
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+BOOL_TRUE = frozenset(("1", "true", "yes", "on", "open", "enable", "enabled"))
+BOOL_FALSE = frozenset(("0", "false", "no", "off", "close", "disable", "disabled"))
 
 
 def normalize_fqdn(hostname: str) -> str:
@@ -19,6 +26,11 @@ def normalize_fqdn(hostname: str) -> str:
     return hostname
 
 
+def normalize_mac(mac: str) -> str:
+    """Return MAC address in lowercase without separators."""
+    return "".join(x for x in mac.lower() if x in "0123456789abcdef")
+
+
 def is_valid_fqdn(hostname: str) -> bool:
     """Validate full qualified domain name."""
     hostname = normalize_fqdn(hostname)
@@ -29,3 +41,52 @@ def is_valid_fqdn(hostname: str) -> bool:
         return False
     ldh_re = re.compile(r"^[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?$", re.IGNORECASE)
     return all(ldh_re.match(x) for x in dn_seq)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Calculate exponential backoff delay with jitter for retry attempt."""
+    delay = min(cap, base * 2 ** min(attempt, 32))
+    # Random half of delay spreads out retries of many clients
+    return delay / 2 + random.uniform(0, delay / 2)  # noqa: S311
+
+
+def to_bool(value: str) -> bool:
+    """Convert device parameter value to boolean."""
+    val = value.strip().lower()
+    if val in BOOL_TRUE:
+        return True
+    if val in BOOL_FALSE:
+        return False
+    msg = f"Not a boolean value: {value!r}"
+    raise ValueError(msg)
+
+
+def parse_params(
+    data: bytes,
+    encoding: str = "utf-8",
+    keys: Iterable[str] | None = None,
+    types: Mapping[str, Callable[[str], Any]] | None = None,
+) -> dict[str, Any]:
+    """
+    Parse key=value lines of device response.
+
+    Blank lines and lines without "=" are skipped, and values may contain "=".
+    If `keys` are given, only these keys are decoded and returned. Values of
+    keys listed in `types` are converted by given callables; values which can
+    not be converted are left as strings.
+    """
+    wanted = None if keys is None else {x.encode(encoding) for x in keys}
+    res = {}
+    for line in data.splitlines():
+        key, sep, val = line.partition(b"=")
+        key = key.strip()
+        if not sep or not key or (wanted is not None and key not in wanted):
+            continue
+
+        key = key.decode(encoding, "replace")
+        res[key] = val.decode(encoding, "replace")
+        if types and key in types:
+            with contextlib.suppress(ValueError):
+                res[key] = types[key](res[key])
+
+    return res
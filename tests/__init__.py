@@ -1,7 +1,10 @@
 # pylint: disable=protected-access,redefined-outer-name
 """Unit tests package."""
 
+import socket
+import threading
 from pathlib import Path
+from time import sleep
 
 from .const import MOCK_HOST
 
@@ -20,6 +23,15 @@ def load_binary(filename):
         return fptr.read()
 
 
+def wait_for(predicate, timeout: float = 2) -> bool:
+    """Wait until predicate is true. Return False on timeout."""
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        sleep(0.01)
+    return False
+
+
 def function_url(function, host=MOCK_HOST, user=None, password=None):
     """Make function URL."""
     auth = ""
@@ -29,3 +41,58 @@ def function_url(function, host=MOCK_HOST, user=None, password=None):
             auth += ":" + password
         auth += "@"
     return "http://" + auth + host + ":80/cgi-bin/" + function + "_cgi"
+
+
+class AlarmStreamServer:
+    """Local server which streams alarms and holds connections open."""
+
+    def __init__(
+        self, body: bytes = b"", status: int = 200, *, chunked: bool = False
+    ) -> None:
+        """Initialize server."""
+        self.body = body
+        self.status = status
+        self.chunked = chunked
+        self.requests = []
+        self._conns = []
+        self._stop = threading.Event()
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self._server.settimeout(0.05)
+        self.port = self._server.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except TimeoutError:
+                continue
+            self._conns.append(conn)
+
+            conn.settimeout(1)
+            request = b""
+            while b"\r\n\r\n" not in request:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                request += data
+            self.requests.append(request.decode())
+
+            headers = f"HTTP/1.1 {self.status} OK\r\nContent-Type: text/plain\r\n"
+            body = self.body
+            if self.chunked:
+                headers += "Transfer-Encoding: chunked\r\n"
+                body = b"".join(
+                    f"{len(x):x}\r\n".encode() + x + b"\r\n"
+                    for x in body.splitlines(keepends=True)
+                )
+            conn.sendall(headers.encode() + b"\r\n" + body)
+
+    def close(self):
+        """Stop server and close all connections."""
+        self._stop.set()
+        self._thread.join()
+        for conn in self._conns:
+            conn.close()
+        self._server.close()
@@ -2,9 +2,11 @@
 """Test to verify that Beward library works."""
 
 import pytest
+import requests
 import requests_mock
 
-from beward import Beward, BewardDoorbell
+from beward import Beward, BewardDoorbell, BewardGeneric, ConfigResult
+from beward.emulator import EmulatorFleet
 
 from . import function_url
 from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
@@ -33,3 +35,33 @@ def test_factory():
 
         beward = Beward.factory(MOCK_HOST, MOCK_USER, MOCK_PASS)
         assert isinstance(beward, BewardDoorbell) is True
+
+
+def test_apply_config():
+    """Test that configuration template is applied to many devices."""
+    with EmulatorFleet(3, discovery_port=None) as fleet:
+        devices = [
+            BewardGeneric(x.host, x.username, x.password, port=x.port)
+            for x in fleet.devices
+        ]
+        devices[1].set_config("rtsp", {"RtspPort": 8554})
+        devices.append(BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS, port=1))
+        fleet.devices[2].params["rtsp"]["RtspPort"] = 8554
+
+        with requests_mock.Mocker(real_http=True) as mock:
+            mock.register_uri(
+                "get",
+                f"http://{MOCK_HOST}:1/cgi-bin/rtsp_cgi",
+                exc=requests.ConnectTimeout,
+            )
+            res = Beward.apply_config(
+                devices, {"rtsp": {"RtspPort": 8554, "RtspAuth": "open"}}
+            )
+
+    assert list(res) == devices
+    assert res[devices[0]] == ConfigResult({"rtsp": {"RtspPort": "8554"}})
+    assert res[devices[1]] == ConfigResult({})
+    assert res[devices[2]] == ConfigResult({})
+    assert res[devices[3]].changed == {}
+    assert isinstance(res[devices[3]].error, requests.ConnectTimeout)
+    assert [x.writes for x in fleet.devices] == [1, 1, 0]
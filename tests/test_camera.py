@@ -8,6 +8,7 @@ from requests import ConnectTimeout
 
 from beward import BewardCamera
 from beward.const import ALARM_MOTION
+from beward.emulator import DEFAULT_IMAGE, BewardEmulator
 
 from . import function_url, load_binary, load_fixture
 from .const import MOCK_HOST, MOCK_PASS, MOCK_USER, local_tz
@@ -143,3 +144,32 @@ def test__handle_alarm() -> None:
         beward._handle_alarm(ts1, ALARM_MOTION, state=True)
         assert beward.last_motion_timestamp == ts1
         assert beward.last_motion_image == image
+
+
+def test_get_images() -> None:
+    """Test fetching of images of several channels."""
+    with BewardEmulator(channels=3) as emulator:
+        beward = BewardCamera(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            rtsp_port=554,
+            channel=1,
+        )
+        assert beward.channels == 3
+        assert beward.get_images() == dict.fromkeys(range(3), DEFAULT_IMAGE)
+        assert beward.get_images([0, 5]) == {0: DEFAULT_IMAGE, 5: None}
+        assert beward.get_images([2]) == {2: DEFAULT_IMAGE}
+        assert beward.live_image == DEFAULT_IMAGE
+        assert beward.live_image_url.endswith("images_cgi?channel=1")
+        assert beward.rtsp_live_video_url.endswith(":554/av1_0")
+        assert beward.query("images", extra_params={"channel": "0;1"}) is None
+
+        # Motion snapshots are taken from channel which raised alarm
+        beward._process_alarm_line("2019-07-28;00:57:27;MotionDetection;1;0")
+        assert beward.channel_motion_image == {0: DEFAULT_IMAGE}
+        assert beward.last_motion_image is None
+        beward._process_alarm_line("2019-07-28;00:57:28;MotionDetection;1;1")
+        assert beward.channel_motion_timestamp[1] == beward.last_motion_timestamp
+        assert beward.last_motion_image == DEFAULT_IMAGE
@@ -0,0 +1,120 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import threading
+from datetime import datetime
+
+from beward import BewardCamera, BewardGeneric
+from beward.clip import ClipBuffer, EventClip, Frame
+from beward.const import ALARM_MOTION, ALARM_SENSOR, ALARM_SENSOR_OUT
+from beward.core import local_tz
+from beward.emulator import BewardEmulator
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
+
+
+def _frame(idx: int, size: int = 10) -> Frame:
+    """Return test frame."""
+    return Frame(datetime.now(local_tz), bytes([idx]) * size)
+
+
+def test_clip_buffer():
+    """Test freezing of frames around alarms."""
+    camera = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    buffer = ClipBuffer(camera, pre_frames=2, post_frames=2)
+    clips = []
+    buffer.add_listener(clips.append)
+    buffer.add_listener(lambda _clip: 1 / 0)
+    camera.add_alarms_handler(buffer._on_alarm, buffer.alarms)
+
+    for idx in range(3):
+        buffer.add_frame(_frame(idx))
+    assert [x.image[0] for x in buffer.frames] == [1, 2]
+
+    now = datetime.now(local_tz)
+    camera._handle_alarm(now, ALARM_MOTION, state=True)
+    camera._handle_alarm(now, ALARM_MOTION, state=False)
+    camera._handle_alarm(now, ALARM_SENSOR_OUT, state=True)
+    buffer.add_frame(_frame(3))
+    camera._handle_alarm(now, ALARM_SENSOR, state=True)
+    buffer.add_frame(_frame(4))
+    assert len(clips) == 1
+    buffer.add_frame(_frame(5))
+
+    assert [(x.alarm, [f.image[0] for f in x.frames]) for x in clips] == [
+        (ALARM_MOTION, [1, 2, 3, 4]),
+        (ALARM_SENSOR, [2, 3, 4, 5]),
+    ]
+    assert clips[0].timestamp == now
+    assert clips[0].pre_frames == 2
+    assert clips[0].size == 40
+    assert buffer.clips == clips
+    assert buffer.size == 100
+
+    # Taken clips are not counted in memory budget
+    assert buffer.take() == clips
+    assert buffer.clips == []
+    assert buffer.take() == []
+    assert buffer.size == 20
+
+    buffer.remove_listener(clips.append)
+    buffer.remove_listener(clips.append)
+
+
+def test_memory_budget():
+    """Test that memory used by buffer is bounded."""
+    camera = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    buffer = ClipBuffer(camera, pre_frames=3, post_frames=0, max_bytes=100)
+
+    for idx in range(3):
+        buffer.add_frame(_frame(idx, 30))
+    now = datetime.now(local_tz)
+    buffer._on_alarm(camera, now, ALARM_MOTION, state=True)
+    # Clip of 90 bytes is kept at cost of snapshots
+    assert [x.size for x in buffer.clips] == [90]
+    assert buffer.size <= 100
+
+    # Old clip is dropped to keep snapshots for new clips
+    buffer.add_frame(_frame(3, 30))
+    buffer.add_frame(_frame(4, 30))
+    buffer._on_alarm(camera, now, ALARM_SENSOR, state=True)
+    assert [x.size for x in buffer.clips] == [60]
+    assert buffer.size <= 100
+
+    # Clip dropped while recording is not reported
+    buffer = ClipBuffer(camera, pre_frames=1, post_frames=1, max_bytes=50)
+    clips = []
+    buffer.add_listener(clips.append)
+    buffer.add_frame(_frame(0, 30))
+    buffer._on_alarm(camera, now, ALARM_MOTION, state=True)
+    buffer.add_frame(_frame(1, 30))
+    assert clips == []
+    assert buffer.size <= 50
+
+
+def test_camera_clips():
+    """Test taking of snapshots from camera."""
+    with BewardEmulator() as emulator:
+        camera = BewardCamera(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        done = threading.Event()
+        clips: list[EventClip] = []
+
+        with camera.start_clip_buffer(interval=0.01, pre_frames=2) as buffer:
+            buffer.add_listener(lambda clip: clips.append(clip) or done.set())
+            while len(buffer.frames) < 2:
+                buffer._stop_event.wait(0.01)
+            camera._handle_alarm(datetime.now(local_tz), ALARM_MOTION, state=True)
+            assert done.wait(5)
+
+        assert len(clips[0].frames) == 5
+        assert clips[0].frames[0].image == emulator.image
+        assert buffer._thread is None
+        assert buffer._on_alarm not in camera._alarm_handlers
+
+        emulator.stop()
+        buffer = ClipBuffer(camera, interval=0.01).start()
+        buffer._stop_event.wait(0.05)
+        buffer.stop()
+        assert buffer.frames == []
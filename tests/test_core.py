@@ -2,8 +2,11 @@
 """Test to verify that Beward library works."""
 
 import logging
+import socket
+import threading
 from datetime import datetime
-from time import sleep
+from itertools import pairwise
+from time import monotonic, sleep
 
 import pytest
 import requests
@@ -14,11 +17,15 @@ from beward.const import (
     ALARM_MOTION,
     ALARM_ONLINE,
     ALARM_SENSOR,
+    ALARM_SENSOR_OUT,
     BEWARD_CAMERA,
     BEWARD_DOORBELL,
 )
+from beward.debounce import AlarmDebouncer
+from beward.emulator import BewardEmulator
+from beward.util import to_bool
 
-from . import function_url, load_fixture
+from . import AlarmStreamServer, function_url, load_fixture, wait_for
 from .const import MOCK_HOST, MOCK_PASS, MOCK_USER, local_tz
 
 
@@ -277,6 +284,19 @@ def test_listen_alarms():
     _listen_alarms_tester(alarms, ex_log)
 
 
+def test_listen_alarms_invalid_line(caplog):
+    """Test that malformed alarm line doesn't interrupt alarms stream."""
+    local_tz_str = datetime.now(local_tz).isoformat(timespec="seconds")[19:]
+
+    alarms = [
+        "2019-07-28;00:57:27;MotionDetection;1;x",
+        "2019-07-28;00:57:28;MotionDetection;1;0",
+    ]
+    ex_log = [f"2019-07-28 00:57:28{local_tz_str};MotionDetection;True"]
+    _listen_alarms_tester(alarms, ex_log)
+    assert "Invalid alarm" in caplog.text
+
+
 def test_system_info():
     """Test that get system info from device."""
     data = load_fixture("systeminfo.txt")
@@ -302,6 +322,35 @@ def test_system_info():
 
         assert beward.system_info == {}
 
+        mock.register_uri("get", function_url("systeminfo"), status_code=401)
+
+        assert beward.system_info == {}
+        with pytest.raises(requests.HTTPError, match="systeminfo"):
+            beward.get_info("systeminfo")
+
+
+def test_get_info():
+    """Test that get info from device."""
+    with requests_mock.Mocker() as mock:
+        mock.register_uri(
+            "get",
+            function_url("rtsp"),
+            content=load_fixture("rtsp.txt").encode() + b"\r\n\r\nbroken\r\n",
+        )
+        beward = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+
+        assert beward.get_info("rtsp") == {
+            "RtspSwitch": "open",
+            "RtspAuth": "open",
+            "RtspPacketSize": "1460",
+            "RtspPort": "47456",
+        }
+        assert beward.get_info(
+            "rtsp",
+            keys=("RtspAuth", "RtspPort"),
+            types={"RtspAuth": to_bool, "RtspPort": int},
+        ) == {"RtspAuth": True, "RtspPort": 47456}
+
 
 def test_device_type():
     """Test that detect device type."""
@@ -354,3 +403,318 @@ def test_is_online():
 
         assert beward.is_online is False
         assert beward.available is False
+
+
+@pytest.fixture
+def alarm_server():
+    """Make local server which holds alarms stream open."""
+    server = AlarmStreamServer(b"2019-07-28;00:57:27;MotionDetection;1;0\r\n")
+    yield server.port
+    server.close()
+
+
+def _start_listener(port: int) -> tuple[BewardGeneric, threading.Event]:
+    beward = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS, port=port)
+    online = threading.Event()
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        if alarm == ALARM_MOTION:
+            online.set()
+
+    beward.add_alarms_handler(_handler).start()
+    return beward, online
+
+
+def test_stop(alarm_server):
+    """Test that stop interrupts blocked alarms listener."""
+    beward, online = _start_listener(alarm_server)
+    assert online.wait(2)
+
+    start = monotonic()
+    assert beward.stop(timeout=1) is True
+    assert monotonic() - start < 1
+    assert beward._alarm_listeners == []
+    assert beward.alarm_state[ALARM_ONLINE] is False
+
+
+def test_stop_all(alarm_server):
+    """Test that stop all listeners at once."""
+    devices = [_start_listener(alarm_server) for _ in range(3)]
+    for _, online in devices:
+        assert online.wait(2)
+
+    start = monotonic()
+    assert BewardGeneric.stop_all(timeout=1) is True
+    assert monotonic() - start < 1
+    for beward, _ in devices:
+        assert beward._alarm_listeners == []
+
+
+def test_context_manager(alarm_server):
+    """Test that context manager releases device resources."""
+    with BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS, port=alarm_server) as bwd:
+        assert bwd in BewardGeneric._instances
+
+        online = threading.Event()
+        bwd.add_alarms_handler(lambda *_: online.set()).start()
+        assert online.wait(2)
+
+    assert bwd not in BewardGeneric._instances
+    assert bwd._alarm_listeners == []
+
+
+def test_remove_last_handler(alarm_server):
+    """Test that removing the last handler closes open alarms stream."""
+    beward = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS, port=alarm_server)
+    online = threading.Event()
+
+    def _handler(*_args: object) -> None:
+        online.set()
+
+    beward.add_alarms_handler(_handler).start()
+    assert online.wait(2)
+
+    beward.remove_alarms_handler(_handler)
+    beward._listener.join(1)
+    assert not beward._listener.is_alive()
+    assert beward._alarm_responses == set()
+
+
+def test_stop_waiting_headers():
+    """Test that stop is not blocked by device which never sends headers."""
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        beward = BewardGeneric(
+            "127.0.0.1", MOCK_USER, MOCK_PASS, port=server.getsockname()[1]
+        )
+        beward.add_alarms_handler(lambda *_: None).start()
+        sleep(0.1)
+        assert beward.stop() is True
+
+
+def test_alarms_watchdog(alarm_server):
+    """Test that stalled alarms stream is reconnected."""
+    beward = BewardGeneric(
+        "127.0.0.1",
+        MOCK_USER,
+        MOCK_PASS,
+        port=alarm_server,
+        reconnect_delay=0.01,
+        idle_timeout=0.1,
+    )
+    log = []
+    beward.add_alarms_handler(lambda *args: log.append(args[2:])).start()
+    sleep(0.5)
+    assert beward.stop(timeout=1) is True
+
+    assert beward.reconnects >= 2
+    assert isinstance(beward.last_error, requests.exceptions.ConnectionError)
+    assert log.count((ALARM_ONLINE, True)) == beward.reconnects + 1
+    assert log.count((ALARM_MOTION, True)) == beward.reconnects + 1
+
+
+@pytest.mark.parametrize(
+    ("params", "error"),
+    [
+        ({"status_code": 503}, requests.exceptions.HTTPError),
+        (
+            {"exc": requests.exceptions.ConnectionError},
+            requests.exceptions.ConnectionError,
+        ),
+    ],
+)
+def test_alarms_reconnect(params, error):
+    """Test that alarms stream is reconnected on errors."""
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("get", function_url("alarmchangestate"), **params)
+        beward = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS, reconnect_delay=0.01)
+        beward.add_alarms_handler(lambda *_: None).start()
+        sleep(0.1)
+        assert beward.stop(timeout=1) is True
+
+    assert beward.reconnects >= 2
+    assert isinstance(beward.last_error, error)
+    assert beward.alarm_state[ALARM_ONLINE] is False
+
+
+def test_alarms_backoff(monkeypatch, alarm_server):
+    """Test that backoff is reset only after alarms stream delivered data."""
+    attempts = []
+
+    def _backoff(attempt, *_args: float) -> float:
+        attempts.append(attempt)
+        return 0.01
+
+    monkeypatch.setattr("beward.core.backoff_delay", _backoff)
+    with requests_mock.Mocker() as mock:
+        mock.register_uri("get", function_url("alarmchangestate"), text="")
+        beward = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+        log = []
+        beward.add_alarms_handler(lambda *args: log.append(args[2:])).start()
+        sleep(0.1)
+        assert beward.stop(timeout=1) is True
+
+    assert len(attempts) >= 2
+    assert attempts == list(range(len(attempts)))
+    assert log[:2] == [(ALARM_ONLINE, True), (ALARM_ONLINE, False)]
+    assert all(x != y for x, y in pairwise(log))
+
+    attempts.clear()
+    beward = BewardGeneric(
+        "127.0.0.1", MOCK_USER, MOCK_PASS, port=alarm_server, idle_timeout=0.1
+    )
+    beward.add_alarms_handler(lambda *_: None).start()
+    sleep(0.5)
+    assert beward.stop(timeout=1) is True
+    assert attempts
+    assert set(attempts) == {0}
+
+
+def test_alarms_resubscribe():
+    """Test that alarms stream is requested again for changed subscriptions."""
+    server = AlarmStreamServer(
+        b"2019-07-28;00:57:27;MotionDetection;1;0\r\n"
+        b"2019-07-28;00:57:28;SensorAlarm;1;0\r\n"
+    )
+    beward = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS, port=server.port)
+    try:
+        beward.add_alarms_handler(lambda *_: None, alarms=[ALARM_MOTION]).start()
+        assert wait_for(lambda: beward.alarm_state.get(ALARM_MOTION) is True)
+        assert ALARM_SENSOR not in beward.alarm_state
+
+        beward.add_alarms_handler(lambda *_: None, alarms=[ALARM_SENSOR])
+        assert wait_for(lambda: beward.alarm_state.get(ALARM_SENSOR) is True)
+        assert beward.stop(timeout=1) is True
+    finally:
+        server.close()
+
+    assert "parameter=MotionDetection " in server.requests[0]
+    assert "parameter=MotionDetection%3BSensorAlarm " in server.requests[1]
+    assert beward.reconnects == 0
+
+
+def test_alarms_subscriptions(beward) -> None:
+    """Test that handlers are called only for subscribed alarms."""
+    log = []
+
+    def motion_logger(device, timestamp, alarm, state) -> None:
+        log.append(("motion", alarm))
+
+    def sensor_logger(device, timestamp, alarm, state) -> None:
+        log.append(("sensor", alarm))
+
+    def all_logger(device, timestamp, alarm, state) -> None:
+        log.append(("all", alarm))
+
+    beward.add_alarms_handler(motion_logger, alarms=[ALARM_MOTION])
+    beward.add_alarms_handler(sensor_logger, alarms=[ALARM_SENSOR, ALARM_MOTION])
+    assert beward.subscribed_alarms == {ALARM_MOTION, ALARM_SENSOR}
+    assert beward._alarms_params(1, None) == {
+        "channel": 1,
+        "parameter": "MotionDetection;SensorAlarm",
+    }
+
+    beward._process_alarm_line("2019-07-28;00:57:27;MotionDetection;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:28;SensorAlarm;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:29;SensorOutAlarm;1;0")
+    assert sorted(log) == [
+        ("motion", ALARM_MOTION),
+        ("sensor", ALARM_MOTION),
+        ("sensor", ALARM_SENSOR),
+    ]
+    assert ALARM_SENSOR_OUT not in beward.alarm_state
+
+    log.clear()
+    beward.add_alarms_handler(all_logger)
+    assert beward.subscribed_alarms is None
+    assert beward._alarms_params(0, [ALARM_SENSOR, ALARM_MOTION]) == {
+        "channel": 0,
+        "parameter": "MotionDetection;SensorAlarm",
+    }
+
+    beward._process_alarm_line("2019-07-28;00:57:28;SensorAlarm;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:29;SensorOutAlarm;1;0")
+    assert sorted(log) == [("all", ALARM_SENSOR), ("sensor", ALARM_SENSOR)]
+
+    log.clear()
+    beward._alarms_params(0, None)
+    beward.remove_alarms_handler(sensor_logger)
+    beward._handle_alarm(datetime.now(local_tz), ALARM_SENSOR_OUT, state=True)
+    beward._handle_alarm(datetime.now(local_tz), ALARM_MOTION, state=True)
+    assert sorted(log) == [
+        ("all", ALARM_MOTION),
+        ("all", ALARM_SENSOR_OUT),
+        ("motion", ALARM_MOTION),
+    ]
+
+
+def test_channels(beward) -> None:
+    """Test per-channel alarms state."""
+    log = []
+    beward.add_alarms_handler(
+        lambda _dev, _ts, alarm, state: log.append((alarm, state))
+    )
+    assert beward._alarms_params([1, 0, 1], None) == {"channel": "0;1", "parameter": ""}
+    assert beward._alarms_params([2], None) == {"channel": 2, "parameter": ""}
+
+    beward._alarms_params([0, 1], None)
+    beward._process_alarm_line("2019-07-28;00:57:27;MotionDetection;1;1")
+    beward._process_alarm_line("2019-07-28;00:57:28;SensorAlarm;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:29;SensorAlarm;0;2")
+    assert log == [(ALARM_MOTION, True), (ALARM_SENSOR, True)]
+    assert beward.channel_alarm_state == {
+        0: {ALARM_SENSOR: True},
+        1: {ALARM_MOTION: True},
+    }
+    assert beward.channel_alarm_timestamp[1][ALARM_MOTION] == datetime(
+        2019, 7, 28, 0, 57, 27, tzinfo=local_tz
+    )
+
+    beward.alarm_debouncer = AlarmDebouncer()
+    beward._process_alarm_line("2019-07-28;00:57:30;MotionDetection;0;1")
+    beward._process_alarm_line("2019-07-28;00:57:31;MotionDetection;1;1")
+    assert beward.channel_alarm_state[1] == {ALARM_MOTION: True}
+    assert list(beward._channel_handlers) == [1]
+
+    # Debounced alarms of different channels do not mask each other
+    beward._process_alarm_line("2019-07-28;00:57:32;MotionDetection;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:33;MotionDetection;0;0")
+    assert beward.channel_alarm_state[0][ALARM_MOTION] is False
+    assert beward.channel_alarm_state[1][ALARM_MOTION] is True
+    beward.alarm_debouncer.close()
+
+    with pytest.raises(ValueError, match="invalid literal"):
+        beward._process_alarm_line("2019-07-28;00:57:31;MotionDetection;1;x")
+
+
+def test_config():
+    """Test batch reading and writing of device configuration."""
+    with BewardEmulator() as emulator:
+        beward = BewardGeneric(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        config = beward.get_config(["systeminfo", "rtsp", "systeminfo"])
+        assert list(config) == ["systeminfo", "rtsp"]
+        assert config["rtsp"]["RtspPort"] == "554"
+        requests_count = emulator.requests
+
+        assert beward.set_config("rtsp", {"RtspPort": 554, "RtspAuth": "open"}) == {}
+        assert beward.set_config("rtsp", {"RtspPort": 8554}) == {"RtspPort": "8554"}
+        assert emulator.requests == requests_count + 1
+        assert beward.get_info("rtsp")["RtspPort"] == "8554"
+
+        assert beward.set_config("rtsp", {"RtspPort": 8554}, force=True) == {
+            "RtspPort": "8554"
+        }
+
+        beward = BewardGeneric(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        assert beward.set_config("rtsp", {"RtspPort": 554}) == {"RtspPort": "554"}
+        assert emulator.writes == 3
+
+        with pytest.raises(requests.HTTPError):
+            beward.set_config("nonexistent", {"Key": 1}, force=True)
+        with pytest.raises(requests.HTTPError, match="nonexistent"):
+            beward.get_config(["rtsp", "nonexistent"])
+        with pytest.raises(requests.HTTPError, match="nonexistent"):
+            beward.set_config("nonexistent", {"Key": 1})
@@ -0,0 +1,149 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+from datetime import datetime
+from time import sleep
+
+import requests_mock
+
+from beward import BewardCamera, BewardGeneric
+from beward.const import ALARM_MOTION, ALARM_SENSOR
+from beward.debounce import AlarmDebouncer
+
+from . import function_url, load_binary
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER, local_tz
+
+
+def _process(debouncer: AlarmDebouncer, events: list, log: list) -> None:
+    for alarm, state in events:
+        debouncer.process(
+            datetime.now(local_tz),
+            alarm,
+            state,
+            lambda _, alarm, state: log.append((alarm, state)),
+        )
+
+
+def test_edge_triggered():
+    """Test that only state transitions are passed."""
+    debouncer = AlarmDebouncer()
+    log = []
+
+    _process(
+        debouncer,
+        [
+            (ALARM_MOTION, True),
+            (ALARM_MOTION, True),
+            (ALARM_MOTION, True),
+            (ALARM_MOTION, False),
+            (ALARM_MOTION, False),
+        ],
+        log,
+    )
+    assert log == [(ALARM_MOTION, True), (ALARM_MOTION, False)]
+    assert debouncer.repeats == {ALARM_MOTION: 3}
+
+    _process(debouncer, [(ALARM_SENSOR, False), (ALARM_MOTION, True)], log)
+    assert log[2:] == [(ALARM_MOTION, True)]
+    assert debouncer.repeats == {ALARM_MOTION: 1, ALARM_SENSOR: 0}
+
+
+def test_channels():
+    """Test that states of channels are debounced separately."""
+    debouncer = AlarmDebouncer()
+    log = []
+    for channel, state in ((0, True), (1, True), (1, True), (0, False), (1, False)):
+        debouncer.process(
+            datetime.now(local_tz),
+            ALARM_MOTION,
+            state,
+            lambda _, _alarm, state, channel=channel: log.append((channel, state)),
+            channel,
+        )
+
+    assert log == [(0, True), (1, True), (0, False), (1, False)]
+    assert debouncer.channel_repeats == {0: {ALARM_MOTION: 1}, 1: {ALARM_MOTION: 2}}
+    assert debouncer.repeats == {ALARM_MOTION: 3}
+
+
+def test_release():
+    """Test that release is passed only after quiet period."""
+    debouncer = AlarmDebouncer(release=0.1)
+    log = []
+
+    _process(
+        debouncer,
+        [
+            (ALARM_MOTION, True),
+            (ALARM_MOTION, False),
+            (ALARM_MOTION, True),
+            (ALARM_MOTION, False),
+            (ALARM_MOTION, False),
+        ],
+        log,
+    )
+    assert log == [(ALARM_MOTION, True)]
+
+    sleep(0.2)
+    assert log == [(ALARM_MOTION, True), (ALARM_MOTION, False)]
+    assert debouncer.repeats == {ALARM_MOTION: 2}
+
+
+def test_hold():
+    """Test that active state is held for configured time per alarm type."""
+    debouncer = AlarmDebouncer(hold={ALARM_MOTION: 0.1})
+    log = []
+
+    _process(
+        debouncer,
+        [
+            (ALARM_MOTION, True),
+            (ALARM_SENSOR, True),
+            (ALARM_MOTION, False),
+            (ALARM_SENSOR, False),
+        ],
+        log,
+    )
+    assert log == [(ALARM_MOTION, True), (ALARM_SENSOR, True), (ALARM_SENSOR, False)]
+
+    sleep(0.2)
+    assert log[3:] == [(ALARM_MOTION, False)]
+
+
+def test_close():
+    """Test that pending releases are cancelled on close."""
+    debouncer = AlarmDebouncer(release=10)
+    beward = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS, alarm_debouncer=debouncer)
+
+    beward._process_alarm_line("2019-07-28;00:57:27;MotionDetection;1;0")
+    beward._process_alarm_line("2019-07-28;00:57:28;MotionDetection;0;0")
+    beward.close()
+
+    assert beward.alarm_state[ALARM_MOTION] is True
+    assert beward.alarm_repeats == {ALARM_MOTION: 1}
+
+    _process(debouncer, [(ALARM_SENSOR, True), (ALARM_SENSOR, False)], [])
+    assert debouncer._states[0, ALARM_SENSOR].active is False
+
+
+def test_camera_snapshots():
+    """Test that camera captures snapshot only on motion start."""
+    with requests_mock.Mocker() as mock:
+        mock.register_uri(
+            "get",
+            function_url("images"),
+            content=load_binary("image.jpg"),
+            headers={"Content-Type": "image/jpeg"},
+        )
+        beward = BewardCamera(
+            MOCK_HOST, MOCK_USER, MOCK_PASS, alarm_debouncer=AlarmDebouncer()
+        )
+        assert beward.alarm_repeats == {}
+
+        for _ in range(5):
+            beward._process_alarm_line("2019-07-28;00:57:27;MotionDetection;1;0")
+
+        assert mock.call_count == 1
+        assert beward.alarm_repeats == {ALARM_MOTION: 5}
+
+    assert BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS).alarm_repeats == {}
@@ -0,0 +1,240 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic
+
+import pytest
+
+from beward import BewardGeneric
+from beward.const import (
+    ALARM_MOTION,
+    ALARM_SENSOR,
+    DISPATCH_ASYNCIO,
+    DISPATCH_THREAD,
+    OVERFLOW_BLOCK,
+    OVERFLOW_COALESCE,
+)
+from beward.dispatch import AlarmDispatcher
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER, local_tz
+
+
+def test___init__failing():
+    """Test dispatcher initialization failing."""
+    with pytest.raises(ValueError):  # noqa: PT011
+        AlarmDispatcher("nonexistent")
+    with pytest.raises(ValueError):  # noqa: PT011
+        AlarmDispatcher(overflow="nonexistent")
+    with pytest.raises(ValueError):  # noqa: PT011
+        AlarmDispatcher(queue_size=0)
+    with pytest.raises(ValueError):  # noqa: PT011
+        AlarmDispatcher(DISPATCH_ASYNCIO)
+
+
+def test_dispatch_inline(beward):
+    """Test that inline dispatcher calls handlers on caller thread."""
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        log.append((device, alarm, state, threading.current_thread()))
+
+    beward.add_alarms_handler(_handler)
+    beward._handle_alarm(datetime.now(local_tz), ALARM_MOTION, state=True)
+
+    assert log == [(beward, ALARM_MOTION, True, threading.current_thread())]
+    assert beward.alarm_dispatcher.stats["dispatched"] == 1
+
+
+def test_dispatch_thread():
+    """Test that thread dispatcher delivers events in order on the pool."""
+    started = threading.Event()
+    release = threading.Event()
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        started.set()
+        release.wait(1)
+        log.append((alarm, state, threading.current_thread().name))
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="test") as pool:
+        dispatcher = AlarmDispatcher(DISPATCH_THREAD, executor=pool, queue_size=2)
+        beward = BewardGeneric(
+            MOCK_HOST, MOCK_USER, MOCK_PASS, alarm_dispatcher=dispatcher
+        )
+        beward.add_alarms_handler(_handler)
+
+        timestamp = datetime.now(local_tz)
+        beward._handle_alarm(timestamp, ALARM_MOTION, state=True)
+        assert started.wait(1)
+        beward._handle_alarm(timestamp, ALARM_MOTION, state=False)
+        beward._handle_alarm(timestamp, ALARM_SENSOR, state=True)
+        beward._handle_alarm(timestamp, ALARM_SENSOR, state=False)
+        release.set()
+        dispatcher.close()
+
+    assert [x[:2] for x in log] == [
+        (ALARM_MOTION, True),
+        (ALARM_SENSOR, True),
+        (ALARM_SENSOR, False),
+    ]
+    assert all(x[2].startswith("test") for x in log)
+    assert dispatcher.stats == {
+        "queued": 0,
+        "dispatched": 3,
+        "dropped": 1,
+        "coalesced": 0,
+        "late": 0,
+    }
+
+
+def test_dispatch_thread_own_executor():
+    """Test that thread dispatcher creates and releases its own pool."""
+    done = threading.Event()
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        done.set()
+        msg = "Handler failure"
+        raise RuntimeError(msg)
+
+    dispatcher = AlarmDispatcher(DISPATCH_THREAD, late_after=0)
+    dispatcher.dispatch(
+        None, [_handler], datetime.now(local_tz), ALARM_MOTION, state=True
+    )
+    assert done.wait(1)
+    dispatcher.close()
+
+    assert dispatcher.dispatched == 1
+    assert dispatcher.late == 1
+
+    dispatcher.dispatch(
+        None, [_handler], datetime.now(local_tz), ALARM_MOTION, state=True
+    )
+    assert dispatcher.dropped == 1
+
+
+def test_dispatch_coalesce():
+    """Test that coalesce overflow policy replaces queued events of same type."""
+    loop = asyncio.new_event_loop()
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        log.append((alarm, state))
+
+    try:
+        dispatcher = AlarmDispatcher(
+            DISPATCH_ASYNCIO, loop=loop, queue_size=2, overflow=OVERFLOW_COALESCE
+        )
+        timestamp = datetime.now(local_tz)
+        for alarm, state in (
+            (ALARM_MOTION, True),
+            (ALARM_SENSOR, True),
+            (ALARM_MOTION, False),
+            (ALARM_SENSOR, False),
+            (ALARM_MOTION, True),
+        ):
+            dispatcher.dispatch(None, [_handler], timestamp, alarm, state)
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
+
+    assert log == [(ALARM_MOTION, True), (ALARM_SENSOR, False)]
+    assert dispatcher.coalesced == 3
+    assert dispatcher.dropped == 0
+
+
+def test_dispatch_asyncio_coroutine():
+    """Test that asyncio dispatcher schedules coroutine handlers."""
+    log = []
+
+    async def _handler(device, timestamp, alarm, state) -> None:
+        log.append((alarm, state))
+
+    async def _run() -> None:
+        dispatcher = AlarmDispatcher(DISPATCH_ASYNCIO)
+        dispatcher.dispatch(None, [_handler], datetime.now(local_tz), ALARM_MOTION, 1)
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    asyncio.run(_run())
+
+    assert log == [(ALARM_MOTION, 1)]
+
+
+def test_dispatch_block():
+    """Test that block overflow policy waits for free space in queue."""
+    loop = asyncio.new_event_loop()
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        log.append((alarm, state))
+
+    try:
+        dispatcher = AlarmDispatcher(
+            DISPATCH_ASYNCIO,
+            loop=loop,
+            queue_size=1,
+            overflow=OVERFLOW_BLOCK,
+            block_timeout=0.01,
+        )
+        timestamp = datetime.now(local_tz)
+        dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=True)
+        dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=False)
+
+        assert dispatcher.dropped == 1
+
+        loop.run_until_complete(asyncio.sleep(0))
+        dispatcher.dispatch(None, [_handler], timestamp, ALARM_SENSOR, state=True)
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
+
+    assert log == [(ALARM_MOTION, True), (ALARM_SENSOR, True)]
+
+
+def test_dispatch_block_on_loop():
+    """Test that event loop thread does not wait for queue it drains."""
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        log.append((alarm, state))
+
+    async def _run() -> AlarmDispatcher:
+        dispatcher = AlarmDispatcher(
+            DISPATCH_ASYNCIO, queue_size=1, overflow=OVERFLOW_BLOCK, block_timeout=5
+        )
+        timestamp = datetime.now(local_tz)
+        dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=True)
+        dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=False)
+        await asyncio.sleep(0)
+        return dispatcher
+
+    start = monotonic()
+    dispatcher = asyncio.run(_run())
+    assert monotonic() - start < 1
+    assert dispatcher.dropped == 1
+    assert log == [(ALARM_MOTION, True)]
+
+
+def test_dispatch_schedule_failure():
+    """Test that queue is drained after failed scheduling."""
+    log = []
+
+    def _handler(device, timestamp, alarm, state) -> None:
+        log.append((alarm, state))
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    dispatcher = AlarmDispatcher(DISPATCH_THREAD, executor=executor)
+    executor.shutdown()
+
+    timestamp = datetime.now(local_tz)
+    dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=True)
+    assert dispatcher._draining is False
+
+    dispatcher._executor = ThreadPoolExecutor(max_workers=1)
+    dispatcher.dispatch(None, [_handler], timestamp, ALARM_MOTION, state=False)
+    dispatcher._executor.shutdown()
+    assert log == [(ALARM_MOTION, True), (ALARM_MOTION, False)]
@@ -0,0 +1,150 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import threading
+from time import monotonic
+
+import pytest
+
+from beward import Beward, BewardCamera, BewardDevice, BewardDoorbell, BewardGeneric
+from beward.const import ALARM_MOTION, ALARM_SENSOR
+from beward.emulator import (
+    DEFAULT_IMAGE,
+    BewardEmulator,
+    EmulatorFleet,
+    build_discovery_response,
+)
+from beward.metrics import METRIC_DISCOVERY_DEVICES, MetricsRegistry
+
+
+def test_discovery_response():
+    """Test encoding and decoding of discovery response."""
+    data = build_discovery_response(
+        1692, "IPC1692", "192.168.1.90", "00:5a:22:30:07:5f", net_mask="255.0.0.0"
+    )
+    assert len(data) == 612
+    assert Beward.parse_discovery_response(data) == BewardDevice(
+        device_id=1692,
+        name="IPC1692",
+        host_ip="192.168.1.90",
+        http_port=80,
+        data_port=5000,
+        mac="00:5a:22:30:07:5f",
+        net_mask="255.0.0.0",
+        gate_ip="0.0.0.0",  # noqa: S104
+    )
+
+
+def test_emulator():
+    """Test that library works with emulated device."""
+    with BewardEmulator(model="B102S") as emulator:
+        beward = Beward.factory(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        assert isinstance(beward, BewardCamera)
+        assert not isinstance(beward, BewardDoorbell)
+        assert beward.system_info["DeviceModel"] == "B102S"
+        assert beward.live_image == DEFAULT_IMAGE
+
+        beward.obtain_uris()
+        assert beward.rtsp_port == "554"
+
+        assert beward.query("nonexistent") is None
+
+        beward = BewardGeneric(
+            emulator.host, emulator.username, "wrong", port=emulator.port
+        )
+        assert beward.query("systeminfo") is None
+        assert emulator.requests == 6
+
+
+def test_emulator_alarms():
+    """Test that emulated device streams alarms."""
+    with BewardEmulator(
+        event_rate=1000, max_events=4, alarms=(ALARM_MOTION, ALARM_SENSOR)
+    ) as emulator:
+        beward = BewardGeneric(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        log = []
+        done = threading.Event()
+
+        def _handler(device, timestamp, alarm, state) -> None:
+            log.append((alarm, state))
+            if len(log) == 4:
+                done.set()
+
+        beward.add_alarms_handler(_handler, alarms=[ALARM_MOTION])
+        beward.listen_alarms()
+        assert done.wait(2)
+        assert beward.stop() is True
+
+    assert log == [
+        (ALARM_MOTION, True),
+        (ALARM_MOTION, False),
+        (ALARM_MOTION, True),
+        (ALARM_MOTION, False),
+    ]
+    assert emulator.events_sent == 4
+
+
+def test_fleet_discovery():
+    """Test that emulated devices answer discovery requests."""
+    with EmulatorFleet(3) as fleet:
+        devices = Beward.discovery("127.0.0.1", fleet.discovery.port, timeout=0.2)
+
+    assert len(devices) == 3
+    for emulator in fleet.devices:
+        dev = devices[emulator.mac]
+        assert dev.device_id == emulator.device_id
+        assert dev.name == f"IPC{emulator.device_id}"
+        assert dev.host_ip == "127.0.0.1"
+        assert dev.http_port == emulator.port
+
+    with EmulatorFleet(1, discovery_port=None) as fleet:
+        assert fleet.discovery is None
+
+
+def test_sweep():
+    """Test discovery of emulated devices by unicast sweep."""
+    metrics = MetricsRegistry()
+    with EmulatorFleet(3) as fleet:
+        start = monotonic()
+        devices = Beward.sweep(
+            ["127.0.0.0/29", "127.0.0.1/32"],
+            fleet.discovery.port,
+            rate=50,
+            window=2,
+            timeout=0.2,
+            metrics=metrics,
+        )
+        # 7 probes at 50 probes per second
+        assert monotonic() - start >= 0.12
+        assert sorted(x.device_id for x in devices.values()) == [1, 2, 3]
+        assert metrics.get(METRIC_DISCOVERY_DEVICES) == 3
+
+        assert len(Beward.sweep("127.0.0.1", fleet.discovery.port, timeout=0.2)) == 3
+
+    with pytest.raises(ValueError, match="must be positive"):
+        Beward.sweep("127.0.0.1", window=0)
+
+
+def test_channels():
+    """Test listening for alarms of several channels by one stream."""
+    with BewardEmulator(channels=2, event_rate=float("inf"), max_events=4) as emulator:
+        beward = BewardGeneric(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        done = threading.Event()
+        beward.add_alarms_handler(
+            lambda dev, _ts, _alarm, _state: (
+                len(dev.channel_alarm_state) == 2
+                and all(len(x) == 2 for x in dev.channel_alarm_state.values())
+                and done.set()
+            )
+        )
+        beward.listen_alarms([0, 1, 5])
+        try:
+            assert done.wait(5)
+        finally:
+            beward.close()
@@ -0,0 +1,164 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from beward import BewardGeneric
+from beward.const import ALARM_MOTION, ALARM_SENSOR
+from beward.journal import (
+    BUCKETS,
+    CATALOG_DEVICE,
+    INDEX_SUFFIX,
+    LOG_SUFFIX,
+    RECORD,
+    EventJournal,
+    JournalEvent,
+    _DayIndex,
+    device_key,
+)
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
+
+START = datetime(2024, 3, 1, 23, 58, tzinfo=timezone.utc)  # noqa: UP017
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Return journal with events of two devices within two days."""
+    journal = EventJournal(tmp_path / "journal")
+    for idx in range(8):
+        journal.append(
+            START + timedelta(minutes=idx),
+            "cam:80" if idx % 2 else "door:80",
+            ALARM_MOTION if idx % 4 < 2 else ALARM_SENSOR,
+            state=idx % 3 == 0,
+        )
+    yield journal
+    journal.close()
+
+
+def _minutes(events) -> list[int]:
+    """Return minutes since START of events."""
+    return [int((x.timestamp - START).total_seconds() // 60) for x in events]
+
+
+def test_query(journal):
+    """Test range queries of journal."""
+    assert journal.events == 8
+    assert [x.isoformat() for x in journal.days()] == ["2024-03-01", "2024-03-02"]
+
+    events = list(journal.query())
+    assert _minutes(events) == list(range(8))
+    assert events[3] == JournalEvent(
+        (START + timedelta(minutes=3)).astimezone(events[3].timestamp.tzinfo),
+        "cam:80",
+        ALARM_SENSOR,
+        state=True,
+    )
+
+    assert _minutes(journal.query(devices=["cam:80"])) == [1, 3, 5, 7]
+    assert _minutes(journal.query(alarms=[ALARM_SENSOR])) == [2, 3, 6, 7]
+    assert _minutes(
+        journal.query(devices=["door:80"], alarms=[ALARM_SENSOR, "Unknown"])
+    ) == [2, 6]
+    assert _minutes(
+        journal.query(START + timedelta(minutes=1), START + timedelta(minutes=4))
+    ) == [1, 2, 3]
+    assert _minutes(journal.query(START + timedelta(seconds=150))) == [3, 4, 5, 6, 7]
+    assert _minutes(journal.query(end=START + timedelta(seconds=90))) == [0, 1]
+    assert _minutes(journal.query(START + timedelta(days=1))) == []
+    assert list(journal.query(devices=["unknown:80"])) == []
+
+
+def test_index_spans(journal):
+    """Test that only records of selected devices are read from day log."""
+    ids = journal._ids[CATALOG_DEVICE]
+    cam, door = ids["cam:80"], ids["door:80"]
+    index = _DayIndex(journal._file_path(date(2024, 3, 2), INDEX_SUFFIX))
+    try:
+        assert index.spans([cam], 0, BUCKETS - 1) == [(1, 2), (3, 4), (5, 6)]
+        assert index.spans([door], 0, 3) == [(0, 1), (2, 3)]
+        assert index.spans([cam, door], 0, BUCKETS - 1) == [(0, 6)]
+        assert index.spans(None, 4, 5) == [(4, 6)]
+        assert index.spans([cam], 10, 20) == []
+    finally:
+        index.close()
+
+
+def test_reopen(journal, tmp_path):
+    """Test reopening of journal and recovery of damaged files."""
+    journal.close()
+    path = tmp_path / "journal"
+    day = path / "2024-03-02"
+
+    # Torn record and stale index are fixed on reopen
+    with day.with_suffix(LOG_SUFFIX).open("ab") as file:
+        file.write(b"\x00" * (RECORD.size // 2))
+    day.with_suffix(INDEX_SUFFIX).unlink()
+
+    with EventJournal(path) as reopened:
+        assert _minutes(reopened.query(devices=["cam:80"])) == [1, 3, 5, 7]
+        reopened.append(
+            START + timedelta(minutes=8), "new:80", ALARM_MOTION, state=True
+        )
+        assert _minutes(reopened.query(devices=["new:80", "cam:80"])) == [1, 3, 5, 7, 8]
+        assert day.with_suffix(LOG_SUFFIX).stat().st_size == 7 * RECORD.size
+
+    # Logs are scanned if index is unusable, and index is rebuilt on writing
+    day.with_suffix(INDEX_SUFFIX).write_bytes(b"invalid!")
+    with EventJournal(path) as reopened:
+        assert _minutes(reopened.query(START + timedelta(minutes=7))) == [7, 8]
+        day.with_suffix(INDEX_SUFFIX).unlink()
+        assert _minutes(reopened.query(alarms=[ALARM_MOTION])) == [0, 1, 4, 5, 8]
+
+    day.with_suffix(INDEX_SUFFIX).write_bytes(b"invalid!")
+    with EventJournal(path) as reopened:
+        reopened.append(
+            START + timedelta(minutes=9), "cam:80", ALARM_MOTION, state=False
+        )
+        assert _minutes(reopened.query(devices=["cam:80"])) == [1, 3, 5, 7, 9]
+
+
+def test_open_days(tmp_path):
+    """Test closing of the oldest days on writing."""
+    with EventJournal(tmp_path) as journal:
+        for idx in range(4):
+            journal.append(
+                START + timedelta(days=idx), "cam:80", ALARM_MOTION, state=True
+            )
+        assert len(journal._days) == 2
+        journal.append(START, "cam:80", ALARM_MOTION, state=False)
+        assert len(journal._days) == 2
+        assert [x.state for x in journal.query(end=START + timedelta(days=1))] == [
+            True,
+            False,
+        ]
+
+
+def test_handler_and_replay(tmp_path):
+    """Test journaling and replay of device alarms."""
+    device = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    assert device_key(device) == f"{MOCK_HOST}:80"
+    events = []
+
+    with EventJournal(tmp_path) as journal:
+        device.add_alarms_handler(journal)
+        now = datetime.now(timezone.utc).replace(microsecond=0)  # noqa: UP017
+        device._handle_alarm(now, ALARM_MOTION, state=True)
+        device._handle_alarm(now, ALARM_SENSOR, state=True)
+        device._handle_alarm(now, ALARM_MOTION, state=False)
+        assert journal.events == 3
+
+        device.add_alarms_handler(
+            lambda _dev, timestamp, alarm, state: events.append(
+                (timestamp, alarm, state)
+            ),
+            [ALARM_MOTION],
+        )
+        device.alarm_state[ALARM_MOTION] = None
+        assert journal.replay(device, alarms=[ALARM_MOTION]) == 2
+        assert events == [(now, ALARM_MOTION, True), (now, ALARM_MOTION, False)]
+        assert journal.events == 3
+        assert device.alarm_state[ALARM_MOTION] is None
@@ -0,0 +1,217 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import socket
+import threading
+
+import pytest
+import requests
+
+from beward import Beward, BewardCamera, BewardGeneric
+from beward.const import ALARM_MOTION
+from beward.emulator import DEFAULT_IMAGE, BewardEmulator, EmulatorFleet
+from beward.metrics import (
+    METRIC_ALARM_EVENTS,
+    METRIC_DISCOVERY_DEVICES,
+    METRIC_DISCOVERY_DURATION,
+    METRIC_IMAGE_SIZE,
+    METRIC_RECONNECTS,
+    METRIC_REQUEST_DURATION,
+    METRIC_REQUESTS,
+    MetricsRegistry,
+)
+
+from . import AlarmStreamServer
+from .const import MOCK_PASS, MOCK_USER
+
+
+def test_registry():
+    """Test counters, histograms and rendering."""
+    metrics = MetricsRegistry(buckets={"test_seconds": (0.1, 1)})
+    assert metrics.render() == ""
+
+    metrics.inc("test_total", device='a"b')
+    metrics.inc("test_total", 2, device='a"b')
+    metrics.observe("test_seconds", 0.05)
+    metrics.observe("test_seconds", 0.5)
+    metrics.observe(METRIC_IMAGE_SIZE, 2000.5, device="cam")
+
+    assert metrics.get("test_total", device='a"b') == 3
+    assert metrics.get("test_total") == 0
+    assert metrics.get("test_seconds") == 2
+    assert metrics.get("test_seconds", device="x") == 0
+
+    assert metrics.render() == (
+        "# TYPE test_total counter\n"
+        'test_total{device="a\\"b"} 3\n'
+        f"# HELP {METRIC_IMAGE_SIZE} Size of images received from cameras.\n"
+        f"# TYPE {METRIC_IMAGE_SIZE} histogram\n"
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="1024"}} 0\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="4096"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="16384"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="65536"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="262144"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="1048576"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="4194304"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_bucket{{device="cam",le="+Inf"}} 1\n'
+        f'{METRIC_IMAGE_SIZE}_sum{{device="cam"}} 2000.5\n'
+        f'{METRIC_IMAGE_SIZE}_count{{device="cam"}} 1\n'
+        "# TYPE test_seconds histogram\n"
+        'test_seconds_bucket{le="0.1"} 1\n'
+        'test_seconds_bucket{le="1"} 2\n'
+        'test_seconds_bucket{le="+Inf"} 2\n'
+        "test_seconds_sum 0.55\n"
+        "test_seconds_count 2\n"
+    )
+
+    metrics.reset()
+    assert metrics.render() == ""
+
+
+def test_exporters():
+    """Test that exporters receive every update."""
+    metrics = MetricsRegistry()
+    log = []
+
+    def _exporter(kind, name, labels, value) -> None:
+        log.append((kind, name, labels, value))
+
+    def _failing(*_: object) -> None:
+        raise RuntimeError
+
+    metrics.add_exporter(_failing).add_exporter(_exporter)
+    metrics.inc("test_total", device="a")
+    metrics.observe("test_seconds", 0.5)
+    metrics.remove_exporter(_exporter).remove_exporter(_exporter)
+    metrics.inc("test_total", device="a")
+
+    assert log == [
+        ("counter", "test_total", {"device": "a"}, 1),
+        ("histogram", "test_seconds", {}, 0.5),
+    ]
+
+
+def test_device_metrics():
+    """Test that device records requests, images and alarms."""
+    metrics = MetricsRegistry()
+    with BewardEmulator(event_rate=1000, max_events=3, alarms=(ALARM_MOTION,)) as emu:
+        device = f"127.0.0.1:{emu.port}"
+        beward = BewardCamera(
+            emu.host, emu.username, emu.password, port=emu.port, metrics=metrics
+        )
+        beward.get_info("systeminfo")
+        beward.query("nonexistent")
+        assert beward.live_image == DEFAULT_IMAGE
+
+        done = threading.Event()
+        beward.add_alarms_handler(
+            lambda *_: (
+                metrics.get(METRIC_ALARM_EVENTS, device=device, alarm=ALARM_MOTION) == 3
+                and done.set()
+            )
+        )
+        beward.listen_alarms()
+        assert done.wait(2)
+        beward.close()
+
+    assert (
+        metrics.get(METRIC_REQUESTS, device=device, function="systeminfo", status=200)
+        == 1
+    )
+    assert (
+        metrics.get(METRIC_REQUESTS, device=device, function="nonexistent", status=404)
+        == 1
+    )
+    assert metrics.get(METRIC_REQUESTS, device=device, function="images", status=200)
+    assert (
+        metrics.get(
+            METRIC_REQUESTS, device=device, function="alarmchangestate", status=200
+        )
+        == 1
+    )
+    assert (
+        metrics.get(METRIC_REQUEST_DURATION, device=device, function="systeminfo") == 1
+    )
+    assert metrics.get(METRIC_IMAGE_SIZE, device=device) >= 1
+
+
+def test_failures_metrics():
+    """Test that device records failed requests and reconnects."""
+    metrics = MetricsRegistry()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+
+    beward = BewardGeneric(
+        "127.0.0.1",
+        MOCK_USER,
+        MOCK_PASS,
+        port=closed_port,
+        metrics=metrics,
+        reconnect_delay=0.01,
+    )
+    with pytest.raises(requests.ConnectionError):
+        beward.query("systeminfo")
+
+    device = f"127.0.0.1:{closed_port}"
+    assert (
+        metrics.get(
+            METRIC_REQUESTS, device=device, function="systeminfo", status="error"
+        )
+        == 1
+    )
+
+    beward.add_alarms_handler(lambda *_: None)
+    beward.listen_alarms()
+    try:
+        for _ in range(200):
+            if metrics.get(METRIC_RECONNECTS, device=device) >= 2:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        beward.close()
+
+    assert metrics.get(METRIC_RECONNECTS, device=device) == beward.reconnects
+    assert (
+        metrics.get(
+            METRIC_REQUESTS, device=device, function="alarmchangestate", status="error"
+        )
+        >= 2
+    )
+
+    server = AlarmStreamServer(status=503)
+    try:
+        beward = BewardGeneric(
+            "127.0.0.1", MOCK_USER, MOCK_PASS, port=server.port, metrics=metrics
+        )
+        beward.add_alarms_handler(lambda *_: None)
+        beward.listen_alarms()
+        for _ in range(200):
+            if beward.last_error is not None:
+                break
+            threading.Event().wait(0.01)
+        beward.close()
+    finally:
+        server.close()
+
+    assert (
+        metrics.get(
+            METRIC_REQUESTS,
+            device=f"127.0.0.1:{server.port}",
+            function="alarmchangestate",
+            status=503,
+        )
+        >= 1
+    )
+
+
+def test_discovery_metrics():
+    """Test that discovery is measured."""
+    metrics = MetricsRegistry()
+    with EmulatorFleet(2) as fleet:
+        Beward.discovery(
+            "127.0.0.1", fleet.discovery.port, timeout=0.2, metrics=metrics
+        )
+
+    assert metrics.get(METRIC_DISCOVERY_DURATION) == 1
+    assert metrics.get(METRIC_DISCOVERY_DEVICES) == 2
@@ -0,0 +1,166 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import functools
+import threading
+
+import pytest
+
+from beward import Beward, BewardCamera, BewardDevice, BewardGeneric
+from beward.const import DISCOVERY_ADDED, DISCOVERY_CHANGED, DISCOVERY_REMOVED
+from beward.emulator import BewardEmulator, EmulatorFleet
+from beward.monitor import DiscoveryEvent, DiscoveryMonitor
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
+
+MAC = "00:5a:22:30:07:5f"
+
+
+def _device(emulator: BewardEmulator) -> BewardDevice:
+    """Return discovered device record of emulator."""
+    return Beward.parse_discovery_response(emulator.discovery_response())
+
+
+def test_poll():
+    """Test detection of changes of discovered devices."""
+    first = BewardEmulator(mac=MAC)
+    second = BewardEmulator(mac=MAC)
+    other = BewardEmulator(mac="00:5a:22:30:07:60", device_id=2)
+    results = [
+        {MAC: _device(first)},
+        {MAC: _device(first), other.mac: _device(other)},
+        {MAC: _device(second)},
+        {},
+        {},
+    ]
+    monitor = DiscoveryMonitor(lambda: results.pop(0), remove_after=2)
+    events = []
+    monitor.add_listener(events.append)
+
+    assert monitor.poll() == [DiscoveryEvent(DISCOVERY_ADDED, _device(first))]
+    assert monitor.poll() == [DiscoveryEvent(DISCOVERY_ADDED, _device(other))]
+    # Device missed once is not removed yet
+    assert monitor.poll() == [
+        DiscoveryEvent(DISCOVERY_CHANGED, _device(second), _device(first))
+    ]
+    assert monitor.poll() == [DiscoveryEvent(DISCOVERY_REMOVED, _device(other))]
+    assert monitor.poll() == [DiscoveryEvent(DISCOVERY_REMOVED, _device(second))]
+    assert len(events) == 5
+    assert monitor.devices == {}
+
+    monitor.remove_listener(events.append)
+    monitor.remove_listener(events.append)
+    for emulator in (first, second, other):
+        emulator.stop()
+
+
+def test_listener_error(caplog):
+    """Test that failing listener does not break monitor."""
+    device = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    with BewardEmulator() as emulator:
+        monitor = DiscoveryMonitor(lambda: {emulator.mac: _device(emulator)})
+        monitor.add_listener(lambda _event: 1 / 0)
+        monitor.track(device, emulator.mac.upper().replace(":", "-"))
+        assert len(monitor.poll()) == 1
+        assert "Error in discovery listener" in caplog.text
+        assert (device.host, device.port) == (emulator.host, emulator.port)
+
+        monitor.untrack(emulator.mac)
+        assert monitor._tracked == {}
+
+
+def test_update_host_error(monkeypatch, caplog):
+    """Test that failing address update does not break monitor."""
+    device = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    with BewardEmulator(mac=MAC) as emulator:
+        monitor = DiscoveryMonitor(lambda: {MAC: _device(emulator)})
+        events = []
+        monitor.add_listener(events.append)
+        monitor.track(device, MAC)
+
+        def _update_host(host, port) -> None:
+            msg = "Address update failure"
+            raise RuntimeError(msg)
+
+        monkeypatch.setattr(device, "update_host", _update_host)
+        assert len(monitor.poll()) == 1
+        assert len(events) == 1
+        assert "Error updating address" in caplog.text
+        assert device.host == MOCK_HOST
+
+
+def test_update_host():
+    """Test that tracked devices follow changes of their addresses."""
+    with BewardEmulator(mac=MAC) as first, BewardEmulator(mac=MAC) as second:
+        camera = BewardCamera(
+            first.host, first.username, first.password, port=first.port
+        )
+        assert camera.live_image is not None
+        url = camera.live_image_url
+        log = camera._log
+
+        results = [{MAC: _device(first)}, {MAC: _device(second)}]
+        monitor = DiscoveryMonitor(lambda: results.pop(0))
+        monitor.track(camera, MAC)
+        monitor.poll()
+        assert camera._log is log
+
+        monitor.poll()
+        assert camera.port == second.port
+        assert camera._log is not log
+        assert camera._log.extra["device"] == f"{second.host}:{second.port}"
+        assert camera.live_image_url != url
+
+        requests = second.requests
+        assert camera.live_image is not None
+        assert second.requests == requests + 1
+
+        assert camera.update_host(second.host, second.port) is False
+        with pytest.raises(ValueError, match="Not a valid host address"):
+            camera.update_host("-invalid-")
+
+
+def test_update_host_alarms():
+    """Test that alarms stream is reconnected to new address of device."""
+    with (
+        BewardEmulator(event_rate=0) as first,
+        BewardEmulator(event_rate=0) as second,
+    ):
+        device = BewardGeneric(
+            first.host,
+            first.username,
+            first.password,
+            port=first.port,
+            reconnect_delay=0.05,
+        )
+        connected = threading.Event()
+        device.add_alarms_handler(
+            lambda dev, _ts, _alarm, state: (
+                state and dev.port == second.port and connected.set()
+            )
+        )
+        device.listen_alarms()
+        try:
+            device.update_host(second.host, second.port)
+            assert connected.wait(5)
+        finally:
+            device.close()
+
+
+def test_monitor():
+    """Test background discovery of emulated devices."""
+    with EmulatorFleet(2) as fleet:
+        probe = functools.partial(
+            Beward.discovery, "127.0.0.1", fleet.discovery.port, timeout=0.1
+        )
+        added = threading.Event()
+        with DiscoveryMonitor(probe, interval=0.05) as monitor:
+            monitor.add_listener(
+                lambda _event: len(monitor.devices) == 2 and added.set()
+            )
+            assert added.wait(5)
+
+        assert monitor._thread is None
+
+    failing = DiscoveryMonitor(lambda: 1 / 0, interval=0.05).start()
+    failing.stop()
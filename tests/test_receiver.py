@@ -0,0 +1,216 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import socket
+from datetime import datetime
+
+import pytest
+import requests
+
+from beward import BewardGeneric
+from beward.const import ALARM_MOTION, ALARM_SENSOR
+from beward.core import local_tz
+from beward.receiver import AlarmReceiver, normalize_mac
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
+
+
+def test_normalize_mac():
+    """Test normalization of MAC addresses."""
+    assert normalize_mac("00:5A:22-30.07:5f") == "005a2230075f"
+
+
+def test_receiver_update_host():
+    """Test that receiver follows changes of device addresses."""
+    device = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    receiver = AlarmReceiver()
+    try:
+        receiver.add_device(device)
+        receiver.add_device(device)
+        assert device._address_listeners == [receiver._index_address]
+
+        device.update_host("127.0.0.1")
+        assert receiver.find_device("127.0.0.1") is device
+        assert receiver.find_device(MOCK_HOST) is None
+
+        receiver.remove_device(device)
+        receiver.remove_device(device)
+        assert device._address_listeners == []
+        device.update_host(MOCK_HOST)
+        assert receiver.find_device(MOCK_HOST) is None
+    finally:
+        receiver.stop()
+
+
+def test_parse_notification():
+    """Test parsing of alarm notifications."""
+    parse = AlarmReceiver.parse_notification
+    assert parse({"alarm": ALARM_MOTION, "time": "2019-07-28 00:57:27"}, b"") == [
+        f"2019-07-28;00:57:27;{ALARM_MOTION};1;0"
+    ]
+    assert parse({}, b"2019-07-28;00:57:27;SensorAlarm;0;0\r\n\r\n") == [
+        "2019-07-28;00:57:27;SensorAlarm;0;0"
+    ]
+    assert parse({"alarm": ALARM_MOTION, "state": "0"}, b"")[0].endswith(
+        f";{ALARM_MOTION};0;0"
+    )
+
+    with pytest.raises(ValueError, match="No alarms"):
+        parse({}, b"")
+    with pytest.raises(ValueError, match="not enough values"):
+        parse({}, b"garbage")
+    with pytest.raises(ValueError, match="does not match format"):
+        parse({"alarm": ALARM_MOTION, "time": "yesterday"}, b"")
+    with pytest.raises(ValueError, match="invalid literal"):
+        parse({}, b"2019-07-28;00:57:27;SensorAlarm;0;0\n2019-07-28;00:57:28;x;0;x")
+
+
+def test_receiver():
+    """Test routing of pushed alarms to devices."""
+    local = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS)
+    remote = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    received = []
+    for device in (local, remote):
+        device.add_alarms_handler(
+            lambda dev, ts, alarm, state: received.append((dev, ts, alarm, state))
+        )
+
+    with AlarmReceiver("127.0.0.1") as receiver:
+        receiver.add_device(local)
+        receiver.add_device(remote, mac="00:5a:22:30:07:5f")
+        url = f"http://{receiver.host}:{receiver.port}/event"
+
+        res = requests.get(
+            url,
+            params={"alarm": ALARM_MOTION, "time": "2019-07-28 00:57:27"},
+            timeout=5,
+        )
+        assert res.status_code == 200
+        assert received == [
+            (
+                local,
+                datetime(2019, 7, 28, 0, 57, 27, tzinfo=local_tz),
+                ALARM_MOTION,
+                True,
+            )
+        ]
+
+        # MAC addresses are not trusted without token
+        res = requests.post(
+            url,
+            data=b"2019-07-28;00:57:28;SensorAlarm;1;0\n"
+            b"2019-07-28;00:57:29;SensorAlarm;0;0\n",
+            headers={"X-Device-MAC": "00-5A-22-30-07-5F"},
+            timeout=5,
+        )
+        assert res.status_code == 200
+        assert [(x[0], x[2], x[3]) for x in received[1:]] == [
+            (local, ALARM_SENSOR, True),
+            (local, ALARM_SENSOR, False),
+        ]
+        assert ALARM_SENSOR not in remote.alarm_state
+        assert receiver.events == 3
+
+        res = requests.post(url, data=b"garbage", timeout=5)
+        assert res.status_code == 400
+
+        # Notification is rejected as a whole, nothing is handled
+        res = requests.post(
+            url,
+            data=b"2019-07-28;00:57:30;SensorAlarm;1;0\n"
+            b"2019-07-28;00:57:31;SensorAlarm;0;x\n",
+            timeout=5,
+        )
+        assert res.status_code == 400
+        assert len(received) == 3
+
+        res = requests.post(url, data=b"x" * 70000, timeout=5)
+        assert res.status_code == 413
+
+        receiver.remove_device(local)
+        res = requests.get(url, params={"alarm": ALARM_MOTION}, timeout=5)
+        assert res.status_code == 404
+        assert receiver.unknown == 1
+        assert len(received) == 3
+
+    receiver.add_device(BewardGeneric("nonexistent.invalid", MOCK_USER, MOCK_PASS))
+    assert receiver.find_device("nonexistent.invalid") is not None
+
+
+def test_receiver_handler_error(caplog):
+    """Test that failing alarms handler doesn't break notification."""
+    device = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS)
+    received = []
+
+    def _handler(dev, timestamp, alarm, state) -> None:
+        received.append(alarm)
+        if alarm == ALARM_MOTION:
+            msg = "Handler failure"
+            raise RuntimeError(msg)
+
+    device.add_alarms_handler(_handler)
+
+    with AlarmReceiver("127.0.0.1") as receiver:
+        receiver.add_device(device)
+        res = requests.post(
+            f"http://{receiver.host}:{receiver.port}/event",
+            data=f"2019-07-28;00:57:27;{ALARM_MOTION};1;0\n"
+            f"2019-07-28;00:57:28;{ALARM_SENSOR};1;0\n".encode(),
+            timeout=5,
+        )
+        assert res.status_code == 200
+        assert received == [ALARM_MOTION, ALARM_SENSOR]
+        assert receiver.events == 2
+        assert "Handler failure" in caplog.text
+
+
+def test_receiver_token():
+    """Test authorization of notifications by shared token."""
+    local = BewardGeneric("127.0.0.1", MOCK_USER, MOCK_PASS)
+    remote = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    received = []
+    for device in (local, remote):
+        device.add_alarms_handler(
+            lambda dev, _ts, alarm, state: received.append((dev, alarm, state))
+        )
+
+    with AlarmReceiver(token="secret") as receiver:  # noqa: S106
+        assert receiver.host == "127.0.0.1"
+        receiver.add_device(local)
+        receiver.add_device(remote, mac="00:5a:22:30:07:5f")
+        url = f"http://{receiver.host}:{receiver.port}/event"
+        params = {"alarm": ALARM_MOTION, "mac": "00:5a:22:30:07:5f"}
+
+        res = requests.get(url, params=params, timeout=5)
+        assert res.status_code == 403
+        res = requests.get(
+            url, params=params, headers={"X-Beward-Token": "wrong"}, timeout=5
+        )
+        assert res.status_code == 403
+        assert receiver.unauthorized == 2
+        assert received == []
+
+        res = requests.get(url, params={**params, "token": "secret"}, timeout=5)
+        assert res.status_code == 200
+        res = requests.get(
+            url,
+            params={"alarm": ALARM_SENSOR},
+            headers={"X-Beward-Token": "secret"},
+            timeout=5,
+        )
+        assert res.status_code == 200
+        assert received == [(remote, ALARM_MOTION, True), (local, ALARM_SENSOR, True)]
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_receiver_content_length(length):
+    """Test rejecting of invalid Content-Length."""
+    with (
+        AlarmReceiver() as receiver,
+        socket.create_connection((receiver.host, receiver.port), timeout=5) as sock,
+    ):
+        sock.sendall(
+            "POST /event HTTP/1.1\r\nHost: x\r\n"
+            f"Content-Length: {length}\r\n\r\n".encode()
+        )
+        assert sock.recv(1024).startswith(b"HTTP/1.1 400 ")
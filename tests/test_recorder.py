@@ -0,0 +1,101 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import threading
+
+import pytest
+
+from beward import BewardGeneric
+from beward.const import ALARM_MOTION, ALARM_SENSOR
+from beward.emulator import BewardEmulator
+from beward.recorder import AlarmRecorder, AlarmReplayer, read_recording
+
+from .const import MOCK_HOST, MOCK_PASS, MOCK_USER
+
+
+def _device(log) -> BewardGeneric:
+    """Return device which logs alarms."""
+    device = BewardGeneric(MOCK_HOST, MOCK_USER, MOCK_PASS)
+    device.add_alarms_handler(
+        lambda _dev, _timestamp, alarm, state: log.append((alarm, state)),
+        [ALARM_MOTION, ALARM_SENSOR],
+    )
+    return device
+
+
+def test_record_and_replay(tmp_path):
+    """Test recording of alarms stream and its replay."""
+    path = tmp_path / "alarms.rec"
+    live = []
+    done = threading.Event()
+
+    def _handler(_dev, _timestamp, alarm, state) -> None:
+        live.append((alarm, state))
+        if len(live) == 4:
+            done.set()
+
+    with (
+        AlarmRecorder(path) as recorder,
+        BewardEmulator(event_rate=1000, max_events=4) as emulator,
+    ):
+        device = BewardGeneric(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            alarm_recorder=recorder,
+        )
+        device.add_alarms_handler(_handler, alarms=[ALARM_MOTION, ALARM_SENSOR])
+        device.listen_alarms()
+        assert done.wait(2)
+        assert device.stop() is True
+        assert recorder.lines == 4
+
+    # Lines received after closing are ignored
+    recorder.record(device, "2019-07-28;00:57:27;MotionDetection;1;0")
+    assert recorder.lines == 4
+
+    entries = list(read_recording(path))
+    assert [x[1] for x in entries] == [f"127.0.0.1:{emulator.port}"] * 4
+    assert entries[0][0] <= entries[-1][0]
+
+    replayed = []
+    replayer = AlarmReplayer(path, speed=0)
+    assert replayer.replay(_device(replayed)) == 4
+    assert replayed == live
+    assert replayer.rate > 0
+
+    replayed.clear()
+    assert replayer.replay({"unknown:80": _device(replayed)}) == 0
+    assert replayer.skipped == 4
+    assert replayed == []
+
+
+def test_replay_speed(tmp_path):
+    """Test pacing and stopping of replay."""
+    path = tmp_path / "alarms.rec"
+    path.write_text(
+        "100.0\tcam:80\t2019-07-28;00:57:27;MotionDetection;1;0\n"
+        "100.2\tcam:80\tinvalid\n"
+        "100.4\tcam:80\t2019-07-28;00:57:28;MotionDetection;0;0\n",
+        encoding="utf-8",
+    )
+    log = []
+    device = _device(log)
+
+    replayer = AlarmReplayer(path)
+    assert replayer.replay({"cam:80": device}) == 3
+    assert replayer.errors == 1
+    assert replayer.duration >= 0.4
+    assert log == [(ALARM_MOTION, True), (ALARM_MOTION, False)]
+
+    replayer = AlarmReplayer(path, speed=10)
+    assert replayer.replay(device) == 3
+    assert replayer.duration < 0.4
+
+    replayer = AlarmReplayer(path)
+    device.add_alarms_handler(lambda *_args: replayer.stop())
+    assert replayer.replay(device) == 1
+
+    with pytest.raises(ValueError, match="Speed must not be negative"):
+        AlarmReplayer(path, speed=-1)
@@ -0,0 +1,154 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+import beward
+from beward import Beward, BewardCamera, BewardDoorbell, BewardGeneric, registry
+from beward.const import BEWARD_CAMERA, BEWARD_DOORBELL
+from beward.emulator import BewardEmulator
+from beward.registry import (
+    MODEL_INDEX,
+    ModelIndex,
+    get_device_class,
+    register_device_class,
+    register_model,
+    strip_revision,
+    unregister_device_class,
+    unregister_model,
+)
+
+
+@pytest.mark.parametrize(
+    ("model", "expected"),
+    [
+        ("DS06M", "DS06M"),
+        ("DS06M_rev2", "DS06M"),
+        ("DS06M_rev", "DS06M_rev"),
+        ("DS06M_rev2_rev3", "DS06M"),
+    ],
+)
+def test_strip_revision(model, expected):
+    """Test removing of revision suffix."""
+    assert strip_revision(model) == expected
+
+
+def test_model_index():
+    """Test lookup of device types in models index."""
+    index = ModelIndex({"camera": "B1 B2", "doorbell": "DS06"})
+    assert "B1" in index
+    assert "B3" not in index
+    assert index.lookup("B2_rev5") == "camera"
+    assert index.lookup("DS06") == "doorbell"
+    assert index.lookup("DS06M") is None
+    assert index.lookup("") is None
+    assert index.lookup(None) is None
+
+    index.register("DS*", "panel")
+    index.register("DS0*", "doorbell")
+    assert "DS*" in index
+    assert index.lookup("DS06M_rev2") == "doorbell"
+    assert index.lookup("DS10") == "panel"
+    assert index.lookup("DS06") == "doorbell"
+
+    index.register("DS06_rev1", "legacy")
+    assert index.lookup("DS06_rev1") == "legacy"
+
+    index.unregister("DS0*")
+    index.unregister("DS06")
+    index.unregister("nonexistent")
+    assert index.lookup("DS06") == "panel"
+    assert index._prefix_lengths == (2,)
+
+
+def test_register_model():
+    """Test runtime registration of new models."""
+    assert BewardGeneric.get_device_type("B102S_rev1") == BEWARD_CAMERA
+    assert BewardGeneric.get_device_type("NEWMODEL") is None
+
+    register_model("NEW*", BEWARD_DOORBELL)
+    try:
+        assert BewardGeneric.get_device_type("NEWMODEL") == BEWARD_DOORBELL
+    finally:
+        unregister_model("NEW*")
+
+    assert "NEW*" not in MODEL_INDEX
+
+
+def test_lazy_import():
+    """Test that device modules are not imported with package."""
+    code = (
+        "import sys, beward; "
+        "assert 'beward.camera' not in sys.modules; "
+        "assert 'beward.doorbell' not in sys.modules; "
+        "assert beward.BewardDoorbell.__name__ == 'BewardDoorbell'; "
+        "assert 'BewardCamera' in dir(beward)"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)  # noqa: S603
+
+    with pytest.raises(AttributeError):
+        beward.Nonexistent  # noqa: B018
+
+
+def test_device_classes(monkeypatch):
+    """Test registration of device classes."""
+    assert get_device_class(BEWARD_CAMERA) is BewardCamera
+    assert get_device_class(None) is None
+
+    @register_device_class("intercom")
+    class BewardIntercom(BewardDoorbell):
+        """Test device class."""
+
+    try:
+        assert get_device_class("intercom") is BewardIntercom
+
+        register_device_class("intercom", "beward.doorbell:BewardDoorbell")
+        assert get_device_class("intercom") is BewardDoorbell
+    finally:
+        unregister_device_class("intercom")
+
+    monkeypatch.setattr(registry, "_entry_points_loaded", False)
+    monkeypatch.setattr(
+        registry,
+        "entry_points",
+        lambda group: [
+            EntryPoint("nvr", "beward.core:BewardGeneric", group),
+            EntryPoint(BEWARD_CAMERA, "beward.core:BewardGeneric", group),
+        ],
+    )
+    try:
+        assert get_device_class("nvr") is BewardGeneric
+        assert get_device_class("nonexistent") is None
+        # Built-in classes are not overridden by entry points
+        assert get_device_class(BEWARD_CAMERA) is BewardCamera
+    finally:
+        unregister_device_class("nvr")
+
+
+def test_factory(monkeypatch):
+    """Test that factory creates instances of registered classes."""
+    register_model("NVR*", "nvr")
+    register_device_class("nvr", "beward.core:BewardGeneric")
+    try:
+        with BewardEmulator(model="NVR100") as emulator:
+            inst = Beward.factory(
+                emulator.host, emulator.username, emulator.password, port=emulator.port
+            )
+            assert type(inst) is BewardGeneric
+
+            unregister_device_class("nvr")
+            monkeypatch.setattr(registry, "_entry_points_loaded", True)
+            with pytest.raises(ValueError, match='Unknown device "NVR100"'):
+                Beward.factory(
+                    emulator.host,
+                    emulator.username,
+                    emulator.password,
+                    port=emulator.port,
+                )
+    finally:
+        unregister_model("NVR*")
+        unregister_device_class("nvr")
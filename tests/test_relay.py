@@ -0,0 +1,76 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from beward import BewardCamera
+from beward.emulator import DEFAULT_IMAGE, BewardEmulator
+from beward.relay import SnapshotRelay
+
+
+def test_relay():
+    """Test serving of cached snapshots."""
+    with pytest.raises(ValueError, match="Max rate must be positive"):
+        SnapshotRelay(max_rate=0)
+
+    with BewardEmulator() as emulator, SnapshotRelay(max_rate=0.01) as relay:
+        camera = BewardCamera(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        url = relay.add_camera(camera, "front door")
+        assert url == f"http://{relay.host}:{relay.port}/front%20door"
+
+        with ThreadPoolExecutor(10) as executor:
+            responses = list(
+                executor.map(lambda _: requests.get(url, timeout=5), range(20))
+            )
+
+        assert {x.status_code for x in responses} == {200}
+        assert {x.content for x in responses} == {DEFAULT_IMAGE}
+        assert responses[0].headers["Content-Type"] == "image/jpeg"
+        assert relay.stats("front door") == {
+            "client_requests": 20,
+            "device_requests": 1,
+        }
+        assert emulator.requests == 1
+
+        etag = responses[0].headers["ETag"]
+        res = requests.get(url, headers={"If-None-Match": f'"x", {etag}'}, timeout=5)
+        assert res.status_code == 304
+        assert res.headers["ETag"] == etag
+        assert res.content == b""
+
+        assert requests.get(relay.url("unknown"), timeout=5).status_code == 404
+
+        relay.remove_camera("front door")
+        assert requests.get(url, timeout=5).status_code == 404
+
+
+def test_relay_refresh():
+    """Test refreshing of snapshots from device."""
+    with BewardEmulator() as emulator, SnapshotRelay(max_rate=1000) as relay:
+        camera = BewardCamera(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        url = relay.add_camera(camera)
+        assert url.endswith(f"/{emulator.host}")
+
+        etag = requests.get(url, timeout=5).headers["ETag"]
+        emulator.image = b"\x89PNG\r\n\x1a\n"
+        res = requests.get(url, headers={"If-None-Match": etag}, timeout=5)
+        assert res.status_code == 200
+        assert res.headers["ETag"] != etag
+        assert res.headers["Content-Type"] == "image/png"
+        assert emulator.requests == 2
+
+        # Last fetched image is served while device is unavailable
+        emulator.stop()
+        res = requests.get(url, timeout=5)
+        assert res.status_code == 200
+        assert res.content == b"\x89PNG\r\n\x1a\n"
+
+        relay.add_camera(camera, "offline")
+        assert requests.get(relay.url("offline"), timeout=5).status_code == 503
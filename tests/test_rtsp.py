@@ -0,0 +1,297 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import base64
+import socket
+import struct
+
+import pytest
+
+from beward import BewardCamera, rtsp
+from beward.emulator import (
+    RTSP_PPS,
+    RTSP_SPS,
+    BewardEmulator,
+    RtspEmulator,
+    build_rtp_packet,
+    packetize_h264,
+)
+from beward.rtsp import (
+    START_CODE,
+    H264Depacketizer,
+    RtspClient,
+    RtspKeyframeGrabber,
+    parse_sdp,
+)
+
+from .const import MOCK_PASS, MOCK_USER
+
+IDR = b"\x65" + bytes(range(200))
+STAP_A = b"\x18" + b"".join(struct.pack(">H", len(x)) + x for x in (RTSP_SPS, RTSP_PPS))
+KEYFRAME = b"".join(START_CODE + x for x in (RTSP_SPS, RTSP_PPS, IDR))
+
+
+def _packets(payloads, seq=0, timestamp=0) -> list[bytes]:
+    """Return RTP packets of one access unit."""
+    return [
+        build_rtp_packet(seq + idx, timestamp, payload, marker=idx == len(payloads) - 1)
+        for idx, payload in enumerate(payloads)
+    ]
+
+
+def _feed(depacketizer, packets) -> list[bytes]:
+    """Feed packets and return completed keyframes."""
+    return [x for x in map(depacketizer.feed, packets) if x is not None]
+
+
+def test_packetize_h264():
+    """Test splitting of NAL units to FU-A fragments."""
+    assert packetize_h264(IDR, 1000) == [IDR]
+
+    fragments = packetize_h264(IDR, 64)
+    assert len(fragments) == 4
+    assert fragments[0][:2] == b"\x7c\x85"
+    assert fragments[1][:2] == b"\x7c\x05"
+    assert fragments[-1][:2] == b"\x7c\x45"
+    assert b"".join(x[2:] for x in fragments) == IDR[1:]
+
+
+def test_depacketizer():
+    """Test reassembling of keyframes from RTP packets."""
+    depacketizer = H264Depacketizer(96)
+
+    # Single NAL unit packets
+    assert _feed(depacketizer, _packets([RTSP_SPS, RTSP_PPS, IDR])) == [KEYFRAME]
+    assert depacketizer.keyframe == KEYFRAME
+
+    # STAP-A and FU-A packets
+    packets = _packets([STAP_A, *packetize_h264(IDR, 64)], seq=3, timestamp=3000)
+    assert _feed(depacketizer, packets) == [KEYFRAME]
+
+    # Not keyframes are skipped
+    assert _feed(depacketizer, _packets([b"\x41abc"], seq=9, timestamp=6000)) == []
+    assert depacketizer.keyframes == 2
+    assert depacketizer.dropped == 0
+
+    # Access unit ended without marker
+    packets = [build_rtp_packet(10, 9000, IDR), build_rtp_packet(11, 12000, b"\x41")]
+    assert _feed(depacketizer, packets) == [KEYFRAME]
+    depacketizer.feed(build_rtp_packet(12, 12000, b"\x41", marker=True))
+
+    # Lost fragment
+    packets = _packets(packetize_h264(IDR, 64), seq=13, timestamp=15000)
+    del packets[1]
+    assert _feed(depacketizer, packets) == []
+    assert depacketizer.dropped == 1
+
+    # Lost start of fragmented NAL unit
+    packets = _packets(packetize_h264(IDR, 64), seq=17, timestamp=18000)
+    assert _feed(depacketizer, packets[1:]) == []
+    assert depacketizer.dropped == 2
+    assert depacketizer.keyframes == 3
+
+
+def test_depacketizer_invalid():
+    """Test skipping of invalid RTP packets."""
+    depacketizer = H264Depacketizer(96)
+    assert depacketizer.feed(b"\x80") is None
+    assert depacketizer.feed(b"\x40" + bytes(20)) is None
+    assert depacketizer.feed(b"\x80\xe1" + bytes(20)) is None
+
+    # Invalid STAP-A
+    packet = build_rtp_packet(0, 0, b"\x18\xff\xff" + RTSP_SPS + IDR, marker=True)
+    assert depacketizer.feed(packet) is None
+
+    # Padding, CSRC and header extension
+    header = build_rtp_packet(1, 3000, b"", marker=True)
+    packet = (
+        bytes((0xB1,))
+        + header[1:]
+        + b"csrc"
+        + b"\xbe\xde\x00\x01"
+        + b"ext!"
+        + IDR
+        + b"\x00\x00\x03"
+    )
+    assert depacketizer.feed(packet) is None
+    assert depacketizer.dropped == 1
+
+    depacketizer.sps, depacketizer.pps = RTSP_SPS, RTSP_PPS
+    assert depacketizer.feed(packet[:2] + b"\x00\x02" + packet[4:]) == KEYFRAME
+
+    # Truncated header extension and padding
+    assert depacketizer.feed(bytes.fromhex("906000010000000100000001")) is None
+    assert depacketizer.feed(bytes.fromhex("906000020000000100000001bede0005")) is None
+    assert depacketizer.feed(bytes.fromhex("a0600003000000010000000165ff")) is None
+    assert depacketizer.keyframes == 1
+
+
+def test_parse_sdp():
+    """Test finding of video track in session description."""
+    emulator = RtspEmulator()
+    try:
+        url, payload_type, sps, pps = parse_sdp(emulator.sdp(), "rtsp://cam/av0_0")
+    finally:
+        emulator.stop()
+    assert url == "rtsp://cam/av0_0/track1"
+    assert payload_type == 96
+    assert (sps, pps) == (RTSP_SPS, RTSP_PPS)
+
+    sprop = base64.b64encode(RTSP_SPS).decode()
+    sdp = (
+        "m=video 0 RTP/AVP 97\n"
+        "a=rtpmap:97 H264/90000\n"
+        f"a=fmtp:97 sprop-parameter-sets={sprop}\n"
+        "a=control:rtsp://cam/video\n"
+        "m=audio 0 RTP/AVP 8\n"
+    )
+    assert parse_sdp(sdp, "rtsp://cam/") == ("rtsp://cam/video", 97, RTSP_SPS, None)
+    sdp = "m=video 0 RTP/AVP 96\na=rtpmap:96 H264/90000\na=control:*\n"
+    assert parse_sdp(sdp, "rtsp://cam/") == ("rtsp://cam/", 96, None, None)
+
+    with pytest.raises(ConnectionError, match=r"No H\.264 video track"):
+        parse_sdp("m=video 0 RTP/AVP 26\na=rtpmap:26 JPEG/90000\n", "rtsp://cam/")
+
+
+@pytest.mark.parametrize("auth", ["digest", "basic"])
+def test_client(auth):
+    """Test RTSP session with authorization."""
+    with RtspEmulator(username=MOCK_USER, password=MOCK_PASS, auth=auth) as emulator:
+        client = RtspClient(emulator.url, timeout=5)
+        try:
+            client.connect()
+            assert client.session == "42424242"
+            assert client.session_timeout == 60
+
+            keyframe = None
+            while keyframe is None:
+                channel, packet = client.read_packet()
+                assert channel == 0
+                keyframe = client.depacketizer.feed(packet)
+            index = struct.unpack(">I", keyframe[-emulator.idr_size - 4 :][:4])[0]
+            assert keyframe == emulator.keyframe(index)
+
+            client.keepalive()
+            while emulator.requests["GET_PARAMETER"] == 0:
+                client.read_packet()
+        finally:
+            client.close()
+
+    assert emulator.requests["DESCRIBE"] == 2
+
+
+def test_client_unauthorized():
+    """Test failure of RTSP session with wrong credentials."""
+    with RtspEmulator(username=MOCK_USER, password=MOCK_PASS) as emulator:
+        client = RtspClient(emulator.url.replace(MOCK_PASS, "wrong"), timeout=5)
+        try:
+            with pytest.raises(
+                ConnectionError, match="DESCRIBE failed with status 401"
+            ):
+                client.connect()
+        finally:
+            client.close()
+
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        client = RtspClient(f"rtsp://127.0.0.1:{server.getsockname()[1]}/", timeout=5)
+        try:
+            client._sock = socket.create_connection(server.getsockname())
+            client._rfile = client._sock.makefile("rb")
+            conn, _ = server.accept()
+            with conn:
+                conn.sendall(b"HTTP/1.1\r\n\r\n")
+                with pytest.raises(ConnectionError, match="Invalid RTSP response"):
+                    client._read_response()
+                conn.close()
+                with pytest.raises(ConnectionError, match="connection closed"):
+                    client.read_packet()
+        finally:
+            client.close()
+
+
+def test_grabber():
+    """Test keeping of the most recent keyframe."""
+    with (
+        RtspEmulator(
+            username=MOCK_USER, password=MOCK_PASS, session_timeout=1
+        ) as emulator,
+        RtspKeyframeGrabber(emulator.url, timeout=5, reconnect_delay=0.01) as grabber,
+    ):
+        keyframe = grabber.get_keyframe(timeout=5)
+        assert keyframe is not None
+        assert keyframe.startswith(START_CODE + RTSP_SPS + START_CODE + RTSP_PPS)
+
+        newer = grabber.get_keyframe(timeout=5, max_age=0)
+        assert newer != keyframe
+
+        while emulator.requests["GET_PARAMETER"] == 0:
+            grabber.get_keyframe(timeout=5, max_age=0)
+
+        # Session is reopened after connection loss
+        emulator._server.close_connections()
+        while emulator.requests["PLAY"] < 2:
+            grabber.get_keyframe(timeout=5, max_age=0)
+        assert grabber.get_keyframe(timeout=5, max_age=0) is not None
+
+    assert grabber._thread is None
+
+
+def test_grabber_unreachable():
+    """Test keyframe grabber without RTSP server."""
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        port = server.getsockname()[1]
+    with RtspKeyframeGrabber(
+        f"rtsp://127.0.0.1:{port}/av0_0", reconnect_delay=0.01
+    ) as grabber:
+        assert grabber.get_keyframe(timeout=0.2) is None
+    assert isinstance(grabber.last_error, OSError)
+
+
+def test_grabber_backoff(monkeypatch):
+    """Test that sessions without keyframes don't reset reconnect backoff."""
+    attempts = []
+
+    def _backoff_delay(attempt, _delay, _max_delay) -> float:
+        attempts.append(attempt)
+        return 0.01
+
+    def _receive(_client) -> None:
+        msg = "No video"
+        raise ConnectionError(msg)
+
+    monkeypatch.setattr(rtsp, "backoff_delay", _backoff_delay)
+    with RtspEmulator(username=MOCK_USER, password=MOCK_PASS) as emulator:
+        grabber = RtspKeyframeGrabber(emulator.url, timeout=5)
+        monkeypatch.setattr(grabber, "_receive", _receive)
+        with grabber:
+            while len(attempts) < 3:
+                grabber.get_keyframe(timeout=0.01)
+        assert attempts[:3] == [0, 1, 2]
+        assert emulator.requests["PLAY"] >= 3
+
+
+def test_camera_keyframe():
+    """Test getting of keyframes from camera."""
+    with (
+        BewardEmulator() as emulator,
+        RtspEmulator(username=emulator.username, password=emulator.password) as rtsp,
+    ):
+        emulator.params["rtsp"]["RtspPort"] = rtsp.port
+        camera = BewardCamera(
+            emulator.host, emulator.username, emulator.password, port=emulator.port
+        )
+        try:
+            assert camera.keyframe(timeout=5) is not None
+            grabber = camera._rtsp_grabber
+            assert camera.keyframe(timeout=5, max_age=0) is not None
+            assert camera._rtsp_grabber is grabber
+            assert rtsp.requests["PLAY"] == 1
+
+            camera.update_host("localhost")
+            assert camera._rtsp_grabber is None
+            assert grabber._thread is None
+
+            assert camera.keyframe(timeout=5) is not None
+        finally:
+            camera.close()
+        assert camera._rtsp_grabber is None
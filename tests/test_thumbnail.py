@@ -0,0 +1,103 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from beward import BewardCamera
+from beward.emulator import DEFAULT_IMAGE, BewardEmulator
+from beward.thumbnail import ThumbnailPool, downscale, image_size
+
+
+def _image(width: int, height: int, fmt: str = "JPEG") -> bytes:
+    """Return image of given size."""
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(out, fmt)
+    return out.getvalue()
+
+
+def test_image_size():
+    """Test reading of image dimensions."""
+    assert image_size(_image(640, 480)) == (640, 480)
+    assert image_size(_image(64, 48, "PNG")) == (64, 48)
+    assert image_size(DEFAULT_IMAGE) == (1, 1)
+    assert image_size(b"\x89PNG\r\n\x1a\n") is None
+    assert image_size(b"\xff\xd8garbage") is None
+    assert image_size(b"GIF89a") is None
+
+
+def test_downscale():
+    """Test downscaling of images."""
+    assert image_size(downscale(_image(640, 480), (320, 320))) == (320, 240)
+    assert image_size(downscale(_image(64, 48, "PNG"), (32, 32))) == (32, 24)
+
+
+def test_pool():
+    """Test caching of downscaled images."""
+    image = _image(640, 480)
+    with ThumbnailPool(max_workers=1, cache_size=1) as pool:
+        thumb = pool.thumbnail(image, (160, 120))
+        assert image_size(thumb) == (160, 120)
+        assert pool.thumbnail(image, (160, 120)) is thumb
+        assert (pool.hits, pool.misses) == (1, 1)
+
+        assert image_size(pool.thumbnail(image, (80, 80))) == (80, 60)
+        assert len(pool._cache) == 1
+
+    with ThumbnailPool(max_workers=0) as pool:
+        assert image_size(pool.thumbnail(image, (64, 64))) == (64, 48)
+        with pytest.raises(OSError, match="cannot identify image"):
+            pool.thumbnail(b"garbage", (64, 64))
+        assert len(pool._cache) == 1
+
+
+def test_thumbnail():
+    """Test fetching of thumbnails from camera."""
+    image = _image(640, 480)
+    pool = ThumbnailPool(max_workers=0)
+    with BewardEmulator(image=image, thumbnail=_image(320, 240)) as emulator:
+        camera = BewardCamera(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            thumbnail_pool=pool,
+        )
+        assert image_size(camera.thumbnail()) == (320, 240)
+        assert camera.device_scaling is True
+        assert pool.misses == 0
+
+        # Too large image returned by device is downscaled locally
+        assert image_size(camera.thumbnail((160, 160))) == (160, 120)
+        assert image_size(camera.thumbnail((160, 160))) == (160, 120)
+        assert (pool.hits, pool.misses) == (1, 1)
+
+    with BewardEmulator(image=image) as emulator:
+        camera = BewardCamera(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            thumbnail_pool=pool,
+        )
+        assert image_size(camera.thumbnail((160, 160))) == (160, 120)
+        assert camera.device_scaling is False
+        assert image_size(camera.thumbnail((160, 160), channel=0)) == (160, 120)
+
+        assert camera.thumbnail(channel=5) is None
+
+    with BewardEmulator(image=_image(160, 120)) as emulator:
+        camera = BewardCamera(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            thumbnail_pool=pool,
+        )
+        # Full-size image smaller than requested size tells nothing of scaling
+        assert image_size(camera.thumbnail((640, 640))) == (160, 120)
+        assert camera.device_scaling is None
+        assert image_size(camera.thumbnail((80, 80))) == (80, 60)
+        assert camera.device_scaling is False
@@ -0,0 +1,142 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test to verify that Beward library works."""
+
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from beward import BewardCamera, BewardGeneric
+from beward.emulator import DEFAULT_IMAGE, BewardEmulator
+from beward.tracing import (
+    ATTR_CONNECTION_REUSED,
+    ATTR_CONTENT_LENGTH,
+    ATTR_DEVICE,
+    ATTR_FUNCTION,
+    ATTR_PHASE,
+    ATTR_STATUS_CODE,
+    PHASE_AUTH,
+    PHASE_CONNECT,
+    PHASE_DNS,
+    PHASE_TOTAL,
+    PHASE_TRANSFER,
+    PHASE_WAIT,
+    SpanRecorder,
+    _phase_timings,
+)
+
+from .const import MOCK_PASS, MOCK_USER
+
+
+def _phases(span) -> set:
+    return {
+        x.removeprefix(ATTR_PHASE) for x in span.attributes if x.startswith(ATTR_PHASE)
+    }
+
+
+def test_query_spans():
+    """Test that queries are traced with timings of phases."""
+    tracer = SpanRecorder()
+    with BewardEmulator() as emulator:
+        beward = BewardCamera(
+            "localhost",
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            tracer=tracer,
+        )
+        beward.get_info("systeminfo")
+        assert beward.live_image == DEFAULT_IMAGE
+        beward.close()
+
+    first, second = tracer.spans
+    assert first.name == "beward systeminfo"
+    assert first.attributes[ATTR_DEVICE] == f"localhost:{emulator.port}"
+    assert first.attributes[ATTR_FUNCTION] == "systeminfo"
+    assert first.attributes[ATTR_STATUS_CODE] == 200
+    assert first.attributes[ATTR_CONNECTION_REUSED] is False
+    assert _phases(first) == {
+        PHASE_DNS,
+        PHASE_CONNECT,
+        PHASE_WAIT,
+        PHASE_TRANSFER,
+        PHASE_TOTAL,
+    }
+    assert first.end_time >= first.start_time
+
+    assert second.name == "beward images"
+    assert second.attributes[ATTR_CONTENT_LENGTH] == len(DEFAULT_IMAGE)
+    assert second.attributes[ATTR_CONNECTION_REUSED] is True
+    assert _phases(second) == {PHASE_WAIT, PHASE_TRANSFER, PHASE_TOTAL}
+
+
+def test_failed_query_span():
+    """Test that failed query is traced with exception."""
+    log = []
+
+    def _callback(span) -> None:
+        log.append(span)
+        raise RuntimeError
+
+    tracer = SpanRecorder(callback=_callback)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+
+    beward = BewardGeneric(
+        "127.0.0.1", MOCK_USER, MOCK_PASS, port=closed_port, tracer=tracer
+    )
+    with pytest.raises(requests.ConnectionError):
+        beward.query("systeminfo")
+
+    assert list(tracer.spans) == log
+    assert isinstance(log[0].exception, requests.ConnectionError)
+    assert _phases(log[0]) == {PHASE_TOTAL}
+    assert repr(log[0]).startswith("<RecordedSpan beward systeminfo ")
+
+
+def test_alarms_span():
+    """Test that connection to alarms stream is traced."""
+    tracer = SpanRecorder()
+    with BewardEmulator(event_rate=1000, max_events=1) as emulator:
+        beward = BewardGeneric(
+            emulator.host,
+            emulator.username,
+            emulator.password,
+            port=emulator.port,
+            tracer=tracer,
+        )
+        done = threading.Event()
+        beward.add_alarms_handler(lambda *_: done.set())
+        with patch.object(beward.session, "get", wraps=beward.session.get) as get:
+            beward.listen_alarms()
+            assert done.wait(2)
+            # Stream is read through long-lived session of device
+            assert get.call_args.args[0].endswith("/cgi-bin/alarmchangestate_cgi")
+        beward.close()
+
+    (span,) = tracer.spans
+    assert span.name == "beward alarmchangestate"
+    assert span.attributes[ATTR_STATUS_CODE] == 200
+    assert _phases(span) >= {PHASE_CONNECT, PHASE_WAIT}
+
+
+def test_phase_timings():
+    """Test calculation of phase durations with authentication challenge."""
+    phases = {
+        "requests": 2,
+        "first_request": 1,
+        "request": 3,
+        "sent": 3.5,
+        "headers": 4,
+        PHASE_CONNECT: 0.5,
+    }
+    assert _phase_timings(phases, 0.5, 6) == {
+        PHASE_TOTAL: 5.5,
+        PHASE_CONNECT: 0.5,
+        PHASE_AUTH: 2,
+        PHASE_WAIT: 0.5,
+        PHASE_TRANSFER: 2,
+    }
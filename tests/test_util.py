@@ -4,7 +4,15 @@
 import contextlib
 from typing import Any
 
-from beward.util import is_valid_fqdn, normalize_fqdn
+import pytest
+
+from beward.util import (
+    backoff_delay,
+    is_valid_fqdn,
+    normalize_fqdn,
+    parse_params,
+    to_bool,
+)
 
 
 def test_normalize_fqdn():
@@ -92,6 +100,15 @@ def test_rfc_3696_s_2__invalid():
     assert is_valid_fqdn("192.168.0.1") is False
 
 
+def test_backoff_delay():
+    """Test exponential backoff delay calculation."""
+    for attempt, low, high in ((0, 0.5, 1), (1, 1, 2), (3, 4, 8), (10, 30, 60)):
+        for _ in range(100):
+            assert low <= backoff_delay(attempt, 1, 60) <= high
+
+    assert backoff_delay(1000, 1, 60) <= 60
+
+
 def _is_valid_fqdn_from_labels_sequence(fqdn_labels_sequence) -> bool:
     fqdn = ".".join(fqdn_labels_sequence)
     return is_valid_fqdn(fqdn)
@@ -107,3 +124,43 @@ def assertValidFQDN(*seq: Any) -> None:  # noqa: N802
 def assertInvalidFQDN(*seq: Any) -> None:  # noqa: N802
     """Negative assert function for FQDN validations."""
     assert _is_valid_fqdn_from_labels_sequence(seq) is False
+
+
+def test_to_bool():
+    """Test conversion of device values to boolean."""
+    assert to_bool("open") is True
+    assert to_bool(" ON ") is True
+    assert to_bool("0") is False
+    assert to_bool("close") is False
+    with pytest.raises(ValueError):  # noqa: PT011
+        to_bool("maybe")
+
+
+def test_parse_params():
+    """Test parsing of key=value device responses."""
+    data = (
+        b"HostName=IPC\xd0\x94\r\n"
+        b"\r\n"
+        b"malformed line\r\n"
+        b"=orphan value\r\n"
+        b"Url=rtsp://host/?a=1&b=2\r\n"
+        b"RtspPort=554\r\n"
+        b"RtspAuth=open\r\n"
+        b"ChannelNum=many"
+    )
+    assert parse_params(data) == {
+        "HostName": "IPCД",
+        "Url": "rtsp://host/?a=1&b=2",
+        "RtspPort": "554",
+        "RtspAuth": "open",
+        "ChannelNum": "many",
+    }
+    assert parse_params(data, "latin1", keys=["HostName"]) == {
+        "HostName": "IPC\xd0\x94"
+    }
+    assert parse_params(
+        data,
+        keys=["RtspPort", "RtspAuth", "ChannelNum", "Missing"],
+        types={"RtspPort": int, "RtspAuth": to_bool, "ChannelNum": int},
+    ) == {"RtspPort": 554, "RtspAuth": True, "ChannelNum": "many"}
+    assert parse_params(b"") == {}